@@ -6,7 +6,6 @@ from auto_labeling_pipeline.mappings import MappingTemplate
 from auto_labeling_pipeline.menu import Options
 from auto_labeling_pipeline.models import RequestModelFactory
 from auto_labeling_pipeline.postprocessing import PostProcessor
-from django.shortcuts import get_object_or_404
 from django_drf_filepond.models import TemporaryUpload
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
@@ -25,7 +24,7 @@ from .exceptions import (
 from .models import AutoLabelingConfig
 from .pipeline.execution import execute_pipeline, get_label_collection
 from .serializers import AutoLabelingConfigSerializer
-from projects.models import Project
+from projects.context import get_project_context
 from projects.permissions import IsProjectAdmin, IsProjectMember
 
 
@@ -71,7 +70,7 @@ class RestAPIRequestTesting(APIView):
 
     @property
     def project(self):
-        return get_object_or_404(Project, pk=self.kwargs["project_id"])
+        return get_project_context(self.request, self.kwargs["project_id"]).project
 
     def create_model(self):
         model_name = self.request.data["model_name"]
@@ -152,7 +151,7 @@ class AutomatedLabeling(generics.CreateAPIView):
     swagger_schema = None
 
     def create(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
         example = project.examples.get(pk=self.request.query_params["example"])
         configs = AutoLabelingConfig.objects.filter(project=project)
         # Todo: make async calls or celery tasks to reduce waiting time.
@@ -107,6 +107,11 @@ def command_run_task_queue(args):
     ]
     if is_windows():
         argv.append("--pool=solo")
+    if args.beat:
+        if is_windows():
+            print("The periodic tasks can't run in the worker on Windows. Run `celery beat` separately.")
+        else:
+            argv.append("--beat")
     app.worker_main(argv=argv)
 
 
@@ -155,6 +160,11 @@ def main():
     # Create a parser for task queue.
     parser_queue = subparsers.add_parser("task", help="see `task -h`")
     parser_queue.add_argument("--concurrency", type=int, default=2, help="concurrency")
+    parser_queue.add_argument(
+        "--beat",
+        action="store_true",
+        help="run the periodic tasks, e.g. the rebuild of the metrics, in this worker. Give it to one worker only",
+    )
     parser_queue.add_argument("--env_file", type=str, help="read in a file of environment variables")
     parser_queue.set_defaults(handler=command_run_task_queue)
 
@@ -10,7 +10,7 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 Any setting that is configured via an environment variable may
 also be set in a `.env` file in the project base directory.
 """
-from os import path
+from os import cpu_count, path
 
 import dj_database_url
 from environs import Env, EnvError
@@ -238,6 +238,23 @@ if DEBUG:
 
 # Batch size for importing data
 IMPORT_BATCH_SIZE = env.int("IMPORT_BATCH_SIZE", 1000)
+# Load the imported rows with COPY FROM STDIN when the database is PostgreSQL
+IMPORT_USE_COPY = env.bool("IMPORT_USE_COPY", True)
+# Number of processes each import starts to parse the files and make the examples, and the size of the ranges
+# large line-based files are split into. A range is parsed in memory by a worker, so the ranges are kept small.
+# The processes are started by the Celery worker running the import, so 1 disables them
+IMPORT_WORKERS = env.int("IMPORT_WORKERS", min(cpu_count() or 1, 4))
+IMPORT_CHUNK_SIZE = env.int("IMPORT_CHUNK_SIZE", pow(1024, 2) * 16)  # default: 16MB
+
+# Batch size for exporting data to the formats written batch by batch, e.g. a row group of Parquet
+EXPORT_BATCH_SIZE = env.int("EXPORT_BATCH_SIZE", 1000)
+# The exported archives are kept for this many seconds after their last use, to serve unchanged projects at once.
+EXPORT_CACHE_TTL = env.int("EXPORT_CACHE_TTL", 3600)
+# The fingerprint of a project, which keys its exported archives, is reused for this many seconds. 0 disables it.
+# A change of the project is exported once it expires
+EXPORT_FINGERPRINT_TTL = env.int("EXPORT_FINGERPRINT_TTL", 10)
+# The deleted labels are recorded for the incremental exports for this many days
+EXPORT_TOMBSTONE_RETENTION = env.int("EXPORT_TOMBSTONE_RETENTION", 90)
 
 # Necessary for email verification of new accounts
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", False)
@@ -253,6 +270,7 @@ if not EMAIL_HOST:
 # User media files
 MEDIA_ROOT = env("MEDIA_ROOT", path.join(BASE_DIR, "media"))
 MEDIA_URL = "/media/"
+EXPORT_CACHE_DIR = env("EXPORT_CACHE_DIR", path.join(MEDIA_ROOT, "exports"))
 
 # Filepond settings
 DJANGO_DRF_FILEPOND_UPLOAD_TMP = path.join(BASE_DIR, "filepond-temp-uploads")
@@ -265,6 +283,8 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = env.int("DATA_UPLOAD_MAX_MEMORY_SIZE", 10485760)
 # File upload setting
 MAX_UPLOAD_SIZE = env.int("MAX_UPLOAD_SIZE", pow(1024, 3))  # default: 1GB per a file
 ENABLE_FILE_TYPE_CHECK = env.bool("ENABLE_FILE_TYPE_CHECK", False)
+# Label type files larger than this are uploaded by a Celery task in the streaming mode
+LABEL_UPLOAD_ASYNC_SIZE = env.int("LABEL_UPLOAD_ASYNC_SIZE", pow(1024, 2) * 10)  # default: 10MB
 
 # Celery settings
 DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH = 191
@@ -284,6 +304,32 @@ except EnvError:
 CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# Repair the project metrics, which are otherwise updated on each write, downsample the throughput,
+# and remove the old tombstones of the deleted labels.
+# Beat must run in a single process, or the tasks run once per process: the scripts in tools/ start it apart from
+# the workers, and `doccano task --beat` runs it in that worker only
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-metrics": {
+        "task": "metrics.celery_tasks.rebuild_metrics",
+        "schedule": env.int("METRICS_REBUILD_INTERVAL", 60 * 60 * 24),
+    },
+    "downsample-throughput": {
+        "task": "metrics.celery_tasks.downsample_throughput",
+        "schedule": 60 * 60,
+    },
+    "prune-label-tombstones": {
+        "task": "data_export.celery_tasks.prune_tombstones",
+        "schedule": 60 * 60 * 24,
+    },
+}
+# How long the role of a user in a project is cached across requests, in seconds. 0 disables the cache.
+# The cache is the default one, which should be shared by the processes, e.g. Redis, if enabled
+PROJECT_ROLE_CACHE_TTL = env.int("PROJECT_ROLE_CACHE_TTL", 0)
+# How long the buckets of the throughput of the annotators are kept, in seconds. The daily ones are kept forever
+METRICS_THROUGHPUT_RETENTION = {
+    "minute": env.int("METRICS_MINUTE_RETENTION", 60 * 60 * 24 * 2),
+    "hour": env.int("METRICS_HOUR_RETENTION", 60 * 60 * 24 * 90),
+}
 
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
@@ -1,71 +1,131 @@
 import os
-import shutil
-import uuid
+import tempfile
+from typing import Iterator, Optional
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from .pipeline.dataset import Dataset
+from .pipeline.archives import ZipStream
+from .pipeline.cache import ExportCache, export_key
+from .pipeline.dataset import Dataset, Tombstones, UserDatasets
 from .pipeline.factories import (
     create_comment,
     create_formatter,
     create_labels,
     create_writer,
 )
-from .pipeline.services import ExportApplicationService
-from data_export.models import ExportedExample
+from .pipeline.services import ExportApplicationService, UserExportApplicationService
+from .pipeline.writers import JsonlWriter
+from data_export.models import ExportedExample, ExportJob
+from labels.models import LabelTombstone
 from projects.models import Member, Project
 
 logger = get_task_logger(__name__)
 
 
-def create_collaborative_dataset(project: Project, dirpath: str, confirmed_only: bool, formatters, writer):
+def create_collaborative_dataset(
+    project: Project, archive: ZipStream, confirmed_only: bool, formatters, writer, since=None
+) -> Iterator[bytes]:
     is_text_project = project.is_text_project
     if confirmed_only:
         examples = ExportedExample.objects.confirmed(project)
     else:
         examples = ExportedExample.objects.filter(project=project)
+    if since is not None:
+        examples = examples.changed_since(since)
     labels = create_labels(project, examples)
     comments = create_comment(examples)
     dataset = Dataset(examples, labels, comments, is_text_project)
 
-    service = ExportApplicationService(dataset, formatters, writer)
+    service = ExportApplicationService(dataset, formatters, writer, settings.EXPORT_BATCH_SIZE)
+    yield from archive.write_entry(f"all.{writer.extension}", writer, service.batches())
 
-    filepath = os.path.join(dirpath, f"all.{writer.extension}")
-    service.export(filepath)
 
-
-def create_individual_dataset(project: Project, dirpath: str, confirmed_only: bool, formatters, writer):
+def create_individual_dataset(
+    project: Project, archive: ZipStream, confirmed_only: bool, formatters, writer, since=None
+) -> Iterator[bytes]:
+    # The examples are read once, with the labels of all the members, and split into a file per member.
+    # The files are written side by side, so they are put in the archive once complete.
     is_text_project = project.is_text_project
-    members = Member.objects.filter(project=project)
-    for member in members:
-        if confirmed_only:
-            examples = ExportedExample.objects.confirmed(project, user=member.user)
-        else:
-            examples = ExportedExample.objects.filter(project=project)
-        labels = create_labels(project, examples, member.user)
-        comments = create_comment(examples, member.user)
-        dataset = Dataset(examples, labels, comments, is_text_project)
+    members = Member.objects.filter(project=project).select_related("user")
+    names = {member.user_id: f"{member.username}.{writer.extension}" for member in members}
+    examples = ExportedExample.objects.filter(project=project)
+    if since is not None:
+        examples = examples.changed_since(since)
+    labels = create_labels(project, examples, by_user=True)
+    comments = create_comment(examples, by_user=True)
+    dataset = UserDatasets(examples, labels, comments, list(names), confirmed_only, is_text_project)
 
-        service = ExportApplicationService(dataset, formatters, writer)
+    service = UserExportApplicationService(dataset, formatters, writer, settings.EXPORT_BATCH_SIZE)
+    with tempfile.TemporaryDirectory() as dirpath:
+        files = service.export({user_id: os.path.join(dirpath, name) for user_id, name in names.items()})
+        for user_id, name in names.items():
+            yield from archive.write_file(name, files[user_id])
 
-        filepath = os.path.join(dirpath, f"{member.username}.{writer.extension}")
-        service.export(filepath)
 
+def create_tombstones(project: Project, archive: ZipStream, since) -> Iterator[bytes]:
+    tombstones = Tombstones(project, since)
+    yield from archive.write_entry("tombstones.jsonl", JsonlWriter(), tombstones.batch(settings.EXPORT_BATCH_SIZE))
 
-@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
-def export_dataset(project_id, file_format: str, confirmed_only=False):
-    project = get_object_or_404(Project, pk=project_id)
-    dirpath = os.path.join(settings.MEDIA_ROOT, str(uuid.uuid4()))
-    os.makedirs(dirpath, exist_ok=True)
+
+def iter_export(project: Project, file_format: str, confirmed_only=False, since=None) -> Iterator[bytes]:
+    """Yield the zip archive of the export of the project while its rows are generated."""
     formatters = create_formatter(project, file_format)
-    writer = create_writer(file_format)
+    writer = create_writer(file_format, project)
+    archive = ZipStream()
     if project.collaborative_annotation:
-        create_collaborative_dataset(project, dirpath, confirmed_only, formatters, writer)
+        yield from create_collaborative_dataset(project, archive, confirmed_only, formatters, writer, since)
     else:
-        create_individual_dataset(project, dirpath, confirmed_only, formatters, writer)
-    zip_file = shutil.make_archive(dirpath, "zip", dirpath)
-    shutil.rmtree(dirpath)
-    return zip_file
+        yield from create_individual_dataset(project, archive, confirmed_only, formatters, writer, since)
+    if since is not None:
+        yield from create_tombstones(project, archive, since)
+    yield archive.close()
+
+
+def get_export_cache() -> ExportCache:
+    return ExportCache(settings.EXPORT_CACHE_DIR, settings.EXPORT_CACHE_TTL)
+
+
+def start_export_job(task_id: Optional[str], project: Project, since) -> Optional[ExportJob]:
+    """Record the start of the export, whose id can be given to the next export to only get what changed since."""
+    if task_id is None:
+        return None
+    # The watermark is taken before reading, so the changes made during the export are in the next one too.
+    job, _ = ExportJob.objects.update_or_create(
+        task_id=task_id, defaults={"project": project, "since": since, "started_at": timezone.now()}
+    )
+    return job
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
+def export_dataset(self, project_id, file_format: str, confirmed_only=False, since: Optional[str] = None):
+    """Export the dataset of the project to a zip archive in the export cache, and return its path.
+
+    If `since` is given (an ISO 8601 timestamp), only the examples changed after it are exported,
+    along with the tombstones of the labels deleted after it.
+    """
+    project = get_object_or_404(Project, pk=project_id)
+    since_at = None if since is None else parse_datetime(since)
+    start_export_job(self.request.id, project, since_at)
+    cache = get_export_cache()
+    cache.prune()
+    key = export_key(project, file_format=file_format, confirmed_only=confirmed_only, since=since)
+    path = cache.get(key)
+    if path is not None:
+        logger.info(f"The export of the project {project_id} is served from the cache.")
+        return path
+    with cache.store(key) as f:
+        for chunk in iter_export(project, file_format, confirmed_only, since_at):
+            f.write(chunk)
+    return cache.path(key)
+
+
+@shared_task
+def prune_tombstones():
+    """Remove the tombstones of the labels deleted before their retention."""
+    count = LabelTombstone.objects.prune()
+    logger.info(f"Removed {count} tombstones of deleted labels.")
@@ -1,15 +1,38 @@
 from typing import Any, Dict, Protocol, Tuple
 
 from django.db import models
-
-from examples.models import Comment, Example
-from labels.models import BoundingBox, Category, Relation, Segmentation, Span, TextLabel
+from django.db.models import Q
+
+from examples.models import Comment, Example, ExampleState
+from labels.models import (
+    BoundingBox,
+    Category,
+    LabelTombstone,
+    Relation,
+    Segmentation,
+    Span,
+    TextLabel,
+)
 from projects.models import Project
 
 DATA = "data"
 
 
-class ExportedExampleManager(models.Manager):
+class ExportedExampleQuerySet(models.QuerySet):
+    def changed_since(self, since):
+        """The examples whose labels, confirmations or comments changed after `since`, or lost a label.
+
+        Each change is looked up with the index of its timestamp, and the examples are matched by their ids.
+        """
+        query = Q(pk__in=LabelTombstone.objects.filter(deleted_at__gt=since).values("example_id"))
+        query |= Q(pk__in=ExampleState.objects.filter(confirmed_at__gt=since).values("example"))
+        query |= Q(pk__in=Comment.objects.filter(updated_at__gt=since).values("example"))
+        for model in [Category, Span, Relation, TextLabel, BoundingBox, Segmentation]:
+            query |= Q(pk__in=model.objects.filter(updated_at__gt=since).values("example"))
+        return self.filter(query)
+
+
+class ExportedExampleManager(models.Manager.from_queryset(ExportedExampleQuerySet)):  # type: ignore
     def confirmed(self, project: Project, user=None):
         if project.collaborative_annotation:
             return self.filter(project=project).exclude(states=None)
@@ -28,6 +51,16 @@ class ExportedExample(Example):
         proxy = True
 
 
+class ExportJob(models.Model):
+    """An export task. The time it started reading the examples is the watermark of the next incremental export."""
+
+    task_id = models.CharField(max_length=191, unique=True)
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="export_jobs")
+    since = models.DateTimeField(null=True)
+    started_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class ExportedLabel(Protocol):
     objects: models.Manager
 
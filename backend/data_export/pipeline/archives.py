@@ -0,0 +1,63 @@
+import io
+import zipfile
+from typing import Iterable, Iterator, List
+
+import pandas as pd
+
+from .writers import Writer
+
+
+class StreamBuffer(io.RawIOBase):
+    """A write-only stream keeping what was written until it's read, to send it as soon as it's produced."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def read_written(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ZipStream:
+    """A zip archive made on the fly, whose bytes are yielded while its entries are written.
+
+    The archive is written to an unseekable stream, so the sizes of each entry follow its data
+    instead of being written in its header, and nothing but the current chunk is kept in memory.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED):
+        self.buffer = StreamBuffer()
+        self.archive = zipfile.ZipFile(self.buffer, mode="w", compression=compression)
+
+    def write_entry(self, name: str, writer: Writer, batches: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+        """Write the batches to the entry `name` with the writer, yielding the bytes of the archive after each one."""
+        with self.archive.open(name, mode="w", force_zip64=True) as entry:
+            batch_file = writer.open(entry)
+            try:
+                for batch in batches:
+                    batch_file.write(batch)
+                    yield self.buffer.read_written()
+            finally:
+                batch_file.close()
+        yield self.buffer.read_written()
+
+    def write_file(self, name: str, path: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+        """Copy the file at `path` to the entry `name`, yielding the bytes of the archive after each chunk."""
+        with open(path, mode="rb") as f, self.archive.open(name, mode="w", force_zip64=True) as entry:
+            while chunk := f.read(chunk_size):
+                entry.write(chunk)
+                yield self.buffer.read_written()
+        yield self.buffer.read_written()
+
+    def close(self) -> bytes:
+        """Write the central directory and return the last bytes of the archive."""
+        self.archive.close()
+        return self.buffer.read_written()
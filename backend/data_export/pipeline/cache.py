@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from examples.models import Comment, Example, ExampleState
+from label_types.models import CategoryType, RelationType, SpanType
+from labels.models import (
+    BoundingBox,
+    Category,
+    LabelTombstone,
+    Relation,
+    Segmentation,
+    Span,
+    TextLabel,
+)
+from projects.models import Member, Project
+
+
+def fingerprint(project: Project) -> str:
+    """A digest of the data of the project an export is made of, which changes whenever any of it does.
+
+    The number of rows and the last change of each table are enough: an added or updated row moves the last change,
+    and a deleted one the number of rows, or the last change of the tombstones for the labels.
+    """
+    querysets = [
+        (Example.objects.filter(project=project), "updated_at"),
+        (Comment.objects.filter(example__project=project), "updated_at"),
+        (ExampleState.objects.filter(example__project=project), "confirmed_at"),
+        (LabelTombstone.objects.filter(project=project), "deleted_at"),
+        (Member.objects.filter(project=project), "updated_at"),
+    ]
+    for model in [Category, Span, Relation, TextLabel, BoundingBox, Segmentation]:
+        querysets.append((model.objects.filter(example__project=project), "updated_at"))
+    for model in [CategoryType, SpanType, RelationType]:
+        querysets.append((model.objects.filter(project=project), "updated_at"))
+    state = [project.updated_at.isoformat()]
+    for queryset, field in querysets:
+        aggregate = queryset.order_by().aggregate(count=Count("pk"), last=Max(field))
+        state.append(f"{aggregate['count']}:{aggregate['last']}")
+    return hashlib.sha256("|".join(state).encode("utf-8")).hexdigest()
+
+
+def cached_fingerprint(project: Project) -> str:
+    """The `fingerprint` of the project, reused for `EXPORT_FINGERPRINT_TTL` seconds by the next exports.
+
+    It takes an aggregate of each table, so the downloads in a row, e.g. of the ranges of an archive,
+    share one. A change made meanwhile is only seen once it expires.
+    """
+    ttl = getattr(settings, "EXPORT_FINGERPRINT_TTL", 0)
+    if not ttl:
+        return fingerprint(project)
+    key = f"export-fingerprint:{project.id}"
+    value = cache.get(key)
+    if value is None:
+        value = fingerprint(project)
+        cache.set(key, value, ttl)
+    return value
+
+
+def export_key(project: Project, **options) -> str:
+    """The key of the export of the project with the options, e.g. its format, in its current state."""
+    payload = json.dumps({"project": project.id, "fingerprint": cached_fingerprint(project), **options}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExportCache:
+    """The exported archives, stored by their `export_key` and removed once unused for `ttl` seconds.
+
+    An export of a project that hasn't changed since a previous one is served the archive of the previous one.
+    """
+
+    def __init__(self, root: str, ttl: int):
+        self.root = root
+        self.ttl = ttl
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.zip")
+
+    def get(self, key: str) -> Optional[str]:
+        """The path of the archive of the key, if it's stored and not expired. Using it extends its lifetime."""
+        path = self.path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    @contextmanager
+    def store(self, key: str) -> Iterator[BinaryIO]:
+        """Open a file to write the archive of the key to.
+
+        The archive is written to a temporary file and moved to its key once complete,
+        so that a partial archive, e.g. of a failed export, is never served.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=self.root)
+        try:
+            with os.fdopen(fd, mode="wb") as f:
+                yield f
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield the chunks of an archive while storing it. It's only stored if the chunks are consumed to the end."""
+        with self.store(key) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    def prune(self):
+        """Remove the expired archives, and the temporary files left by the exports which were killed."""
+        if not os.path.isdir(self.root):
+            return
+        now = time.time()
+        for entry in os.scandir(self.root):
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
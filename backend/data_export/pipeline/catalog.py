@@ -1,3 +1,4 @@
+import importlib.util
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Type
@@ -33,6 +34,10 @@ class JSONL(Format):
     name = "JSONL"
 
 
+class Parquet(Format):
+    name = "Parquet"
+
+
 class Options:
     options: Dict[str, List] = defaultdict(list)
 
@@ -95,3 +100,13 @@ Options.register(ProjectType.IMAGE_CAPTIONING, JSONL, IMAGE_CAPTIONING_DIR / "ex
 # Speech to Text
 SPEECH2TEXT_DIR = EXAMPLE_DIR / "speech_to_text"
 Options.register(ProjectType.SPEECH2TEXT, JSONL, SPEECH2TEXT_DIR / "example.jsonl")
+
+# Parquet needs pyarrow, the "parquet" extra, so it's only offered if the package is installed.
+# The examples show the rows as JSON, with the labels in nested list columns.
+if importlib.util.find_spec("pyarrow") is not None:
+    Options.register(ProjectType.DOCUMENT_CLASSIFICATION, Parquet, TEXT_CLASSIFICATION_DIR / "example.jsonl")
+    Options.register(ProjectType.SEQUENCE_LABELING, Parquet, SEQUENCE_LABELING_DIR / "example_parquet.jsonl")
+    Options.register(ProjectType.SEQ2SEQ, Parquet, SEQ2SEQ_DIR / "example.jsonl")
+    Options.register(
+        ProjectType.INTENT_DETECTION_AND_SLOT_FILLING, Parquet, INTENT_DETECTION_DIR / "example_parquet.jsonl"
+    )
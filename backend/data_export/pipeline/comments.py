@@ -1,24 +1,52 @@
 import abc
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from django.db.models import QuerySet
 
 from data_export.models import ExportedComment, ExportedExample
 
 
+class CommentRecord(NamedTuple):
+    id: int
+    text: str
+
+    def to_string(self) -> str:
+        return self.text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "comment": self.text}
+
+
 class Comments(abc.ABC):
     comment_class = ExportedComment
     column = "Comments"
-    fields: Tuple[str, ...] = ("example", "user")  # To boost performance
+    values: Tuple[str, ...] = ("id", "text")  # To boost performance
+
+    def __init__(self, examples: QuerySet[ExportedExample], user=None, by_user: bool = False):
+        self.examples = examples
+        self.user = user
+        self.by_user = by_user
+        self.comment_groups: Optional[Dict[Any, List[CommentRecord]]] = None
 
-    def __init__(self, examples: QuerySet[ExportedExample], user=None):
+    def load(self, example_ids: Optional[List[int]] = None):
+        """Load the comments of the examples, in place of the comments loaded before."""
+        if example_ids is None:
+            comments = self.comment_class.objects.filter(example__in=self.examples)
+        else:
+            comments = self.comment_class.objects.filter(example_id__in=example_ids)
+        if self.user:
+            comments = comments.filter(user=self.user)
         self.comment_groups = defaultdict(list)
-        comments = self.comment_class.objects.filter(example__in=examples)
-        if user:
-            comments = comments.filter(user=user)
-        for comment in comments.select_related(*self.fields):
-            self.comment_groups[comment.example.id].append(comment)
-
-    def find_by(self, example_id: int) -> Dict[str, List[ExportedComment]]:
-        return {self.column: self.comment_groups[example_id]}
+        if self.by_user:
+            for example_id, user_id, *values in comments.values_list("example_id", "user_id", *self.values):
+                self.comment_groups[example_id, user_id].append(CommentRecord._make(values))
+        else:
+            for example_id, *values in comments.values_list("example_id", *self.values):
+                self.comment_groups[example_id].append(CommentRecord._make(values))
+
+    def find_by(self, example_id: int, user_id: Optional[int] = None) -> Dict[str, List[CommentRecord]]:
+        if self.comment_groups is None:
+            self.load()
+        key = (example_id, user_id) if self.by_user else example_id
+        return {self.column: self.comment_groups.get(key, [])}
@@ -1,4 +1,5 @@
-from typing import Any, Dict, Iterator, List
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
 from django.db.models.query import QuerySet
@@ -6,19 +7,61 @@ from django.db.models.query import QuerySet
 from .comments import Comments
 from .labels import Labels
 from data_export.models import ExportedExample
+from examples.models import ExampleState
+from labels.models import LabelTombstone
+from projects.models import Project
+
+# The fields of the examples written to the exports.
+EXAMPLE_FIELDS = ("id", "text", "upload_name", "meta")
+
+
+def iterate_chunks(examples: Iterable[ExportedExample], chunk_size: int) -> Iterator[List[ExportedExample]]:
+    """Iterate the examples in chunks of `chunk_size`.
+
+    A queryset is paginated by its primary key, so each chunk is an indexed range query
+    instead of an `OFFSET` scanning the examples before it, and the examples are never loaded at once.
+    """
+    if isinstance(examples, QuerySet):
+        queryset = examples.only(*EXAMPLE_FIELDS).order_by("pk")
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(page[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1].pk
+    else:
+        iterator = iter(examples)
+        while chunk := list(itertools.islice(iterator, chunk_size)):
+            yield chunk
 
 
 class Dataset:
+    """The examples with their labels and comments, loaded chunk by chunk.
+
+    The labels and comments of a chunk are loaded along with it, so the memory is bounded by the chunk size.
+    """
+
     def __init__(
-        self, examples: QuerySet[ExportedExample], labels: List[Labels], comments: List[Comments], is_text_project=True
+        self,
+        examples: QuerySet[ExportedExample],
+        labels: List[Labels],
+        comments: List[Comments],
+        is_text_project=True,
+        chunk_size: int = 1000,
     ):
         self.examples = examples
         self.labels = labels
         self.is_text_project = is_text_project
         self.comments = comments
+        self.chunk_size = chunk_size
 
-    def __iter__(self) -> Iterator[Dict[str, Any]]:
-        for example in self.examples:
+    def iterate_chunk(self, examples: List[ExportedExample]) -> Iterator[Dict[str, Any]]:
+        example_ids = [example.id for example in examples]
+        for collection in [*self.labels, *self.comments]:
+            collection.load(example_ids)
+        for example in examples:
             data = example.to_dict(self.is_text_project)
             for labels in self.labels:
                 data.update(**labels.find_by(example.id))
@@ -26,5 +69,102 @@ class Dataset:
                 data.update(**comment.find_by(example.id))
             yield data
 
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for examples in iterate_chunks(self.examples, self.chunk_size):
+            yield from self.iterate_chunk(examples)
+
     def to_dataframe(self) -> pd.DataFrame:
         return pd.DataFrame(self)
+
+    def batch(self, batch_size: int) -> Iterator[pd.DataFrame]:
+        for examples in iterate_chunks(self.examples, batch_size):
+            yield pd.DataFrame(self.iterate_chunk(examples))
+
+
+class UserDatasets:
+    """The datasets of several users, made in a single pass over the examples.
+
+    Each chunk of examples is read once, with the labels and comments of all the users
+    (which must be loaded `by_user`), and its rows are then split by user.
+
+    Args:
+        user_ids: the users to make a dataset for.
+        confirmed_only: whether the dataset of a user only has the examples the user confirmed.
+    """
+
+    def __init__(
+        self,
+        examples: QuerySet[ExportedExample],
+        labels: List[Labels],
+        comments: List[Comments],
+        user_ids: List[int],
+        confirmed_only: bool = False,
+        is_text_project=True,
+    ):
+        self.examples = examples
+        self.labels = labels
+        self.comments = comments
+        self.user_ids = user_ids
+        self.confirmed_only = confirmed_only
+        self.is_text_project = is_text_project
+
+    @staticmethod
+    def load_confirmations(example_ids: List[int]) -> Set[Tuple[int, int]]:
+        states = ExampleState.objects.filter(example_id__in=example_ids)
+        return set(states.values_list("example_id", "confirmed_by_id"))
+
+    def batch(self, batch_size: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """Yield the batches of the chunks of `batch_size` examples, with the user they belong to."""
+        for examples in iterate_chunks(self.examples, batch_size):
+            example_ids = [example.id for example in examples]
+            for collection in [*self.labels, *self.comments]:
+                collection.load(example_ids)
+            confirmations: Optional[Set[Tuple[int, int]]] = None
+            if self.confirmed_only:
+                confirmations = self.load_confirmations(example_ids)
+            # The examples are serialized once for all the users.
+            rows = [(example.id, example.to_dict(self.is_text_project)) for example in examples]
+            for user_id in self.user_ids:
+                batch = []
+                for example_id, example in rows:
+                    if confirmations is not None and (example_id, user_id) not in confirmations:
+                        continue
+                    data = dict(example)
+                    for collection in [*self.labels, *self.comments]:
+                        data.update(**collection.find_by(example_id, user_id))
+                    batch.append(data)
+                if batch:
+                    yield user_id, pd.DataFrame(batch)
+
+
+class Tombstones:
+    """The labels of the project deleted after `since`, for an incremental export to remove them."""
+
+    # The fields of the tombstones and their columns in the export.
+    columns = {
+        "label_id": "id",
+        "label_uuid": "uuid",
+        "label_type": "type",
+        "example_id": "example",
+        "user__username": "user",
+        "deleted_at": "deleted_at",
+    }
+
+    def __init__(self, project: Project, since):
+        self.project = project
+        self.since = since
+
+    def batch(self, batch_size: int) -> Iterator[pd.DataFrame]:
+        queryset = LabelTombstone.objects.filter(project=self.project, deleted_at__gt=self.since)
+        queryset = queryset.order_by("pk").values_list("pk", *self.columns)
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(page[:batch_size])
+            if not rows:
+                return
+            batch = pd.DataFrame([row[1:] for row in rows], columns=list(self.columns.values()))
+            batch["uuid"] = batch["uuid"].astype(str)
+            batch["deleted_at"] = batch["deleted_at"].map(lambda deleted_at: deleted_at.isoformat())
+            yield batch
+            last_pk = rows[-1][0]
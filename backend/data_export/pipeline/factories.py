@@ -1,9 +1,9 @@
-from typing import Dict, List, Type
+from typing import Any, Dict, List, Optional, Type
 
 from django.db.models import QuerySet
 
 from . import writers
-from .catalog import CSV, JSON, JSONL, FastText
+from .catalog import CSV, JSON, JSONL, FastText, Parquet
 from .comments import Comments
 from .formatters import (
     DictFormatter,
@@ -19,7 +19,10 @@ from data_export.models import DATA, ExportedExample
 from projects.models import Project, ProjectType
 
 
-def create_writer(file_format: str) -> writers.Writer:
+def create_writer(file_format: str, project: Optional[Project] = None) -> writers.Writer:
+    if file_format == Parquet.name:
+        types = create_parquet_types(project) if project is not None else {}
+        return writers.ParquetWriter(types)
     mapping = {
         CSV.name: writers.CsvWriter(),
         JSON.name: writers.JsonWriter(),
@@ -31,6 +34,36 @@ def create_writer(file_format: str) -> writers.Writer:
     return mapping[file_format]
 
 
+def create_parquet_types(project: Project) -> Dict[str, Any]:
+    """Return the Arrow types of the label columns of the Parquet export, by their column name in the file."""
+    pa = writers.pa
+    strings = pa.list_(pa.string())
+    label_types = {
+        Categories: strings,
+        Texts: strings,
+        Spans: pa.list_(
+            pa.struct(
+                [
+                    ("id", pa.int64()),
+                    ("label", pa.string()),
+                    ("start_offset", pa.int64()),
+                    ("end_offset", pa.int64()),
+                ]
+            )
+        ),
+        Relations: pa.list_(
+            pa.struct([("id", pa.int64()), ("from_id", pa.int64()), ("to_id", pa.int64()), ("type", pa.string())])
+        ),
+    }
+    use_relation = getattr(project, "use_relation", False)
+    comment_type = pa.list_(pa.struct([("id", pa.int64()), ("comment", pa.string())])) if use_relation else strings
+    types = {Comments.column: comment_type}
+    for label_collection in select_label_collection(project):
+        types[label_collection.column] = label_types[label_collection]
+    rename = create_formatter(project, Parquet.name)[-1].mapper
+    return {rename.get(column, column): arrow_type for column, arrow_type in types.items()}
+
+
 def create_formatter(project: Project, file_format: str) -> List[Formatter]:
     use_relation = getattr(project, "use_relation", False)
     # text tasks
@@ -67,6 +100,11 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 RenameFormatter(**mapper_text_classification),
             ],
             FastText.name: [FastTextCategoryFormatter(Categories.column)],
+            Parquet.name: [
+                ListedCategoryFormatter(Categories.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_text_classification),
+            ],
         },
         ProjectType.SEQUENCE_LABELING: {
             JSONL.name: [
@@ -80,7 +118,20 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 TupledSpanFormatter(Spans.column),
                 ListedCategoryFormatter(Comments.column),
                 RenameFormatter(**mapper_sequence_labeling),
+            ],
+            # The spans are structs, as a Parquet list can't mix the offsets and the label in a tuple.
+            Parquet.name: [
+                DictFormatter(Spans.column),
+                DictFormatter(Relations.column),
+                DictFormatter(Comments.column),
+                RenameFormatter(**mapper_relation_extraction),
             ]
+            if use_relation
+            else [
+                DictFormatter(Spans.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_sequence_labeling),
+            ],
         },
         ProjectType.SEQ2SEQ: {
             CSV.name: [
@@ -98,6 +149,11 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 ListedCategoryFormatter(Comments.column),
                 RenameFormatter(**mapper_seq2seq),
             ],
+            Parquet.name: [
+                ListedCategoryFormatter(Texts.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_seq2seq),
+            ],
         },
         ProjectType.IMAGE_CLASSIFICATION: {
             JSONL.name: [
@@ -119,7 +175,13 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 TupledSpanFormatter(Spans.column),
                 ListedCategoryFormatter(Comments.column),
                 RenameFormatter(**mapper_intent_detection),
-            ]
+            ],
+            Parquet.name: [
+                ListedCategoryFormatter(Categories.column),
+                DictFormatter(Spans.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_intent_detection),
+            ],
         },
         ProjectType.BOUNDING_BOX: {
             JSONL.name: [
@@ -162,11 +224,13 @@ def select_label_collection(project: Project) -> List[Type[Labels]]:
     return mapping[project.project_type]
 
 
-def create_labels(project: Project, examples: QuerySet[ExportedExample], user=None) -> List[Labels]:
+def create_labels(
+    project: Project, examples: QuerySet[ExportedExample], user=None, by_user: bool = False
+) -> List[Labels]:
     label_collections = select_label_collection(project)
-    labels = [label_collection(examples=examples, user=user) for label_collection in label_collections]
+    labels = [label_collection(examples=examples, user=user, by_user=by_user) for label_collection in label_collections]
     return labels
 
 
-def create_comment(examples: QuerySet[ExportedExample], user=None) -> List[Comments]:
-    return [Comments(examples=examples, user=user)]
+def create_comment(examples: QuerySet[ExportedExample], user=None, by_user: bool = False) -> List[Comments]:
+    return [Comments(examples=examples, user=user, by_user=by_user)]
@@ -3,7 +3,7 @@ Represents label collection.
 """
 import abc
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type
 
 from django.db.models import QuerySet
 
@@ -19,54 +19,150 @@ from data_export.models import (
 )
 
 
+# The labels are read as rows of raw values, and formatted by these records like the exported models.
+class CategoryRecord(NamedTuple):
+    label: str
+
+    def to_string(self) -> str:
+        return self.label
+
+
+class SpanRecord(NamedTuple):
+    id: int
+    label: str
+    start_offset: int
+    end_offset: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    def to_tuple(self) -> Tuple:
+        return self.start_offset, self.end_offset, self.label
+
+
+class RelationRecord(NamedTuple):
+    id: int
+    from_id: int
+    to_id: int
+    type: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+class TextRecord(NamedTuple):
+    text: str
+
+    def to_string(self) -> str:
+        return self.text
+
+
+class BoundingBoxRecord(NamedTuple):
+    uuid: Any
+    x: float
+    y: float
+    width: float
+    height: float
+    label: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "uuid": str(self.uuid)}
+
+    def to_tuple(self) -> Tuple:
+        return self.x, self.y, self.width, self.height
+
+
+class SegmentationRecord(NamedTuple):
+    uuid: Any
+    points: List
+    label: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "uuid": str(self.uuid)}
+
+
 class Labels(abc.ABC):
+    """The labels of the examples, grouped by example.
+
+    The labels are loaded by `load`, e.g. for a chunk of the examples at a time.
+    If nothing is loaded, the labels of all the examples are loaded on the first `find_by`.
+    Only the `values` of the labels are queried, as tuples made into `record` instances,
+    so that neither the examples nor the label models are loaded.
+    If `by_user` is set, the labels of every user are loaded at once, and found by example and user.
+    """
+
     label_class = ExportedLabel
     column = "labels"
-    fields: Tuple[str, ...] = ("example", "label")  # To boost performance
-
-    def __init__(self, examples: QuerySet[ExportedExample], user=None):
+    record: Type[NamedTuple]
+    values: Tuple[str, ...] = ()
+
+    def __init__(self, examples: QuerySet[ExportedExample], user=None, by_user: bool = False):
+        self.examples = examples
+        self.user = user
+        self.by_user = by_user
+        self.label_groups: Optional[Dict[Any, List[NamedTuple]]] = None
+
+    def load(self, example_ids: Optional[List[int]] = None):
+        """Load the labels of the examples, in place of the labels loaded before."""
+        if example_ids is None:
+            labels = self.label_class.objects.filter(example__in=self.examples)
+        else:
+            labels = self.label_class.objects.filter(example_id__in=example_ids)
+        if self.user:
+            labels = labels.filter(user=self.user)
         self.label_groups = defaultdict(list)
-        labels = self.label_class.objects.filter(example__in=examples)
-        if user:
-            labels = labels.filter(user=user)
-        for label in labels.select_related(*self.fields):
-            self.label_groups[label.example.id].append(label)
+        make = self.record._make
+        if self.by_user:
+            for example_id, user_id, *values in labels.values_list("example_id", "user_id", *self.values):
+                self.label_groups[example_id, user_id].append(make(values))
+        else:
+            for example_id, *values in labels.values_list("example_id", *self.values):
+                self.label_groups[example_id].append(make(values))
 
-    def find_by(self, example_id: int) -> Dict[str, List[ExportedLabel]]:
-        return {self.column: self.label_groups[example_id]}
+    def find_by(self, example_id: int, user_id: Optional[int] = None) -> Dict[str, List[NamedTuple]]:
+        if self.label_groups is None:
+            self.load()
+        key = (example_id, user_id) if self.by_user else example_id
+        return {self.column: self.label_groups.get(key, [])}
 
 
 class Categories(Labels):
     label_class = ExportedCategory
     column = "categories"
-    fields = ("example", "label")
+    record = CategoryRecord
+    values = ("label__text",)
 
 
 class Spans(Labels):
     label_class = ExportedSpan
     column = "entities"
-    fields = ("example", "label")
+    record = SpanRecord
+    values = ("id", "label__text", "start_offset", "end_offset")
 
 
 class Relations(Labels):
     label_class = ExportedRelation
     column = "relations"
-    fields = ("example", "type")
+    record = RelationRecord
+    values = ("id", "from_id", "to_id", "type__text")
 
 
 class Texts(Labels):
     label_class = ExportedText
     column = "labels"
-    fields = ("example",)
+    record = TextRecord
+    values = ("text",)
 
 
 class BoundingBoxes(Labels):
     label_class = ExportedBoundingBox
     column = "labels"
-    fields = ("example", "label")
+    record = BoundingBoxRecord
+    values = ("uuid", "x", "y", "width", "height", "label__text")
 
 
 class Segments(Labels):
     label_class = ExportedSegmentation
     column = "labels"
-    fields = ("example", "label")
+    record = SegmentationRecord
+    values = ("uuid", "points", "label__text")
@@ -1,19 +1,55 @@
-from typing import List
+from typing import Dict, Iterator, List
 
-from .dataset import Dataset
+import pandas as pd
+
+from .dataset import Dataset, UserDatasets
 from .formatters import Formatter
 from .writers import Writer
 
 
+def format_dataset(dataset: pd.DataFrame, formatters: List[Formatter]) -> pd.DataFrame:
+    for formatter in formatters:
+        dataset = formatter.format(dataset)
+    return dataset
+
+
 class ExportApplicationService:
-    def __init__(self, dataset: Dataset, formatters: List[Formatter], writer: Writer):
+    """Export the dataset batch by batch, formatting each batch on its own.
+
+    The writer appends the batches to the file, so the dataset is never held in memory.
+    """
+
+    def __init__(self, dataset: Dataset, formatters: List[Formatter], writer: Writer, batch_size: int = 1000):
         self.dataset = dataset
         self.formatters = formatters
         self.writer = writer
+        self.batch_size = batch_size
+
+    def batches(self) -> Iterator[pd.DataFrame]:
+        for batch in self.dataset.batch(self.batch_size):
+            yield format_dataset(batch, self.formatters)
 
     def export(self, file):
-        dataset = self.dataset.to_dataframe()
-        for formatter in self.formatters:
-            dataset = formatter.format(dataset)
-        self.writer.write(file, dataset)
+        self.writer.write_batches(file, self.batches())
         return file
+
+
+class UserExportApplicationService:
+    """Export the datasets of several users at once, to a file per user."""
+
+    def __init__(self, dataset: UserDatasets, formatters: List[Formatter], writer: Writer, batch_size: int = 1000):
+        self.dataset = dataset
+        self.formatters = formatters
+        self.writer = writer
+        self.batch_size = batch_size
+
+    def export(self, files: Dict[int, str]) -> Dict[int, str]:
+        """Export the dataset of each user to its file in `files`, by the id of the user."""
+        batch_files = {user_id: self.writer.open(file) for user_id, file in files.items()}
+        try:
+            for user_id, batch in self.dataset.batch(self.batch_size):
+                batch_files[user_id].write(format_dataset(batch, self.formatters))
+        finally:
+            for batch_file in batch_files.values():
+                batch_file.close()
+        return files
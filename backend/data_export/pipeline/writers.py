@@ -1,7 +1,53 @@
 import abc
+import io
+import os
+from typing import Any, Dict, Iterable, List, Optional
 
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def open_text(file, **kwargs):
+    """Open a path to write text to, or wrap a binary file object, e.g. an entry of a zip stream."""
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, "w", encoding="utf-8", **kwargs)
+    return io.TextIOWrapper(file, encoding="utf-8", **kwargs)
+
+
+class BatchFile(abc.ABC):
+    """A file opened by a writer, to which the dataset is written batch by batch."""
+
+    @abc.abstractmethod
+    def write(self, dataset: pd.DataFrame):
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    @abc.abstractmethod
+    def close(self):
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+
+class BufferedFile(BatchFile):
+    """Concatenate the batches and write them at once when closed, e.g. for a CSV header to have every column."""
+
+    def __init__(self, writer: "Writer", file):
+        self.writer = writer
+        self.file = file
+        self.batches: List[pd.DataFrame] = []
+
+    def write(self, dataset: pd.DataFrame):
+        self.batches.append(dataset)
+
+    def close(self):
+        dataset = pd.concat(self.batches, ignore_index=True) if self.batches else pd.DataFrame()
+        self.writer.write(self.file, dataset)
+        self.batches = []
+
 
 class Writer(abc.ABC):
     extension = ""
@@ -11,6 +57,18 @@ class Writer(abc.ABC):
     def write(file, dataset: pd.DataFrame):
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    def open(self, file) -> BatchFile:
+        """Open the file to write the dataset batch by batch. By default, the batches are written at once."""
+        return BufferedFile(self, file)
+
+    def write_batches(self, file, batches: Iterable[pd.DataFrame]):
+        batch_file = self.open(file)
+        try:
+            for batch in batches:
+                batch_file.write(batch)
+        finally:
+            batch_file.close()
+
 
 class CsvWriter(Writer):
     extension = "csv"
@@ -20,6 +78,25 @@ class CsvWriter(Writer):
         dataset.to_csv(file, index=False, encoding="utf-8")
 
 
+class JsonFile(BatchFile):
+    def __init__(self, file):
+        self.f = open_text(file)
+        self.f.write("[")
+        self.separator = ""
+
+    def write(self, dataset: pd.DataFrame):
+        # Each batch is an array of records, so the arrays are joined into one.
+        if dataset.empty:
+            return
+        self.f.write(self.separator)
+        self.f.write(dataset.to_json(orient="records", force_ascii=False)[1:-1])
+        self.separator = ","
+
+    def close(self):
+        self.f.write("]")
+        self.f.close()
+
+
 class JsonWriter(Writer):
     extension = "json"
 
@@ -27,6 +104,23 @@ class JsonWriter(Writer):
     def write(file, dataset: pd.DataFrame):
         dataset.to_json(file, orient="records", force_ascii=False)
 
+    def open(self, file) -> BatchFile:
+        return JsonFile(file)
+
+
+class JsonlFile(BatchFile):
+    def __init__(self, file):
+        self.f = open_text(file)
+
+    def write(self, dataset: pd.DataFrame):
+        if dataset.empty:
+            return
+        lines = dataset.to_json(orient="records", force_ascii=False, lines=True)
+        self.f.write(lines if lines.endswith("\n") else lines + "\n")
+
+    def close(self):
+        self.f.close()
+
 
 class JsonlWriter(Writer):
     extension = "jsonl"
@@ -35,6 +129,20 @@ class JsonlWriter(Writer):
     def write(file, dataset: pd.DataFrame):
         dataset.to_json(file, orient="records", force_ascii=False, lines=True)
 
+    def open(self, file) -> BatchFile:
+        return JsonlFile(file)
+
+
+class FastTextFile(BatchFile):
+    def __init__(self, file):
+        self.f = open_text(file, newline="")
+
+    def write(self, dataset: pd.DataFrame):
+        dataset.to_csv(self.f, index=False, header=False)
+
+    def close(self):
+        self.f.close()
+
 
 class FastTextWriter(Writer):
     extension = "txt"
@@ -42,3 +150,74 @@ class FastTextWriter(Writer):
     @staticmethod
     def write(file, dataset: pd.DataFrame):
         dataset.to_csv(file, index=False, encoding="utf-8", header=False)
+
+    def open(self, file) -> BatchFile:
+        return FastTextFile(file)
+
+
+class ParquetFile(BatchFile):
+    """A Parquet file with one row group per batch.
+
+    The schema of the file is inferred from the first batch, except for the columns of `types`,
+    e.g. the label columns, whose type can't be inferred from a batch without labels.
+    The columns missing from a later batch are written as nulls.
+    """
+
+    def __init__(self, file, types: Dict[str, Any]):
+        # A file object is wrapped to be closed along with the Parquet writer, e.g. an entry of a zip stream.
+        self.file = file if isinstance(file, (str, os.PathLike)) else pa.PythonFile(file, mode="w")
+        self.types = types
+        self.writer: Optional["pq.ParquetWriter"] = None
+
+    def infer_schema(self, dataset: pd.DataFrame) -> "pa.Schema":
+        fields = []
+        for field in pa.Schema.from_pandas(dataset, preserve_index=False):
+            if field.name in self.types:
+                field = field.with_type(self.types[field.name])
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            elif pa.types.is_list(field.type) and pa.types.is_null(field.type.value_type):
+                field = field.with_type(pa.list_(pa.string()))
+            fields.append(field)
+        return pa.schema(fields)
+
+    def to_table(self, dataset: pd.DataFrame, schema: "pa.Schema") -> "pa.Table":
+        unknown = set(dataset.columns) - set(schema.names)
+        if unknown:
+            raise ValueError(f"The columns {', '.join(sorted(map(str, unknown)))} are not in the first batch.")
+        for name in schema.names:
+            if name not in dataset.columns:
+                dataset[name] = None
+        return pa.Table.from_pandas(dataset[schema.names], schema=schema, preserve_index=False)
+
+    def write(self, dataset: pd.DataFrame):
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.file, self.infer_schema(dataset))
+        table = self.to_table(dataset, self.writer.schema)
+        self.writer.write_table(table, row_group_size=max(table.num_rows, 1))
+
+    def close(self):
+        if self.writer is None:
+            schema = pa.schema([(name, arrow_type) for name, arrow_type in self.types.items()])
+            pq.write_table(schema.empty_table(), self.file)
+        else:
+            self.writer.close()
+        if isinstance(self.file, pa.NativeFile):
+            self.file.close()
+
+
+class ParquetWriter(Writer):
+    """Write the dataset to a Parquet file, one row group per batch."""
+
+    extension = "parquet"
+
+    def __init__(self, types: Optional[Dict[str, Any]] = None):
+        if pa is None:
+            raise ValueError("pyarrow is required to write Parquet. Install doccano[parquet].")
+        self.types = types or {}
+
+    def write(self, file, dataset: pd.DataFrame):
+        self.write_batches(file, [dataset])
+
+    def open(self, file) -> BatchFile:
+        return ParquetFile(file, self.types)
@@ -0,0 +1,77 @@
+"""Throughput of the export of a synthetic project with 1M spans.
+
+It compares reading the raw values of the spans with loading them as model instances
+along with their example and label type, as the export did before.
+It isn't collected by the test runner. Run it explicitly:
+
+    python manage.py test data_export.tests.bench_export
+"""
+import os
+import tempfile
+import time
+
+from django.test import TestCase
+from model_mommy import mommy
+
+from data_export.models import ExportedExample, ExportedSpan
+from data_export.pipeline.catalog import JSONL
+from data_export.pipeline.comments import Comments
+from data_export.pipeline.dataset import Dataset
+from data_export.pipeline.factories import create_formatter, create_writer
+from data_export.pipeline.labels import Spans
+from data_export.pipeline.services import ExportApplicationService
+from examples.models import Example
+from label_types.models import SpanType
+from labels.models import Span
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+EXAMPLES = 100_000
+SPANS_PER_EXAMPLE = 10
+BATCH_SIZE = 1000
+
+
+class InstanceSpans(Spans):
+    """The spans loaded as model instances, to compare with."""
+
+    def load(self, example_ids=None):
+        labels = self.label_class.objects.filter(example_id__in=example_ids).select_related("example", "label")
+        self.label_groups = {}
+        for label in labels:
+            self.label_groups.setdefault(label.example.id, []).append(label)
+
+
+class BenchmarkExport(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.SEQUENCE_LABELING, collaborative_annotation=True)
+        label_types = mommy.make(SpanType, project=cls.project.item, _quantity=10)
+        user = cls.project.admin
+        text = "Text of an example, long enough to be worth not loading it for each span. " * 4
+        for start in range(0, EXAMPLES, BATCH_SIZE):
+            examples = Example.objects.bulk_create(
+                [Example(project=cls.project.item, text=text) for _ in range(start, min(start + BATCH_SIZE, EXAMPLES))]
+            )
+            spans = [
+                Span(example=example, user=user, label=label_types[i], start_offset=i * 2, end_offset=i * 2 + 1)
+                for example in examples
+                for i in range(SPANS_PER_EXAMPLE)
+            ]
+            Span.objects.bulk_create(spans)
+
+    def measure(self, spans_class) -> float:
+        """Return the throughput of a JSONL export, in spans per second."""
+        examples = ExportedExample.objects.filter(project=self.project.item)
+        labels = [spans_class(examples)]
+        dataset = Dataset(examples, labels, [Comments(examples)], chunk_size=BATCH_SIZE)
+        formatters = create_formatter(self.project.item, JSONL.name)
+        service = ExportApplicationService(dataset, formatters, create_writer(JSONL.name), BATCH_SIZE)
+        with tempfile.TemporaryDirectory() as dirpath:
+            start = time.perf_counter()
+            service.export(os.path.join(dirpath, "all.jsonl"))
+            elapsed = time.perf_counter() - start
+        return ExportedSpan.objects.count() / elapsed
+
+    def test_throughput(self):
+        for spans_class in [InstanceSpans, Spans]:
+            print(f"\n{spans_class.__name__}: {self.measure(spans_class):,.0f} spans/s")
@@ -0,0 +1,50 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+import pandas as pd
+
+from ..pipeline import writers
+from ..pipeline.archives import ZipStream
+from ..pipeline.writers import CsvWriter, JsonlWriter, ParquetWriter
+
+
+class TestZipStream(unittest.TestCase):
+    def setUp(self):
+        self.batches = [pd.DataFrame([{"id": 0, "text": "A"}]), pd.DataFrame([{"id": 1, "text": "B"}])]
+        self.archive = ZipStream()
+
+    def read(self, chunks) -> zipfile.ZipFile:
+        return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+    def test_yield_bytes_after_each_batch(self):
+        chunks = self.archive.write_entry("all.jsonl", JsonlWriter(), self.batches)
+        self.assertEqual(len(list(chunks)), len(self.batches) + 1)
+
+    def test_write_entries(self):
+        chunks = [
+            *self.archive.write_entry("all.jsonl", JsonlWriter(), self.batches),
+            *self.archive.write_entry("all.csv", CsvWriter(), self.batches),
+            self.archive.close(),
+        ]
+        with self.read(chunks) as archive:
+            self.assertEqual(archive.read("all.jsonl").decode(), '{"id":0,"text":"A"}\n{"id":1,"text":"B"}\n')
+            self.assertEqual(archive.read("all.csv").decode(), "id,text\n0,A\n1,B\n")
+
+    def test_write_file(self):
+        with tempfile.TemporaryDirectory() as dirpath:
+            path = os.path.join(dirpath, "admin.txt")
+            with open(path, "w") as f:
+                f.write("text")
+            chunks = [*self.archive.write_file("admin.txt", path, chunk_size=2), self.archive.close()]
+        with self.read(chunks) as archive:
+            self.assertEqual(archive.read("admin.txt"), b"text")
+
+    @unittest.skipIf(writers.pa is None, "pyarrow is not installed")
+    def test_write_parquet_entry(self):
+        chunks = [*self.archive.write_entry("all.parquet", ParquetWriter(), self.batches), self.archive.close()]
+        with self.read(chunks) as archive:
+            table = writers.pq.read_table(io.BytesIO(archive.read("all.parquet")))
+        self.assertEqual(table.to_pylist(), [{"id": 0, "text": "A"}, {"id": 1, "text": "B"}])
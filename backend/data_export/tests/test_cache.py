@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from model_mommy import mommy
+
+from ..pipeline.cache import ExportCache, cached_fingerprint, export_key, fingerprint
+from labels.models import Category
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestExportCache(TestCase):
+    def setUp(self):
+        self.dirpath = tempfile.TemporaryDirectory()
+        self.cache = ExportCache(self.dirpath.name, ttl=60)
+
+    def tearDown(self):
+        self.dirpath.cleanup()
+
+    def expire(self, path):
+        expired_at = time.time() - 120
+        os.utime(path, (expired_at, expired_at))
+
+    def test_get_stored_archive(self):
+        with self.cache.store("key") as f:
+            f.write(b"zip")
+        path = self.cache.get("key")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"zip")
+
+    def test_get_missing_archive(self):
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_expire_archive(self):
+        with self.cache.store("key") as f:
+            f.write(b"zip")
+        self.expire(self.cache.path("key"))
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.prune()
+        self.assertFalse(os.path.exists(self.cache.path("key")))
+
+    def test_discard_failed_archive(self):
+        with self.assertRaises(ValueError):
+            with self.cache.store("key") as f:
+                f.write(b"z")
+                raise ValueError()
+        self.assertEqual(os.listdir(self.dirpath.name), [])
+
+    def test_store_archive_only_if_streamed_to_the_end(self):
+        chunks = self.cache.tee("key", [b"z", b"ip"])
+        self.assertEqual(next(chunks), b"z")
+        chunks.close()
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(b"".join(self.cache.tee("key", [b"z", b"ip"])), b"zip")
+        self.assertIsNotNone(self.cache.get("key"))
+
+
+class TestExportKey(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = mommy.make("Example", project=self.project.item)
+
+    def test_same_key_for_unchanged_project(self):
+        self.assertEqual(
+            export_key(self.project.item, file_format="JSONL"), export_key(self.project.item, file_format="JSONL")
+        )
+
+    def test_key_depends_on_options(self):
+        self.assertNotEqual(
+            export_key(self.project.item, file_format="JSONL"), export_key(self.project.item, file_format="CSV")
+        )
+
+    def test_fingerprint_changes_with_labels(self):
+        before = fingerprint(self.project.item)
+        category = mommy.make("Category", example=self.example, user=self.project.admin)
+        added = fingerprint(self.project.item)
+        Category.objects.filter(pk=category.pk).delete()
+        deleted = fingerprint(self.project.item)
+        self.assertEqual(len({before, added, deleted}), 3)
+
+
+class TestCachedFingerprint(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = mommy.make("Example", project=self.project.item)
+        cache.clear()
+
+    @override_settings(EXPORT_FINGERPRINT_TTL=60)
+    def test_reuse_fingerprint(self):
+        before = cached_fingerprint(self.project.item)
+        mommy.make("Category", example=self.example, user=self.project.admin)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_fingerprint(self.project.item), before)
+        cache.clear()
+        self.assertNotEqual(cached_fingerprint(self.project.item), before)
+
+    @override_settings(EXPORT_FINGERPRINT_TTL=0)
+    def test_compute_fingerprint_if_disabled(self):
+        before = cached_fingerprint(self.project.item)
+        mommy.make("Category", example=self.example, user=self.project.admin)
+        self.assertNotEqual(cached_fingerprint(self.project.item), before)
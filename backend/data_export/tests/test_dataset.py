@@ -2,9 +2,16 @@ import unittest
 from unittest.mock import MagicMock
 
 import pandas as pd
+from django.test import TestCase
+from model_mommy import mommy
 from pandas.testing import assert_frame_equal
 
-from data_export.pipeline.dataset import Dataset
+from data_export.models import ExportedExample
+from data_export.pipeline.comments import Comments
+from data_export.pipeline.dataset import Dataset, UserDatasets, iterate_chunks
+from data_export.pipeline.labels import Spans
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
 
 
 class TestDataset(unittest.TestCase):
@@ -27,3 +34,62 @@ class TestDataset(unittest.TestCase):
         df = dataset.to_dataframe()
         expected = pd.DataFrame([{"data": "example", "labels": ["label"], "comments": ["comment"]}])
         assert_frame_equal(df, expected)
+
+    def test_batch(self):
+        self.examples.__iter__.return_value = [self.examples.__iter__.return_value[0]] * 3
+        dataset = Dataset(self.examples, self.labels, self.comments)
+        self.assertEqual([len(batch) for batch in dataset.batch(2)], [2, 1])
+
+
+class TestDatasetChunks(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.examples = mommy.make("ExportedExample", project=self.project.item, _quantity=5)
+        for example in self.examples:
+            mommy.make("ExportedSpan", example=example, user=self.project.admin, start_offset=0, end_offset=1)
+        self.queryset = ExportedExample.objects.filter(project=self.project.item)
+
+    def test_paginate_queryset_by_primary_key(self):
+        chunks = list(iterate_chunks(self.queryset, 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([example.id for chunk in chunks for example in chunk], [e.id for e in self.examples])
+
+    def test_load_labels_of_chunk_only(self):
+        spans = Spans(self.queryset)
+        dataset = Dataset(self.queryset, [spans], [Comments(self.queryset)], chunk_size=2)
+        # One query for each chunk, its spans and its comments, and one to find the end.
+        with self.assertNumQueries(3 * 3 + 1):
+            for data in dataset:
+                self.assertLessEqual(len(spans.label_groups), 2)
+                self.assertEqual(len(data[Spans.column]), 1)
+
+
+class TestUserDatasets(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.example1, self.example2 = mommy.make("ExportedExample", project=self.project.item, _quantity=2)
+        self.admin, self.annotator = self.project.admin, self.project.annotator
+        mommy.make("ExportedSpan", example=self.example1, user=self.admin, start_offset=0, end_offset=1)
+        mommy.make("ExportedSpan", example=self.example2, user=self.annotator, start_offset=0, end_offset=1)
+        mommy.make("ExampleState", example=self.example2, confirmed_by=self.annotator)
+        self.queryset = ExportedExample.objects.filter(project=self.project.item)
+
+    def make_datasets(self, confirmed_only=False):
+        spans = Spans(self.queryset, by_user=True)
+        comments = Comments(self.queryset, by_user=True)
+        return UserDatasets(self.queryset, [spans], [comments], [self.admin.id, self.annotator.id], confirmed_only)
+
+    def test_split_labels_by_user(self):
+        batches = dict(self.make_datasets().batch(10))
+        admin_spans = batches[self.admin.id][Spans.column].map(len).tolist()
+        annotator_spans = batches[self.annotator.id][Spans.column].map(len).tolist()
+        self.assertEqual((admin_spans, annotator_spans), ([1, 0], [0, 1]))
+
+    def test_query_once_for_all_users(self):
+        # The examples, the spans, the comments and the confirmations, and one query to find the end.
+        with self.assertNumQueries(5):
+            list(self.make_datasets(confirmed_only=True).batch(10))
+
+    def test_confirmed_only(self):
+        batches = list(self.make_datasets(confirmed_only=True).batch(10))
+        self.assertEqual([(user_id, len(batch)) for user_id, batch in batches], [(self.annotator.id, 1)])
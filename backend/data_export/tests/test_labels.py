@@ -26,3 +26,9 @@ class TestLabels(TestCase):
         categories = Categories(self.examples, user=self.project.annotator)
         result = categories.find_by(self.example1.id)
         self.assertEqual(len(result[Categories.column]), 0)
+
+    def test_load_labels_of_examples(self):
+        categories = Categories(self.examples)
+        categories.load([self.example2.id])
+        result = categories.find_by(self.example1.id)
+        self.assertEqual(len(result[Categories.column]), 0)
@@ -1,12 +1,18 @@
+import io
 import os
+import tempfile
 import zipfile
+from unittest import skipIf
 
 import pandas as pd
 from django.test import TestCase, override_settings
+from django.utils import timezone
 from model_mommy import mommy
 
 from ..celery_tasks import export_dataset
+from ..pipeline import writers
 from data_export.models import DATA
+from labels.models import Category
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -25,7 +31,9 @@ def read_zip_content(file):
     return datasets
 
 
-@override_settings(MEDIA_URL=os.path.dirname(__file__))
+@override_settings(
+    MEDIA_URL=os.path.dirname(__file__), EXPORT_CACHE_DIR=os.path.join(tempfile.gettempdir(), "doccano-exports")
+)
 class TestExport(TestCase):
     def export_dataset(self, confirmed_only=False):
         file = export_dataset(self.project.id, "JSONL", confirmed_only)
@@ -824,3 +832,87 @@ class TestExportRelation(TestExport):
             }
         ]
         self.assertEqual(dataset, expected_dataset)
+
+
+@skipIf(writers.pa is None, "pyarrow is not installed")
+@override_settings(EXPORT_BATCH_SIZE=1)
+class TestExportParquet(TestExport):
+    def export_dataset(self, confirmed_only=False):
+        file = export_dataset(self.project.id, "Parquet", confirmed_only)
+        with zipfile.ZipFile(file) as z:
+            with z.open("all.parquet") as f:
+                parquet_file = writers.pq.ParquetFile(io.BytesIO(f.read()))
+        os.remove(file)
+        return parquet_file
+
+    def test_write_spans_as_nested_lists(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING, collaborative_annotation=True)
+        example1 = mommy.make("ExportedExample", project=self.project.item, text="example1")
+        example2 = mommy.make("ExportedExample", project=self.project.item, text="example2")
+        span = mommy.make("ExportedSpan", example=example2, user=self.project.admin, start_offset=0, end_offset=1)
+        parquet_file = self.export_dataset()
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        dataset = parquet_file.read().to_pylist()
+        self.assertEqual(
+            dataset,
+            [
+                {**self.data_to_text(example1), "label": [], "Comments": []},
+                {**self.data_to_text(example2), "label": [span.to_dict()], "Comments": []},
+            ],
+        )
+
+    def test_write_relations(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING, use_relation=True, collaborative_annotation=True)
+        example = mommy.make("ExportedExample", project=self.project.item, text="example")
+        span1 = mommy.make("ExportedSpan", example=example, user=self.project.admin, start_offset=0, end_offset=1)
+        span2 = mommy.make("ExportedSpan", example=example, user=self.project.admin, start_offset=1, end_offset=2)
+        relation = mommy.make("ExportedRelation", from_id=span1, to_id=span2, example=example)
+        dataset = self.export_dataset().read().to_pylist()
+        self.assertEqual(dataset[0]["entities"], [span1.to_dict(), span2.to_dict()])
+        self.assertEqual(dataset[0]["relations"], [relation.to_dict()])
+
+
+@override_settings(
+    MEDIA_URL=os.path.dirname(__file__), EXPORT_CACHE_DIR=os.path.join(tempfile.gettempdir(), "doccano-exports")
+)
+class TestExportIncremental(TestExport):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION, collaborative_annotation=True)
+        self.examples = mommy.make("ExportedExample", project=self.project.item, _quantity=4)
+        self.categories = [
+            mommy.make("ExportedCategory", example=example, user=self.project.admin) for example in self.examples
+        ]
+        self.since = timezone.now()
+
+    def export_changes(self, since):
+        file = export_dataset(self.project.id, "JSONL", since=since.isoformat())
+        datasets = read_zip_content(file)
+        os.remove(file)
+        return datasets
+
+    def test_exports_changed_examples_only(self):
+        category = self.categories[0]
+        category.label = mommy.make("CategoryType", project=self.project.item)
+        category.save()
+        mommy.make("ExampleState", example=self.examples[1], confirmed_by=self.project.admin)
+        mommy.make("ExportedComment", example=self.examples[2], user=self.project.admin)
+        datasets = self.export_changes(self.since)
+        self.assertEqual([row["id"] for row in datasets["all"]], [example.id for example in self.examples[:3]])
+        self.assertEqual(datasets["all"][0]["label"], [category.label.text])
+
+    def test_exports_tombstones_of_deleted_labels(self):
+        category = self.categories[3]
+        Category.objects.filter(pk=category.pk).delete()
+        datasets = self.export_changes(self.since)
+        self.assertEqual([row["id"] for row in datasets["all"]], [self.examples[3].id])
+        self.assertEqual(datasets["all"][0]["label"], [])
+        [tombstone] = datasets["tombstones"]
+        self.assertEqual(tombstone["id"], category.id)
+        self.assertEqual(tombstone["uuid"], str(category.uuid))
+        self.assertEqual(tombstone["type"], "category")
+        self.assertEqual(tombstone["example"], self.examples[3].id)
+        self.assertEqual(tombstone["user"], self.project.admin.username)
+
+    def test_exports_nothing_without_changes(self):
+        datasets = self.export_changes(timezone.now())
+        self.assertEqual(datasets, {"all": [], "tombstones": []})
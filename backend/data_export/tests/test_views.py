@@ -1,3 +1,11 @@
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+from django.test import override_settings
+from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 
@@ -19,3 +27,75 @@ class TestDownloadCatalog(CRUDMixin):
     def test_denies_project_staff_to_list_catalog(self):
         for member in self.project.staffs:
             self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+
+class TestIncrementalExport(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.url = reverse(viewname="download-dataset", args=[self.project.item.id])
+
+    def test_rejects_invalid_since(self):
+        self.data = {"format": "JSONL", "since": "yesterday"}
+        response = self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+
+    def test_rejects_since_before_tombstone_retention(self):
+        self.data = {"format": "JSONL", "since": "2000-01-01T00:00:00Z"}
+        response = self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+
+    def test_rejects_unknown_previous_export(self):
+        self.data = {"format": "JSONL", "previousExport": "unknown"}
+        response = self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("previousExport", response.data)
+
+
+class TestStreamExport(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION, collaborative_annotation=True)
+        self.example = mommy.make("Example", project=self.project.item, text="example")
+        self.url = reverse(viewname="download-stream", args=[self.project.item.id]) + "?fileFormat=JSONL"
+        self.dirpath = tempfile.TemporaryDirectory()
+        self.settings = override_settings(EXPORT_CACHE_DIR=self.dirpath.name)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.dirpath.cleanup()
+
+    def test_stream_archive(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ["all.jsonl"])
+            self.assertIn(b'"text":"example"', archive.read("all.jsonl"))
+
+    def test_serve_range_of_cached_archive(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        content = b"".join(response.streaming_content)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(content)}")
+        self.assertEqual(b"".join(response.streaming_content), content[10:20])
+
+    def test_reject_unsatisfiable_range(self):
+        b"".join(self.assert_fetch(self.project.admin, status.HTTP_200_OK).streaming_content)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=100000-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_prune_expired_archives(self):
+        path = os.path.join(self.dirpath.name, "expired.zip")
+        with open(path, "wb") as f:
+            f.write(b"zip")
+        expired_at = time.time() - 2 * 86400
+        os.utime(path, (expired_at, expired_at))
+        b"".join(self.assert_fetch(self.project.admin, status.HTTP_200_OK).streaming_content)
+        self.assertFalse(os.path.exists(path))
+
+    def test_require_format(self):
+        self.url = reverse(viewname="download-stream", args=[self.project.item.id])
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_denies_project_staff_to_stream(self):
+        for member in self.project.staffs:
+            self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
@@ -4,6 +4,7 @@ import unittest
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
+from ..pipeline import writers
 from ..pipeline.writers import CsvWriter, FastTextWriter, JsonlWriter, JsonWriter
 
 
@@ -46,6 +47,25 @@ class TestJsonlWriter(TestWriter):
         assert_frame_equal(self.dataset, loaded_dataset)
 
 
+class TestStreamingWriter(TestWriter):
+    def setUp(self):
+        super().setUp()
+        self.batches = [self.dataset[:2], self.dataset[:0], self.dataset[2:]]
+
+    def test_write_json_batches(self):
+        JsonWriter().write_batches(self.file, self.batches)
+        assert_frame_equal(self.dataset, pd.read_json(self.file))
+
+    def test_write_jsonl_batches(self):
+        JsonlWriter().write_batches(self.file, self.batches)
+        assert_frame_equal(self.dataset, pd.read_json(self.file, lines=True))
+
+    def test_write_empty_json(self):
+        JsonWriter().write_batches(self.file, [])
+        with open(self.file) as f:
+            self.assertEqual(f.read(), "[]")
+
+
 class TestFastText(unittest.TestCase):
     def setUp(self):
         self.expected = "__label__A exampleA\n__label__B exampleB"
@@ -57,3 +77,40 @@ class TestFastText(unittest.TestCase):
         writer.write(file, self.dataset)
         loaded_dataset = open(file, encoding="utf-8").read().strip()
         self.assertEqual(loaded_dataset, self.expected)
+
+
+@unittest.skipIf(writers.pa is None, "pyarrow is not installed")
+class TestParquetWriter(TestWriter):
+    def setUp(self):
+        super().setUp()
+        self.file = "tmp.parquet"
+
+    def test_write(self):
+        writer = writers.ParquetWriter()
+        writer.write(self.file, self.dataset)
+        assert_frame_equal(self.dataset, pd.read_parquet(self.file))
+
+    def test_write_row_group_per_batch(self):
+        writer = writers.ParquetWriter({"labels": writers.pa.list_(writers.pa.string())})
+        batches = [
+            pd.DataFrame([{"text": "A", "labels": []}]),
+            pd.DataFrame([{"text": "B", "labels": ["X"]}, {"text": "C", "labels": ["X", "Y"]}]),
+            pd.DataFrame([{"labels": []}]),
+        ]
+        writer.write_batches(self.file, batches)
+        parquet_file = writers.pq.ParquetFile(self.file)
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        rows = parquet_file.read().to_pylist()
+        self.assertEqual([row["labels"] for row in rows], [[], ["X"], ["X", "Y"], []])
+        self.assertEqual(rows[-1]["text"], None)
+
+    def test_reject_column_missing_from_first_batch(self):
+        writer = writers.ParquetWriter()
+        batches = [pd.DataFrame([{"text": "A"}]), pd.DataFrame([{"text": "B", "extra": 1}])]
+        with self.assertRaises(ValueError):
+            writer.write_batches(self.file, batches)
+
+    def test_write_empty_dataset(self):
+        writer = writers.ParquetWriter({"labels": writers.pa.list_(writers.pa.string())})
+        writer.write_batches(self.file, [])
+        self.assertEqual(writers.pq.read_table(self.file).column_names, ["labels"])
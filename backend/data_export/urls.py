@@ -1,8 +1,9 @@
 from django.urls import path
 
-from .views import DatasetCatalog, DatasetExportAPI
+from .views import DatasetCatalog, DatasetExportAPI, DatasetStreamAPI
 
 urlpatterns = [
     path(route="projects/<int:project_id>/download-format", view=DatasetCatalog.as_view(), name="download-format"),
     path(route="projects/<int:project_id>/download", view=DatasetExportAPI.as_view(), name="download-dataset"),
+    path(route="projects/<int:project_id>/download/stream", view=DatasetStreamAPI.as_view(), name="download-stream"),
 ]
@@ -1,23 +1,99 @@
+import os
+import re
+
 from celery.result import AsyncResult
-from django.http import FileResponse
-from django.shortcuts import get_object_or_404
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import content_disposition_header
 from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .celery_tasks import export_dataset
+from .celery_tasks import export_dataset, get_export_cache, iter_export
+from .models import ExportJob
+from .pipeline.cache import export_key
 from .pipeline.catalog import Options
-from projects.models import Project
+from labels.models import LabelTombstone
+from projects.context import get_project_context
 from projects.permissions import IsProjectAdmin
 
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def iter_file(f, length: int, chunk_size: int = 1 << 16):
+    try:
+        while length > 0 and (chunk := f.read(min(chunk_size, length))):
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def ranged_file_response(request, path: str) -> HttpResponse:
+    """Serve the file, or the single byte range of it asked by the `Range` header, e.g. to resume a download."""
+    filename = os.path.basename(path)
+    size = os.path.getsize(path)
+    match = RANGE.match(request.headers.get("Range", ""))
+    if match is None or match.groups() == ("", ""):
+        response = FileResponse(open(path, mode="rb"), as_attachment=True, filename=filename)
+        response["Accept-Ranges"] = "bytes"
+        return response
+    first, last = match.groups()
+    if first == "":
+        # A suffix range, e.g. "bytes=-500" for the last 500 bytes.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end:
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    f = open(path, mode="rb")
+    f.seek(start)
+    response = StreamingHttpResponse(
+        iter_file(f, end - start + 1), status=status.HTTP_206_PARTIAL_CONTENT, content_type="application/zip"
+    )
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def parse_since(project_id, since, previous_export):
+    """The time after which the changes are exported: a timestamp, or the start of a previous export."""
+    if previous_export is not None:
+        job = ExportJob.objects.filter(project_id=project_id, task_id=previous_export).first()
+        if job is None:
+            raise ValidationError({"previousExport": "The export doesn't exist in this project."})
+        since_at, field = job.started_at, "previousExport"
+    elif since is None:
+        return None
+    else:
+        try:
+            since_at = parse_datetime(since)
+        except (TypeError, ValueError):
+            since_at = None
+        if since_at is None:
+            raise ValidationError({"since": "The timestamp must be in the ISO 8601 format."})
+        if timezone.is_naive(since_at):
+            since_at = timezone.make_aware(since_at)
+        field = "since"
+    # The deleted labels are only known for the retention of their tombstones.
+    if since_at < LabelTombstone.objects.retention_start():
+        raise ValidationError({field: "The labels deleted since then are no longer known. Export the whole dataset."})
+    return since_at
+
 
 class DatasetCatalog(APIView):
     permission_classes = [IsAuthenticated & IsProjectAdmin]
 
     def get(self, request, *args, **kwargs):
         project_id = kwargs["project_id"]
-        project = get_object_or_404(Project, pk=project_id)
+        project = get_project_context(self.request, project_id).project
         use_relation = getattr(project, "use_relation", False)
         options = Options.filter_by_task(project.project_type, use_relation)
         return Response(data=options, status=status.HTTP_200_OK)
@@ -31,15 +107,51 @@ class DatasetExportAPI(APIView):
         task = AsyncResult(task_id)
         ready = task.ready()
         if ready:
-            filename = task.result
-            return FileResponse(open(filename, mode="rb"), as_attachment=True)
+            if not os.path.exists(task.result):
+                raise NotFound("The export has expired. Please export the dataset again.")
+            return ranged_file_response(request, task.result)
         return Response({"status": "Not ready"})
 
     def post(self, request, *args, **kwargs):
         project_id = self.kwargs["project_id"]
         file_format = request.data.pop("format")
         export_approved = request.data.pop("exportApproved", False)
+        since = parse_since(project_id, request.data.pop("since", None), request.data.pop("previousExport", None))
         task = export_dataset.delay(
-            project_id=project_id, file_format=file_format, confirmed_only=export_approved, **request.data
+            project_id=project_id,
+            file_format=file_format,
+            confirmed_only=export_approved,
+            since=None if since is None else since.isoformat(),
+            **request.data,
         )
         return Response({"task_id": task.task_id})
+
+
+class DatasetStreamAPI(APIView):
+    """Export the dataset while it's downloaded, as a zip archive streamed while its rows are generated.
+
+    The archive is stored in the export cache once sent, so that the next download of the unchanged project
+    is served from the cache, with the support of range requests.
+    """
+
+    permission_classes = [IsAuthenticated & IsProjectAdmin]
+
+    def get(self, request, *args, **kwargs):
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
+        # The `format` parameter is taken by the content negotiation of the framework.
+        file_format = request.query_params.get("fileFormat")
+        if file_format is None:
+            raise ValidationError({"fileFormat": "The format is required."})
+        confirmed_only = request.query_params.get("exportApproved", "false").lower() in ("true", "1")
+        since = parse_since(project.id, request.query_params.get("since"), request.query_params.get("previousExport"))
+        since_iso = None if since is None else since.isoformat()
+        cache = get_export_cache()
+        cache.prune()
+        key = export_key(project, file_format=file_format, confirmed_only=confirmed_only, since=since_iso)
+        path = cache.get(key)
+        if path is not None:
+            return ranged_file_response(request, path)
+        chunks = cache.tee(key, iter_export(project, file_format, confirmed_only, since))
+        response = StreamingHttpResponse(chunks, content_type="application/zip")
+        response["Content-Disposition"] = content_disposition_header(True, os.path.basename(cache.path(key)))
+        return response
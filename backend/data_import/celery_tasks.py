@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 import filetype
 from celery import shared_task
@@ -9,6 +9,7 @@ from django_drf_filepond.api import store_upload
 from django_drf_filepond.models import TemporaryUpload
 
 from .datasets import load_dataset
+from .models import ImportJob, ImportStatus
 from .pipeline.catalog import Format, create_file_format
 from .pipeline.exceptions import (
     FileImportException,
@@ -46,28 +47,66 @@ def check_uploaded_files(upload_ids: List[str], file_format: Format):
     return cleaned_ids, errors
 
 
-@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
-def import_dataset(user_id, project_id, file_format: str, upload_ids: List[str], task: str, **kwargs):
+def to_filenames(temporary_uploads) -> List[FileName]:
+    return [
+        FileName(full_path=tu.get_file_path(), generated_name=tu.file.name, upload_name=tu.upload_name)
+        for tu in temporary_uploads
+    ]
+
+
+def get_import_job(task_id: Optional[str], project: Project, user) -> Optional[ImportJob]:
+    """Return the job of the task, which holds the checkpoints of the previous attempts if it's retried."""
+    if task_id is None:
+        return None
+    job, _ = ImportJob.objects.get_or_create(task_id=task_id, defaults={"project": project, "user": user})
+    return job
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
+def import_dataset(self, user_id, project_id, file_format: str, upload_ids: List[str], task: str, **kwargs):
     project = get_object_or_404(Project, pk=project_id)
     user = get_object_or_404(get_user_model(), pk=user_id)
+    job = get_import_job(self.request.id, project, user)
     try:
         fmt = create_file_format(file_format)
         upload_ids, errors = check_uploaded_files(upload_ids, fmt)
-        temporary_uploads = TemporaryUpload.objects.filter(upload_id__in=upload_ids)
-        filenames = [
-            FileName(full_path=tu.get_file_path(), generated_name=tu.file.name, upload_name=tu.upload_name)
-            for tu in temporary_uploads
-        ]
-
-        dataset = load_dataset(task, fmt, filenames, project, **kwargs)
-        dataset.save(user, batch_size=settings.IMPORT_BATCH_SIZE)
+        temporary_uploads = TemporaryUpload.objects.filter(upload_id__in=upload_ids).order_by("upload_id")
+        dataset = load_dataset(task, fmt, to_filenames(temporary_uploads), project, **kwargs)
+        if job is None:
+            dataset.save(user, batch_size=settings.IMPORT_BATCH_SIZE)
+        else:
+            dataset.reader.resume(job.get_checkpoints())
+            job.start(total_rows=dataset.reader.estimate_rows())
+            dataset.save(user, batch_size=settings.IMPORT_BATCH_SIZE, on_checkpoint=job.checkpoint)
         upload_to_store(temporary_uploads)
         errors.extend(dataset.errors)
+        if job is not None:
+            job.finish()
         return {"error": [e.dict() for e in errors]}
     except FileImportException as e:
+        if job is not None:
+            job.finish(ImportStatus.FAILURE)
         return {"error": [e.dict()]}
 
 
+@shared_task
+def check_dataset(project_id, file_format: str, upload_ids: List[str], task: str, sample=None, **kwargs):
+    """Check the uploaded files like `import_dataset`, without saving anything.
+
+    The temporary uploads are kept, so that the same files can be imported afterwards.
+    """
+    project = get_object_or_404(Project, pk=project_id)
+    try:
+        fmt = create_file_format(file_format)
+        upload_ids, errors = check_uploaded_files(upload_ids, fmt)
+        temporary_uploads = TemporaryUpload.objects.filter(upload_id__in=upload_ids).order_by("upload_id")
+        dataset = load_dataset(task, fmt, to_filenames(temporary_uploads), project, **kwargs)
+        report = dataset.check(batch_size=settings.IMPORT_BATCH_SIZE, sample=sample)
+        return {"report": report, "error": [e.dict() for e in errors]}
+    except FileImportException as e:
+        return {"report": None, "error": [e.dict()]}
+
+
 def upload_to_store(temporary_uploads):
     for tu in temporary_uploads:
         store_upload(tu.upload_id, destination_file_path=tu.file.name)
@@ -1,7 +1,24 @@
 import abc
-from typing import List, Type
+import collections
+import copy
+import functools
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
+import numpy as np
+import pandas as pd
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 
 from .models import DummyLabelType
 from .pipeline.catalog import RELATION_EXTRACTION, Format
@@ -12,29 +29,147 @@ from .pipeline.factories import create_parser
 from .pipeline.label import CategoryLabel, Label, RelationLabel, SpanLabel, TextLabel
 from .pipeline.label_types import LabelTypes
 from .pipeline.labels import Categories, Labels, Relations, Spans, Texts
+from .pipeline.loaders import create_loader
 from .pipeline.makers import BinaryExampleMaker, ExampleMaker, LabelMaker
 from .pipeline.readers import (
     DEFAULT_LABEL_COLUMN,
     DEFAULT_TEXT_COLUMN,
+    Checkpoint,
     FileName,
+    ParallelReader,
     Reader,
 )
+from .pipeline.report import DryRunReport
+from examples.models import Example
 from label_types.models import CategoryType, LabelType, RelationType, SpanType
 from projects.models import Project, ProjectType
 
+CheckpointCallback = Callable[[Dict[str, Checkpoint], int], None]
+Maker = Union[ExampleMaker, LabelMaker]
+
+
+def make_batch(
+    makers: List[Maker], records: pd.DataFrame
+) -> Tuple[List[Example], List[List[Label]], List[List[FileParseException]]]:
+    """Make the examples and the labels of the records, e.g. in a worker process of the reader.
+
+    Args:
+        makers: the example maker followed by the label makers.
+        records: the records to make them of.
+
+    Returns:
+        the examples, the labels made by each label maker, and the errors found by each maker.
+    """
+    example_maker, *label_makers = makers
+    examples = example_maker.make(records)
+    labels = [maker.make(records) for maker in label_makers]
+    return examples, labels, [maker.errors for maker in makers]
+
 
 class Dataset(abc.ABC):
     def __init__(self, reader: Reader, project: Project, **kwargs):
         self.reader = reader
         self.project = project
         self.kwargs = kwargs
+        self.loader = create_loader()
+        self.dedup: Optional[str] = kwargs.get("dedup")
+
+    def save(self, user: User, batch_size: int = 1000, on_checkpoint: Optional[CheckpointCallback] = None):
+        """Save the records batch by batch.
+
+        Each batch is committed in its own transaction, along with the checkpoints of the reader,
+        so an interrupted import can resume after the last committed batch.
+
+        Args:
+            user: the user importing the dataset.
+            batch_size: the number of records per batch.
+            on_checkpoint: called in the transaction of each batch with the checkpoints and the number of records.
+        """
+        batch = max((checkpoint.batch for checkpoint in self.reader.checkpoints.values()), default=0)
+        with self.reader.pool():
+            for records, examples, labels in self.make(self.reader.batch(batch_size)):
+                batch += 1
+                with transaction.atomic():
+                    self.save_batch(user, examples, self.wrap_labels(labels))
+                    checkpoints = self.reader.checkpoint(records, batch)
+                    if on_checkpoint is not None:
+                        on_checkpoint(checkpoints, len(records))
+
+    def make(self, batches: Iterable[pd.DataFrame]) -> Iterator[Tuple[pd.DataFrame, List[Example], List[List[Label]]]]:
+        """Yield each batch of records with its examples and the labels made by each label maker.
+
+        They are made in the worker processes of the reader if its pool is open.
+        The errors found are collected by the makers of the dataset.
+        """
+        # The copies of the makers collect only the errors of the batch they are given.
+        make = functools.partial(make_batch, [copy.copy(maker) for maker in self.makers])
+        for records, (examples, labels, errors) in self.reader.map(make, batches):
+            for maker, maker_errors in zip(self.makers, errors):
+                maker.errors.extend(maker_errors)
+            yield records, examples, labels
+
+    def save_batch(self, user: User, examples: List[Example], labels: List[Labels]):
+        raise NotImplementedError()
+
+    def save_examples(self, examples: List[Example]) -> Examples:
+        """Save the examples, without the duplicates if the import deduplicates."""
+        saved = Examples(examples)
+        if self.dedup:
+            saved.deduplicate(self.project, self.dedup)
+        saved.save(self.loader)
+        return saved
+
+    def wrap_labels(self, labels: List[List[Label]]) -> List[Labels]:
+        """Wrap the labels made by each label maker with their label types, before they are cleaned."""
+        return []
+
+    def check(self, batch_size: int = 1000, sample: Optional[float] = None, seed: Optional[int] = None) -> Dict:
+        """Run the reader, the makers and the cleaning of the labels like `save`, without saving anything.
+
+        Args:
+            batch_size: the number of records per batch.
+            sample: the probability to check each record, to check a random sample of a large file.
+            seed: the seed of the sampling.
+
+        Returns:
+            the statistics of `DryRunReport`.
+        """
+        report = DryRunReport(self.project, sample)
+        random = np.random.default_rng(seed)
+        # The number of rows of each batch before it's sampled.
+        rows: collections.deque = collections.deque()
+
+        def sample_batches():
+            for records in self.reader.batch(batch_size):
+                rows.append(len(records))
+                if sample is not None:
+                    records = records[random.random(len(records)) < sample]
+                yield records
+
+        with self.reader.pool():
+            for records, examples, labels in self.make(sample_batches()):
+                report.add_examples(rows.popleft(), len(records), len(examples))
+                example_uuids = {example.uuid for example in examples}
+                for wrapped in self.wrap_labels(labels):
+                    report.add_labels(wrapped, example_uuids)
+                # Count the errors batch by batch, so that they don't pile up.
+                report.add_errors(self.errors)
+                self.clear_errors()
+        return report.dict()
 
-    def save(self, user: User, batch_size: int = 1000):
+    @property
+    def makers(self) -> List[Maker]:
+        """The example maker followed by the label makers."""
         raise NotImplementedError()
 
     @property
     def errors(self) -> List[FileParseException]:
-        raise NotImplementedError()
+        return self.reader.errors + [error for maker in self.makers for error in maker.errors]
+
+    def clear_errors(self):
+        self.reader.clear_errors()
+        for maker in self.makers:
+            maker.errors.clear()
 
 
 class PlainDataset(Dataset):
@@ -42,14 +177,12 @@ class PlainDataset(Dataset):
         super().__init__(reader, project, **kwargs)
         self.example_maker = ExampleMaker(project=project, data_class=TextData)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, examples: List[Example], labels: List[Labels]):
+        self.save_examples(examples)
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors
+    def makers(self) -> List[Maker]:
+        return [self.example_maker]
 
 
 class DatasetWithSingleLabelType(Dataset):
@@ -71,38 +204,39 @@ class DatasetWithSingleLabelType(Dataset):
             column=kwargs.get("column_label") or DEFAULT_LABEL_COLUMN, label_class=self.label_class
         )
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def wrap_labels(self, labels: List[List[Label]]) -> List[Labels]:
+        (made,) = labels
+        return [self.labels_class(made, self.types)]
+
+    def save_batch(self, user: User, examples: List[Example], labels: List[Labels]):
+        # create examples
+        saved = self.save_examples(examples)
 
-            # create label types
-            labels = self.labels_class(self.label_maker.make(records), self.types)
-            labels.clean(self.project)
-            labels.save_types(self.project)
+        # create label types
+        (wrapped,) = labels
+        wrapped.clean(self.project)
+        wrapped.save_types(self.project)
 
-            # create Labels
-            labels.save(user, examples)
+        # create Labels
+        wrapped.save(user, saved, loader=self.loader)
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors + self.label_maker.errors
+    def makers(self) -> List[Maker]:
+        return [self.example_maker, self.label_maker]
 
 
 class BinaryDataset(Dataset):
     def __init__(self, reader: Reader, project: Project, **kwargs):
         super().__init__(reader, project, **kwargs)
-        self.example_maker = BinaryExampleMaker(project=project, data_class=BinaryData)
+        paths = {filename.generated_name: filename.full_path for filename in reader.filenames}
+        self.example_maker = BinaryExampleMaker(project=project, data_class=BinaryData, paths=paths)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, examples: List[Example], labels: List[Labels]):
+        self.save_examples(examples)
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors
+    def makers(self) -> List[Maker]:
+        return [self.example_maker]
 
 
 class TextClassificationDataset(DatasetWithSingleLabelType):
@@ -140,28 +274,29 @@ class RelationExtractionDataset(Dataset):
         self.span_maker = LabelMaker(column="entities", label_class=SpanLabel)
         self.relation_maker = LabelMaker(column="relations", label_class=RelationLabel)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def wrap_labels(self, labels: List[List[Label]]) -> List[Labels]:
+        spans, relations = labels
+        return [Spans(spans, self.span_types), Relations(relations, self.relation_types)]
 
-            # create label types
-            spans = Spans(self.span_maker.make(records), self.span_types)
-            spans.clean(self.project)
-            spans.save_types(self.project)
+    def save_batch(self, user: User, examples: List[Example], labels: List[Labels]):
+        # create examples
+        saved = self.save_examples(examples)
 
-            relations = Relations(self.relation_maker.make(records), self.relation_types)
-            relations.clean(self.project)
-            relations.save_types(self.project)
+        # create label types
+        spans, relations = labels
+        spans.clean(self.project)
+        spans.save_types(self.project)
 
-            # create Labels
-            spans.save(user, examples)
-            relations.save(user, examples, spans=spans)
+        relations.clean(self.project)
+        relations.save_types(self.project)
+
+        # create Labels
+        spans.save(user, saved, loader=self.loader)
+        relations.save(user, saved, loader=self.loader, spans=spans)
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors + self.span_maker.errors + self.relation_maker.errors
+    def makers(self) -> List[Maker]:
+        return [self.example_maker, self.span_maker, self.relation_maker]
 
 
 class CategoryAndSpanDataset(Dataset):
@@ -178,28 +313,29 @@ class CategoryAndSpanDataset(Dataset):
         self.category_maker = LabelMaker(column="cats", label_class=CategoryLabel)
         self.span_maker = LabelMaker(column="entities", label_class=SpanLabel)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def wrap_labels(self, labels: List[List[Label]]) -> List[Labels]:
+        categories, spans = labels
+        return [Categories(categories, self.category_types), Spans(spans, self.span_types)]
 
-            # create label types
-            categories = Categories(self.category_maker.make(records), self.category_types)
-            categories.clean(self.project)
-            categories.save_types(self.project)
+    def save_batch(self, user: User, examples: List[Example], labels: List[Labels]):
+        # create examples
+        saved = self.save_examples(examples)
 
-            spans = Spans(self.span_maker.make(records), self.span_types)
-            spans.clean(self.project)
-            spans.save_types(self.project)
+        # create label types
+        categories, spans = labels
+        categories.clean(self.project)
+        categories.save_types(self.project)
 
-            # create Labels
-            categories.save(user, examples)
-            spans.save(user, examples)
+        spans.clean(self.project)
+        spans.save_types(self.project)
+
+        # create Labels
+        categories.save(user, saved, loader=self.loader)
+        spans.save(user, saved, loader=self.loader)
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors + self.category_maker.errors + self.span_maker.errors
+    def makers(self) -> List[Maker]:
+        return [self.example_maker, self.category_maker, self.span_maker]
 
 
 def select_dataset(project: Project, task: str, file_format: Format) -> Type[Dataset]:
@@ -224,6 +360,6 @@ def select_dataset(project: Project, task: str, file_format: Format) -> Type[Dat
 
 def load_dataset(task: str, file_format: Format, data_files: List[FileName], project: Project, **kwargs) -> Dataset:
     parser = create_parser(file_format, **kwargs)
-    reader = Reader(data_files, parser)
+    reader = ParallelReader(data_files, parser, workers=settings.IMPORT_WORKERS, chunk_size=settings.IMPORT_CHUNK_SIZE)
     dataset_class = select_dataset(project, task, file_format)
     return dataset_class(reader, project, **kwargs)
@@ -1,6 +1,14 @@
+import dataclasses
+from typing import Dict, Optional
 from unittest.mock import MagicMock
 
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+from .pipeline.readers import Checkpoint
 from label_types.models import CategoryType
+from projects.models import Project
 
 
 class DummyLabelType(CategoryType):
@@ -8,3 +16,80 @@ class DummyLabelType(CategoryType):
 
     class Meta:
         proxy = True
+
+
+class ImportStatus(models.TextChoices):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+
+
+class ImportJob(models.Model):
+    """The progress of an import task, checkpointed after each committed batch.
+
+    The checkpoints map the generated name of each file to its `Checkpoint`,
+    so that a retried task resumes after the records already saved.
+    """
+
+    task_id = models.CharField(max_length=191, unique=True)
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="import_jobs")
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE, null=True)
+    status = models.CharField(max_length=10, choices=ImportStatus.choices, default=ImportStatus.PENDING)
+    checkpoints = models.JSONField(default=dict)
+    batches = models.PositiveIntegerField(default=0)
+    rows = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # The rows saved before the current attempt started, to measure the speed of the attempt only.
+    attempt_rows = models.PositiveIntegerField(default=0)
+    attempt_started_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def get_checkpoints(self) -> Dict[str, Checkpoint]:
+        return {name: Checkpoint(**checkpoint) for name, checkpoint in self.checkpoints.items()}
+
+    def start(self, total_rows: Optional[int] = None):
+        """Start an attempt. `total_rows` estimates the rows left to save, if known."""
+        self.status = ImportStatus.RUNNING
+        self.attempts += 1
+        self.attempt_rows = self.rows
+        self.attempt_started_at = timezone.now()
+        self.total_rows = None if total_rows is None else self.rows + total_rows
+        self.save()
+
+    def checkpoint(self, checkpoints: Dict[str, Checkpoint], rows: int):
+        """Record a committed batch of `rows` records. It must run in the transaction of the batch."""
+        self.checkpoints = {name: dataclasses.asdict(checkpoint) for name, checkpoint in checkpoints.items()}
+        self.batches += 1
+        self.rows += rows
+        if self.total_rows is not None:
+            self.total_rows = max(self.total_rows, self.rows)
+        self.save(update_fields=["checkpoints", "batches", "rows", "total_rows", "updated_at"])
+
+    def finish(self, status: str = ImportStatus.SUCCESS):
+        self.status = status
+        if status == ImportStatus.SUCCESS:
+            self.total_rows = self.rows
+        self.save(update_fields=["status", "total_rows", "updated_at"])
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if self.attempt_started_at is None:
+            return None
+        end = timezone.now() if self.status == ImportStatus.RUNNING else self.updated_at
+        elapsed = (end - self.attempt_started_at).total_seconds()
+        if elapsed <= 0:
+            return None
+        return (self.rows - self.attempt_rows) / elapsed
+
+    @property
+    def eta(self) -> Optional[float]:
+        """The estimated number of seconds until the import finishes."""
+        if self.status == ImportStatus.SUCCESS:
+            return 0.0
+        speed = self.rows_per_second
+        if self.total_rows is None or not speed:
+            return None
+        return (self.total_rows - self.rows) / speed
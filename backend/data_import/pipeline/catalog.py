@@ -1,3 +1,4 @@
+import importlib.util
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
@@ -190,6 +191,11 @@ class CoNLL(Format):
     accept_types = "text/*"
 
 
+class Parquet(Format):
+    name = "Parquet"
+    accept_types = ".parquet"
+
+
 class ImageFile(Format):
     name = "ImageFile"
     accept_types = "image/png, image/jpeg, image/bmp, image/gif"
@@ -231,6 +237,11 @@ class ArgNone(BaseModel):
     pass
 
 
+class ArgColumnOnly(BaseModel):
+    column_data: str = "text"
+    column_label: str = "label"
+
+
 @dataclass
 class Option:
     display_name: str
@@ -458,3 +469,15 @@ Options.register(
         file=SPEECH_TO_TEXT_DIR / "audio_files.txt",
     )
 )
+
+# Parquet needs pyarrow, the "parquet" extra, so it's only offered if the package is installed.
+# The examples show the rows as JSON, with the labels in nested list columns.
+if importlib.util.find_spec("pyarrow") is not None:
+    parquet_examples = [
+        (ProjectType.DOCUMENT_CLASSIFICATION, ArgColumnOnly, TEXT_CLASSIFICATION_DIR / "example.jsonl"),
+        (ProjectType.SEQUENCE_LABELING, ArgColumnOnly, SEQUENCE_LABELING_DIR / "example_parquet.jsonl"),
+        (ProjectType.SEQ2SEQ, ArgColumnOnly, SEQ2SEQ_DIR / "example.jsonl"),
+        (ProjectType.INTENT_DETECTION_AND_SLOT_FILLING, ArgNone, INTENT_DETECTION_DIR / "example_parquet.jsonl"),
+    ]
+    for task_id, arg, file in parquet_examples:
+        Options.register(Option(display_name=Parquet.name, task_id=task_id, file_format=Parquet, arg=arg, file=file))
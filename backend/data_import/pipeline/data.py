@@ -1,12 +1,22 @@
 import abc
+import hashlib
 from typing import Any, Dict
 
+import pandas as pd
 from pydantic import UUID4, BaseModel, validator
 
-from examples.models import Example
+from examples.models import Example, hash_text
 from projects.models import Project
 
 
+def hash_file(path: str, chunk_size: int = pow(1024, 2)) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class BaseData(BaseModel, abc.ABC):
     filename: str
     upload_name: str
@@ -20,6 +30,20 @@ class BaseData(BaseModel, abc.ABC):
     def parse(cls, example_uuid: UUID4, filename: str, upload_name: str, text: str = "", **kwargs):
         return cls(uuid=example_uuid, filename=filename, upload_name=upload_name, text=text, meta=kwargs)
 
+    @classmethod
+    def valid_texts(cls, texts: pd.Series) -> pd.Series:
+        """Return which texts are valid, checked column-wise. By default none is.
+
+        The examples of the valid texts are made by `make_example` without building this model.
+        """
+        return pd.Series(False, index=texts.index)
+
+    @staticmethod
+    def make_example(
+        project: Project, example_uuid: UUID4, filename: str, upload_name: str, text: str, meta: Dict[Any, Any]
+    ) -> Example:
+        raise NotImplementedError("Please implement this method in the subclass.")
+
     def __hash__(self):
         return hash(tuple(self.dict()))
 
@@ -38,14 +62,27 @@ class TextData(BaseData):
         else:
             raise ValueError("The empty text is not allowed.")
 
+    @classmethod
+    def valid_texts(cls, texts: pd.Series) -> pd.Series:
+        # Other types, e.g. bytes, are left to the validation of the model.
+        is_str = texts.map(type).eq(str)
+        return is_str & texts.where(is_str, "").str.len().gt(0)
+
     def create(self, project: Project) -> Example:
+        return self.make_example(project, self.uuid, self.filename, self.upload_name, self.text, self.meta)
+
+    @staticmethod
+    def make_example(
+        project: Project, example_uuid: UUID4, filename: str, upload_name: str, text: str, meta: Dict[Any, Any]
+    ) -> Example:
         return Example(
-            uuid=self.uuid,
+            uuid=example_uuid,
             project=project,
-            filename=self.filename,
-            upload_name=self.upload_name,
-            text=self.text,
-            meta=self.meta,
+            filename=filename,
+            upload_name=upload_name,
+            text=text,
+            content_hash=hash_text(text),
+            meta=meta,
         )
 
 
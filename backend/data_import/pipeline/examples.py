@@ -1,8 +1,15 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from pydantic import UUID4
 
+from .loaders import ModelLoader
 from examples.models import Example
+from projects.models import Project
+
+# How an import treats the examples whose content already exists in the project.
+DEDUP_SKIP = "skip"
+DEDUP_MERGE = "merge"
+DEDUP_MODES = (DEDUP_SKIP, DEDUP_MERGE)
 
 
 class Examples:
@@ -16,6 +23,44 @@ class Examples:
     def __contains__(self, uuid: UUID4) -> bool:
         return uuid in self.uuid_to_example
 
-    def save(self):
-        examples = Example.objects.bulk_create(self.examples)
+    def deduplicate(self, project: Project, mode: str = DEDUP_SKIP) -> int:
+        """Drop the examples whose content hash is already in the project or earlier in the batch.
+
+        The existing examples are looked up with a single query on the content hash index.
+        With `DEDUP_MERGE`, the metadata of a dropped example is merged into the example it duplicates.
+        The labels of the dropped examples aren't saved, because their examples aren't either.
+
+        Returns:
+            the number of dropped examples.
+        """
+        hashes = {example.content_hash for example in self.examples if example.content_hash}
+        if not hashes:
+            return 0
+        existing = Example.objects.filter(project=project, content_hash__in=hashes)
+        if mode == DEDUP_MERGE:
+            originals = {example.content_hash: example for example in existing.only("id", "content_hash", "meta")}
+        else:
+            originals = {content_hash: None for content_hash in existing.values_list("content_hash", flat=True)}
+        examples = []
+        merged: Dict[int, Example] = {}
+        for example in self.examples:
+            if not example.content_hash:
+                examples.append(example)
+            elif example.content_hash not in originals:
+                originals[example.content_hash] = example
+                examples.append(example)
+            elif mode == DEDUP_MERGE:
+                original = originals[example.content_hash]
+                original.meta = {**original.meta, **example.meta}
+                if original.pk is not None:
+                    merged[original.pk] = original
+        if merged:
+            Example.objects.bulk_update(list(merged.values()), ["meta"])
+        dropped = len(self.examples) - len(examples)
+        self.examples = examples
+        return dropped
+
+    def save(self, loader: Optional[ModelLoader] = None):
+        loader = loader or ModelLoader()
+        examples = loader.bulk_create(Example, self.examples)
         self.uuid_to_example = {example.uuid: example for example in examples}
@@ -8,6 +8,7 @@ from .catalog import (
     FastText,
     Format,
     ImageFile,
+    Parquet,
     TextFile,
     TextLine,
 )
@@ -19,6 +20,7 @@ from .parsers import (
     JSONLParser,
     JSONParser,
     LineParser,
+    ParquetParser,
     PlainParser,
     TextFileParser,
 )
@@ -34,6 +36,7 @@ def create_parser(file_format: Format, **kwargs):
         FastText.name: FastTextParser,
         Excel.name: ExcelParser,
         CoNLL.name: CoNLLParser,
+        Parquet.name: ParquetParser,
         ImageFile.name: PlainParser,
         AudioFile.name: PlainParser,
     }
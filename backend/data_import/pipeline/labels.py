@@ -1,10 +1,11 @@
 import abc
 from itertools import groupby
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from .examples import Examples
 from .label import Label
 from .label_types import LabelTypes
+from .loaders import ModelLoader
 from labels.models import Category as CategoryModel
 from labels.models import Label as LabelModel
 from labels.models import Relation as RelationModel
@@ -32,13 +33,14 @@ class Labels(abc.ABC):
         self.types.save(filtered_types)
         self.types.update(project)
 
-    def save(self, user, examples: Examples, **kwargs):
+    def save(self, user, examples: Examples, loader: Optional[ModelLoader] = None, **kwargs):
+        loader = loader or ModelLoader()
         labels = [
             label.create(user, examples[label.example_uuid], self.types, **kwargs)
             for label in self.labels
             if label.example_uuid in examples
         ]
-        self.label_model.objects.bulk_create(labels)
+        loader.bulk_create(self.label_model, labels)
 
 
 class Categories(Labels):
@@ -84,6 +86,6 @@ class Texts(Labels):
 class Relations(Labels):
     label_model = RelationModel
 
-    def save(self, user, examples: Examples, **kwargs):
+    def save(self, user, examples: Examples, loader: Optional[ModelLoader] = None, **kwargs):
         id_to_span = kwargs["spans"].id_to_span
-        super().save(user, examples, id_to_span=id_to_span)
+        super().save(user, examples, loader=loader, id_to_span=id_to_span)
@@ -1,12 +1,14 @@
-from typing import List, Optional, Type
+import heapq
+from typing import Dict, List, Optional, Tuple, Type
 
 import pandas as pd
 
-from .data import BaseData
+from .data import BaseData, hash_file
 from .exceptions import FileParseException
 from .label import Label
 from .readers import (
     DEFAULT_TEXT_COLUMN,
+    FILE_NAME_COLUMN,
     LINE_NUMBER_COLUMN,
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
@@ -22,13 +24,19 @@ class ExampleMaker:
         data_class: Type[BaseData],
         column_data: str = DEFAULT_TEXT_COLUMN,
         exclude_columns: Optional[List[str]] = None,
+        vectorized: bool = True,
     ):
         self.project = project
         self.data_class = data_class
         self.column_data = column_data
         self.exclude_columns = exclude_columns or []
+        self.vectorized = vectorized
         self._errors: List[FileParseException] = []
 
+    def __getstate__(self):
+        # A copy, e.g. sent to a worker process, collects the errors of its records only.
+        return {**self.__dict__, "_errors": []}
+
     def make(self, df: pd.DataFrame) -> List[Example]:
         if not self.check_column_existence(df):
             return []
@@ -37,14 +45,41 @@ class ExampleMaker:
         df_with_data_column = df.loc[:, ~df.columns.isin(self.exclude_columns)]
         df_with_data_column = df_with_data_column.dropna(subset=[self.column_data])
 
+        # The texts valid for sure are checked column-wise,
+        # the others are validated row by row to report their errors.
+        if self.vectorized:
+            valid = self.data_class.valid_texts(df_with_data_column[self.column_data])
+        else:
+            valid = pd.Series(False, index=df_with_data_column.index)
+        made = self.make_valid(df_with_data_column[valid])
+        parsed = self.parse(df_with_data_column[~valid])
+        # Keep the order of the file.
+        return [example for _, example in heapq.merge(made, parsed, key=lambda item: item[0])]
+
+    def make_valid(self, df: pd.DataFrame) -> List[Tuple[int, Example]]:
+        """Make the examples of the valid rows from the columns, without validating each row."""
+        reserved = {LINE_NUMBER_COLUMN, UUID_COLUMN, FILE_NAME_COLUMN, UPLOAD_NAME_COLUMN, self.column_data}
+        meta_columns = [column for column in df.columns if column not in reserved]
+        metas = df[meta_columns].to_dict(orient="records") if meta_columns else [{} for _ in range(len(df))]
+        rows = zip(
+            df[UUID_COLUMN].tolist(),
+            df[FILE_NAME_COLUMN].tolist(),
+            df[UPLOAD_NAME_COLUMN].tolist(),
+            df[self.column_data].tolist(),
+            metas,
+        )
+        make_example = self.data_class.make_example
+        return [(position, make_example(self.project, *row)) for position, row in zip(df.index.tolist(), rows)]
+
+    def parse(self, df: pd.DataFrame) -> List[Tuple[int, Example]]:
         examples = []
-        for row in df_with_data_column.to_dict(orient="records"):
+        for position, row in zip(df.index.tolist(), df.to_dict(orient="records")):
             line_num = row.pop(LINE_NUMBER_COLUMN, 0)
             row[DEFAULT_TEXT_COLUMN] = row.pop(self.column_data)  # Rename column for parsing
             try:
                 data = self.data_class.parse(**row)
                 example = data.create(self.project)
-                examples.append(example)
+                examples.append((position, example))
             except ValueError:
                 message = f"Invalid data in line {line_num}"
                 error = FileParseException(row[UPLOAD_NAME_COLUMN], line_num, message)
@@ -73,11 +108,18 @@ class ExampleMaker:
 
 
 class BinaryExampleMaker(ExampleMaker):
+    def __init__(self, project: Project, data_class: Type[BaseData], paths: Optional[Dict[str, str]] = None, **kwargs):
+        super().__init__(project, data_class, **kwargs)
+        # The paths of the files by their generated name, to hash their content.
+        self.paths = paths or {}
+
     def make(self, df: pd.DataFrame) -> List[Example]:
         examples = []
         for row in df.to_dict(orient="records"):
             data = self.data_class.parse(**row)
             example = data.create(self.project)
+            if example.filename in self.paths:
+                example.content_hash = hash_file(self.paths[example.filename])
             examples.append(example)
         return examples
 
@@ -88,6 +130,9 @@ class LabelMaker:
         self.label_class = label_class
         self._errors: List[FileParseException] = []
 
+    def __getstate__(self):
+        return {**self.__dict__, "_errors": []}
+
     def make(self, df: pd.DataFrame) -> List[Label]:
         if not self.check_column_existence(df):
             return []
@@ -96,9 +141,9 @@ class LabelMaker:
         df_label = df_label[[UUID_COLUMN, self.column]]
         df_label.dropna(subset=[self.column], inplace=True)
         labels = []
-        for row in df_label.to_dict(orient="records"):
+        for example_uuid, obj in zip(df_label[UUID_COLUMN].tolist(), df_label[self.column].tolist()):
             try:
-                label = self.label_class.parse(row[UUID_COLUMN], row[self.column])
+                label = self.label_class.parse(example_uuid, obj)
                 labels.append(label)
             except ValueError:
                 pass
@@ -1,10 +1,12 @@
+import codecs
 import csv
 import io
 import json
+import mmap
 import os
-from typing import Any, Dict, Iterator, List, Tuple
+import re
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 
-import chardet
 import pyexcel
 import pyexcel.exceptions
 from chardet import UniversalDetector
@@ -15,46 +17,68 @@ from .readers import (
     DEFAULT_LABEL_COLUMN,
     DEFAULT_TEXT_COLUMN,
     LINE_NUMBER_COLUMN,
+    FileRange,
     Parser,
 )
 
-DEFAULT_ENCODING = "Auto"
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+    pq = None
 
-def detect_encoding(filename: str, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> str:
-    """Detects character encoding automatically.
+DEFAULT_ENCODING = "Auto"
+# The number of characters of a JSON file read at once, and the most an element of a JSON array may have.
+JSON_CHUNK_SIZE = 64 * 1024
+MAX_JSON_ELEMENT_SIZE = 16 * 1024 * 1024
+WHITESPACE = re.compile(r"\s*")
+DELIMITER = re.compile(r"\s*([,\]])\s*")
+# The size of the head of a file sampled to detect its encoding.
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# The files in these encodings are read from a memory map, and their lines decoded one by one.
+MAPPED_ENCODINGS = {"ascii", "utf-8", "utf-8-sig"}
+# The mapped files are decoded in blocks of lines of about this size.
+MAPPED_BLOCK_SIZE = pow(1024, 2)
+# The size of the head of a file sampled to estimate its number of lines.
+ESTIMATE_SAMPLE_SIZE = pow(1024, 2)
+# The number of rows of a Parquet file converted to records at once.
+PARQUET_BATCH_SIZE = 1000
+
+
+def detect_encoding(filename: str, sample_size: int = ENCODING_SAMPLE_SIZE) -> str:
+    """Detects character encoding automatically from the head of the file.
 
     If you want to know the supported encodings, please see the following document:
     https://chardet.readthedocs.io/en/latest/supported-encodings.html
 
     Args:
         filename: the filename for detecting the encoding.
-        buffer_size: the buffer size to read file contents incrementally.
+        sample_size: the number of bytes sampled from the head of the file.
 
     Returns:
         The character encoding.
     """
-    # For a small file.
-    if os.path.getsize(filename) < buffer_size:
-        detected = chardet.detect(open(filename, "rb").read())
-        return detected.get("encoding", "utf-8")
-
-    # For a large file, call the Universal Encoding Detector incrementally.
-    # It will stop as soon as it is confident enough to report its results.
+    # Feed the detector incrementally, as it stops as soon as it's confident enough.
     # See: https://chardet.readthedocs.io/en/latest/usage.html
+    detector = UniversalDetector()
     with open(filename, "rb") as f:
-        detector = UniversalDetector()
-        while True:
-            binary = f.read(buffer_size)
-            detector.feed(binary)
-            if binary == b"":
+        while sample_size > 0 and not detector.done:
+            binary = f.read(min(io.DEFAULT_BUFFER_SIZE, sample_size))
+            if not binary:
                 break
-            if detector.done:
-                break
-        if detector.done:
-            return detector.result["encoding"] or "utf-8"
-        else:
-            return "utf-8"
+            detector.feed(binary)
+            sample_size -= len(binary)
+    encoding = detector.close()["encoding"] or "utf-8"
+    # The head may be ASCII while the rest of the file isn't, and UTF-8 is a superset of ASCII.
+    if encoding.lower() == "ascii":
+        return "utf-8"
+    return encoding
 
 
 def decide_encoding(filename: str, encoding: str) -> str:
@@ -76,24 +100,160 @@ def decide_encoding(filename: str, encoding: str) -> str:
         return encoding
 
 
+def is_ascii_compatible(encoding: str) -> bool:
+    """Whether a newline is encoded as the single byte 0x0A, so that a file can be split after that byte."""
+    try:
+        return "\n".encode(encoding) == b"\n"
+    except LookupError:
+        return False
+
+
+# orjson is a declared dependency; the standard library decoder remains as a fallback for installs without it.
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def is_mappable(encoding: str) -> bool:
+    """Whether a file in the encoding can be split into lines before decoding them."""
+    try:
+        return codecs.lookup(encoding).name in MAPPED_ENCODINGS
+    except LookupError:
+        return False
+
+
+def iter_mapped_blocks(data: mmap.mmap, start: int, end: int, block_size: int = MAPPED_BLOCK_SIZE) -> Iterator[bytes]:
+    """Yield data[start:end] in blocks of about `block_size` bytes, each ending with a line break."""
+    position = start
+    while position < end:
+        newline = data.find(b"\n", min(position + block_size, end) - 1, end)
+        stop = end if newline == -1 else newline + 1
+        yield data[position:stop]
+        position = stop
+
+
+def split_lines(block: bytes) -> List[bytes]:
+    """Split the block into lines like a file opened with universal newlines, without the line breaks."""
+    if b"\r" in block:
+        # A carriage return alone also ends a line.
+        block = block.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    lines = block.split(b"\n")
+    if block.endswith(b"\n"):
+        lines.pop()
+    return lines
+
+
 class LineReader:
     """LineReader is a helper class to read a file line by line.
 
+    Files in UTF-8 or ASCII are memory-mapped and decoded block by block,
+    so a range of the file is read without copying it as a whole.
+
     Attributes:
         filename: The filename to read.
         encoding: The character encoding.
+        file_range: The byte range to read. It defaults to the whole file.
     """
 
-    def __init__(self, filename: str, encoding: str = DEFAULT_ENCODING):
+    def __init__(self, filename: str, encoding: str = DEFAULT_ENCODING, file_range: Optional[FileRange] = None):
         self.filename = filename
         self.encoding = encoding
+        self.file_range = file_range
 
     def __iter__(self) -> Iterator[str]:
         encoding = decide_encoding(self.filename, self.encoding)
-        with open(self.filename, encoding=encoding) as f:
-            for line in f:
+        if is_mappable(encoding):
+            # The BOM is skipped by `map_blocks`, so it must not be stripped from every block.
+            decoding = "utf-8" if codecs.lookup(encoding).name == "utf-8-sig" else encoding
+            for block in self.map_blocks(encoding):
+                for line in io.StringIO(block.decode(decoding), newline=None):
+                    yield line.rstrip()
+        else:
+            for line in self.read_lines(encoding):
                 yield line.rstrip()
 
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yield the lines encoded in UTF-8, without trailing whitespaces."""
+        encoding = decide_encoding(self.filename, self.encoding)
+        if is_mappable(encoding):
+            for block in self.map_blocks(encoding):
+                for line in split_lines(block):
+                    yield line.rstrip()
+        else:
+            for line in self.read_lines(encoding):
+                yield line.rstrip().encode("utf-8")
+
+    def map_blocks(self, encoding: str) -> Iterator[bytes]:
+        file_range = self.file_range or FileRange()
+        with open(self.filename, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            if file_range.end is not None:
+                end = min(end, file_range.end)
+            if file_range.start >= end:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start = file_range.start
+                # Skip the BOM at the head of the file like the decoder does.
+                if start == 0 and codecs.lookup(encoding).name == "utf-8-sig" and data[:3] == codecs.BOM_UTF8:
+                    start = len(codecs.BOM_UTF8)
+                yield from iter_mapped_blocks(data, start, end, MAPPED_BLOCK_SIZE)
+
+    def read_lines(self, encoding: str) -> Iterator[str]:
+        if self.file_range is None:
+            with open(self.filename, encoding=encoding) as f:
+                yield from f
+            return
+        with open(self.filename, "rb") as f:
+            f.seek(self.file_range.start)
+            size = -1 if self.file_range.end is None else self.file_range.end - self.file_range.start
+            data = f.read(size)
+        yield from io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+
+
+class LineRangeMixin:
+    """Split a file parsed line by line into ranges of lines, to parse them in parallel."""
+
+    encoding: str
+
+    def parse_lines(self, filename: str, reader: LineReader) -> Iterator[Dict[Any, Any]]:
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
+        return self.parse_lines(filename, LineReader(filename, self.encoding))
+
+    def split(self, filename: str, chunk_size: int) -> List[FileRange]:
+        # Decide the encoding of the file once, so that the ranges don't detect it again.
+        encoding = decide_encoding(filename, self.encoding)
+        if not is_ascii_compatible(encoding) or os.path.getsize(filename) <= chunk_size:
+            return [FileRange(encoding=encoding)]
+        boundaries = [0]
+        with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while True:
+                newline = data.find(b"\n", boundaries[-1] + chunk_size)
+                if newline == -1 or newline + 1 >= len(data):
+                    break
+                boundaries.append(newline + 1)
+        ranges = [FileRange(start, end, encoding) for start, end in zip(boundaries, boundaries[1:])]
+        return ranges + [FileRange(boundaries[-1], encoding=encoding)]
+
+    def parse_range(self, filename: str, file_range: FileRange) -> Iterator[Dict[Any, Any]]:
+        reader = LineReader(filename, file_range.encoding or self.encoding, file_range)
+        return self.parse_lines(filename, reader)
+
+    def count_lines(self, filename: str, file_range: FileRange) -> int:
+        reader = LineReader(filename, file_range.encoding or self.encoding, file_range)
+        return sum(1 for _ in reader.iter_bytes())
+
+    def estimate_rows(self, filename: str) -> Optional[int]:
+        # Extrapolate the number of lines in the head of the file, without reading all of it.
+        if not is_ascii_compatible(decide_encoding(filename, self.encoding)):
+            return None
+        size = os.path.getsize(filename)
+        with open(filename, "rb") as f:
+            head = f.read(ESTIMATE_SAMPLE_SIZE)
+        if not head:
+            return 0
+        lines = head.count(b"\n") + (not head.endswith(b"\n"))
+        return round(lines * size / len(head))
+
 
 class PlainParser(Parser):
     """PlainParser is a parser simply returns a dictionary.
@@ -108,7 +268,7 @@ class PlainParser(Parser):
         yield {}
 
 
-class LineParser(Parser):
+class LineParser(LineRangeMixin, Parser):
     """LineParser is a parser to read a file line by line.
 
     Attributes:
@@ -118,8 +278,7 @@ class LineParser(Parser):
     def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
         self.encoding = encoding
 
-    def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
+    def parse_lines(self, filename: str, reader: LineReader) -> Iterator[Dict[Any, Any]]:
         for line_num, line in enumerate(reader, start=1):
             yield {DEFAULT_TEXT_COLUMN: line, LINE_NUMBER_COLUMN: line_num}
 
@@ -160,13 +319,163 @@ class CSVParser(Parser):
                 yield {LINE_NUMBER_COLUMN: line_num, **row}
 
 
+class JSONArrayStream:
+    """Iterate the elements of a JSON array in a text file, reading the file in chunks.
+
+    Only the current chunk and the current element are kept in memory.
+    A malformed element is skipped up to the next delimiter, so that the following elements are still read.
+
+    Attributes:
+        file: The text file to read.
+        chunk_size: The number of characters read at once.
+        max_element_size: The number of characters an element may have at most.
+        line: The line number of the current position.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = JSON_CHUNK_SIZE, max_element_size: int = MAX_JSON_ELEMENT_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_element_size = max_element_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.line = 1
+        self.eof = False
+
+    def read_more(self) -> bool:
+        """Append a chunk to the buffer, dropping the part before the position. False at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return not self.eof
+
+    def advance(self, end: int):
+        self.line += self.buffer.count("\n", self.position, end)
+        self.position = end
+
+    def next_token(self) -> Optional[str]:
+        """Skip whitespaces and return the next character, or None at the end of the file."""
+        while True:
+            self.advance(WHITESPACE.match(self.buffer, self.position).end())  # type: ignore
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_more():
+                return None
+
+    def scan_element(self) -> int:
+        """Find the end of the element at the position, reading more of the file if it continues past the buffer.
+
+        Returns:
+            The index of the delimiter after the element, or the end of the buffer at the end of the file.
+
+        Raises:
+            ValueError: if the element is larger than `max_element_size`.
+        """
+        depth = 0
+        in_string = escaped = False
+        i = self.position
+        while True:
+            if i >= len(self.buffer):
+                if i - self.position >= self.max_element_size:
+                    raise ValueError(f"An element is larger than {self.max_element_size} characters.")
+                offset = self.position
+                if not self.read_more():
+                    return len(self.buffer)
+                i -= offset
+            char = self.buffer[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            elif char in "]}" and depth > 0:
+                depth -= 1
+            elif char in ",]" and depth == 0:
+                return i
+            i += 1
+
+    def decode_element(self) -> Tuple[Any, Optional[str]]:
+        """Decode the element at the position and move past it. Returns the element, or the error message."""
+        try:
+            element, end = self.decoder.raw_decode(self.buffer, self.position)
+            # An element is complete only if something follows it, otherwise it may continue in the next chunk.
+            if end < len(self.buffer) or self.eof:
+                self.advance(end)
+                return element, None
+        except json.JSONDecodeError:
+            pass
+        end = self.scan_element()
+        try:
+            element, stop = self.decoder.raw_decode(self.buffer[:end], self.position)
+            if self.buffer[stop:end].strip():
+                raise json.JSONDecodeError("Extra data", self.buffer[:end], stop)
+            self.advance(end)
+            return element, None
+        except json.JSONDecodeError as e:
+            self.advance(end)
+            return None, e.msg
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Any, Optional[str]]]:
+        """Yield the index, the line number, and the element or the error message of each element.
+
+        Raises:
+            ValueError: if the file is not a JSON array.
+        """
+        if self.next_token() != "[":
+            raise ValueError("The file is not a JSON array.")
+        self.advance(self.position + 1)
+        if self.next_token() == "]":
+            self.advance(self.position + 1)
+            self.expect_end()
+            return
+        index = 0
+        while True:
+            if self.next_token() is None:
+                raise ValueError("Unexpected end of the file.")
+            line = self.line
+            element, error = self.decode_element()
+            yield index, line, element, error
+            # Usually the delimiter and the next element follow in the buffer, which a single match finds.
+            match = DELIMITER.match(self.buffer, self.position)
+            if match is not None and match.end() < len(self.buffer):
+                self.advance(match.end())
+                token = match.group(1)
+            else:
+                token = self.next_token()
+                self.advance(self.position + 1)
+            if token == "]":
+                self.expect_end()
+                return
+            if token != ",":
+                raise ValueError("Expecting ',' delimiter." if token else "Unexpected end of the file.")
+            index += 1
+
+    def expect_end(self):
+        if self.next_token() is not None:
+            raise ValueError("Extra data after the end of the array.")
+
+
 class JSONParser(Parser):
     """JSONParser is a parser to read a json file and return its rows.
 
+    The array is streamed element by element, so the file is never loaded at once.
+    Parsing it in a worker would send all of its records back at once, so it's parsed in the calling process.
+
     Attributes:
         encoding: The character encoding.
     """
 
+    parallel = False
+
     def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
         self.encoding = encoding
         self._errors: List[FileParseException] = []
@@ -174,12 +483,18 @@ class JSONParser(Parser):
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
         encoding = decide_encoding(filename, self.encoding)
         with open(filename, encoding=encoding) as f:
+            stream = JSONArrayStream(f)
             try:
-                rows = json.load(f)
-                for row in rows:
-                    yield row
-            except json.decoder.JSONDecodeError as e:
-                error = FileParseException(filename, line_num=1, message=str(e))
+                for index, line_num, row, message in stream:
+                    if message is None and not isinstance(row, dict):
+                        message = "The element must be an object."
+                    if message is not None:
+                        error = FileParseException(filename, line_num, f"Element {index}: {message}")
+                        self._errors.append(error)
+                        continue
+                    yield {LINE_NUMBER_COLUMN: line_num, **row}
+            except ValueError as e:
+                error = FileParseException(filename, line_num=stream.line, message=str(e))
                 self._errors.append(error)
 
     @property
@@ -187,7 +502,7 @@ class JSONParser(Parser):
         return self._errors
 
 
-class JSONLParser(Parser):
+class JSONLParser(LineRangeMixin, Parser):
     """JSONLParser is a parser to read a JSONL file and return its rows.
 
     Attributes:
@@ -198,11 +513,11 @@ class JSONLParser(Parser):
         self.encoding = encoding
         self._errors: List[FileParseException] = []
 
-    def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
+    def parse_lines(self, filename: str, reader: LineReader) -> Iterator[Dict[Any, Any]]:
+        # The lines are decoded by the JSON decoder, which is faster than decoding them to strings first.
+        for line_num, line in enumerate(reader.iter_bytes(), start=1):
             try:
-                row = json.loads(line)
+                row = json_loads(line)
                 yield {LINE_NUMBER_COLUMN: line_num, **row}
             except json.decoder.JSONDecodeError as e:
                 error = FileParseException(filename, line_num, str(e))
@@ -233,7 +548,91 @@ class ExcelParser(Parser):
         return self._errors
 
 
-class FastTextParser(Parser):
+class ParquetParser(Parser):
+    """ParquetParser is a parser to read a Parquet file and return its rows.
+
+    The file is read in batches of rows, row group by row group, so it's never loaded at once.
+    The ranges of the file are ranges of row groups, so that a large file is parsed in parallel.
+    The line numbers are the row numbers, and the nested columns are read as lists and dictionaries.
+
+    Attributes:
+        batch_size: the number of rows converted to records at once.
+    """
+
+    def __init__(self, batch_size: int = PARQUET_BATCH_SIZE, **kwargs):
+        self.batch_size = batch_size
+        self._errors: List[FileParseException] = []
+
+    def open(self, filename: str) -> Optional["pq.ParquetFile"]:
+        if pq is None:
+            self._errors.append(
+                FileParseException(
+                    filename, line_num=1, message="pyarrow is required to read Parquet. Install doccano[parquet]."
+                )
+            )
+            return None
+        try:
+            return pq.ParquetFile(filename)
+        except (OSError, pyarrow.ArrowException) as e:
+            self._errors.append(FileParseException(filename, line_num=1, message=str(e)))
+            return None
+
+    def split(self, filename: str, chunk_size: int) -> List[FileRange]:
+        """Split the file into ranges of row groups of about `chunk_size` bytes."""
+        if pq is None:
+            return [FileRange()]
+        try:
+            metadata = pq.read_metadata(filename)
+        except (OSError, pyarrow.ArrowException):
+            return [FileRange()]
+        ranges = []
+        start, size = 0, 0
+        for index in range(metadata.num_row_groups):
+            size += metadata.row_group(index).total_byte_size
+            if size >= chunk_size:
+                ranges.append(FileRange(start, index + 1))
+                start, size = index + 1, 0
+        if start < metadata.num_row_groups or not ranges:
+            ranges.append(FileRange(start, None))
+        return ranges
+
+    def parse_range(self, filename: str, file_range: FileRange) -> Iterator[Dict[Any, Any]]:
+        """Parse the row groups from `file_range.start` to `file_range.end`, excluded."""
+        parquet_file = self.open(filename)
+        if parquet_file is None:
+            return
+        end = parquet_file.num_row_groups if file_range.end is None else file_range.end
+        row_groups = list(range(file_range.start, end))
+        if not row_groups:
+            return
+        line_num = 0
+        for batch in parquet_file.iter_batches(batch_size=self.batch_size, row_groups=row_groups):
+            for row in batch.to_pylist():
+                line_num += 1
+                yield {LINE_NUMBER_COLUMN: line_num, **row}
+
+    def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
+        return self.parse_range(filename, FileRange())
+
+    def count_lines(self, filename: str, file_range: FileRange) -> int:
+        metadata = pq.read_metadata(filename)
+        end = metadata.num_row_groups if file_range.end is None else file_range.end
+        return sum(metadata.row_group(index).num_rows for index in range(file_range.start, end))
+
+    def estimate_rows(self, filename: str) -> Optional[int]:
+        if pq is None:
+            return None
+        try:
+            return pq.read_metadata(filename).num_rows
+        except (OSError, pyarrow.ArrowException):
+            return None
+
+    @property
+    def errors(self) -> List[FileParseException]:
+        return self._errors
+
+
+class FastTextParser(LineRangeMixin, Parser):
     """FastTextParser is a parser to read a fastText format and returns a text and labels.
 
     The example format is as follows:
@@ -250,8 +649,7 @@ class FastTextParser(Parser):
         self.encoding = encoding
         self.label = label
 
-    def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
+    def parse_lines(self, filename: str, reader: LineReader) -> Iterator[Dict[Any, Any]]:
         for line_num, line in enumerate(reader, start=1):
             labels = []
             tokens = []
@@ -1,9 +1,15 @@
 import abc
+import collections
 import collections.abc
 import dataclasses
+import multiprocessing
+import os
 import uuid
-from typing import Any, Dict, Iterator, List
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import billiard
 import pandas as pd
 
 from .exceptions import FileParseException
@@ -15,6 +21,9 @@ UPLOAD_NAME_COLUMN = "upload_name"
 UUID_COLUMN = "example_uuid"
 LINE_NUMBER_COLUMN = "#line_number"
 
+# Namespace of the example UUIDs, which are derived from the file and the record number.
+EXAMPLE_UUID_NAMESPACE = uuid.UUID("0d1a5b0e-4c1f-4b8e-9a7c-2f6d3e8b5c41")
+
 
 class BaseReader(collections.abc.Iterable):
     """Reader has a role to parse files and return a Record iterator."""
@@ -38,14 +47,48 @@ class BaseReader(collections.abc.Iterable):
         raise NotImplementedError("Please implement this method in the subclass.")
 
 
+@dataclasses.dataclass
+class FileRange:
+    """A range of a file, in bytes unless the parser splits it otherwise. `end` is None for the end of the file.
+
+    `encoding` is the encoding of the file if the parser detected it when splitting, so that it's decided once.
+    """
+
+    start: int = 0
+    end: Optional[int] = None
+    encoding: Optional[str] = None
+
+
 class Parser(abc.ABC):
-    """The abstract file parser."""
+    """The abstract file parser.
+
+    Attributes:
+        parallel: whether the files can be parsed in worker processes by `ParallelReader`.
+    """
+
+    parallel = True
 
     @abc.abstractmethod
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
         """Parses the file and returns the dictionary."""
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    def split(self, filename: str, chunk_size: int) -> List[FileRange]:
+        """Splits the file into ranges which can be parsed separately. By default, the file can't be split."""
+        return [FileRange()]
+
+    def parse_range(self, filename: str, file_range: FileRange) -> Iterator[Dict[Any, Any]]:
+        """Parses a range returned by `split`. The line numbers are relative to the start of the range."""
+        return self.parse(filename)
+
+    def count_lines(self, filename: str, file_range: FileRange) -> int:
+        """Returns the number of lines in the range, to offset the line numbers of the next range."""
+        return 0
+
+    def estimate_rows(self, filename: str) -> Optional[int]:
+        """Estimates the number of records in the file, to report the progress. None if it's unknown."""
+        return None
+
     @property
     def errors(self) -> List[FileParseException]:
         """Returns parsing errors."""
@@ -59,21 +102,112 @@ class FileName:
     upload_name: str
 
 
+@dataclasses.dataclass
+class Checkpoint:
+    """The progress of an import in a file.
+
+    `offset` is the number of records of the file already saved, by the batch number `batch`.
+    `line` is the line number of the last saved record, if the parser numbers them.
+    `done` is set once all the records of the file are saved.
+    """
+
+    offset: int = 0
+    batch: int = 0
+    done: bool = False
+    line: int = 0
+
+
+def example_uuid(filename: FileName, index: int) -> uuid.UUID:
+    """Return the UUID of the example made from the index-th record of the file.
+
+    The generated name of an upload contains its upload id,
+    so importing the same upload again yields the same UUIDs.
+    The name-based UUID is stamped as version 4, which the pipeline validates.
+    """
+    name_based = uuid.uuid5(EXAMPLE_UUID_NAMESPACE, f"{filename.generated_name}:{index}")
+    return uuid.UUID(bytes=name_based.bytes, version=4)
+
+
 class Reader(BaseReader):
     def __init__(self, filenames: List[FileName], parser: Parser):
         self.filenames = filenames
         self.parser = parser
+        self.checkpoints: Dict[str, Checkpoint] = {}
+        # The line of the last record saved before resuming, by the path of each file.
+        self.resumed_lines: Dict[str, int] = {}
+
+    def resume(self, checkpoints: Dict[str, Checkpoint]):
+        """Resume after the records saved before, without reporting the parse errors of their lines again."""
+        self.checkpoints = checkpoints
+        self.resumed_lines = {
+            filename.full_path: self.checkpoint_of(filename).line
+            for filename in self.filenames
+            if not self.checkpoint_of(filename).done
+        }
+
+    def checkpoint_of(self, filename: FileName) -> Checkpoint:
+        return self.checkpoints.get(filename.generated_name, Checkpoint())
+
+    def pending_files(self) -> List[FileName]:
+        """Return the files which are not completely saved yet."""
+        return [filename for filename in self.filenames if not self.checkpoint_of(filename).done]
+
+    def make_records(self, filename: FileName, rows: Iterable[Dict[Any, Any]], start: int = 0):
+        """Yield the records of the rows, skipping the ones saved before the checkpoint."""
+        offset = self.checkpoint_of(filename).offset
+        for index, row in enumerate(rows, start=start):
+            if index < offset:
+                continue
+            yield {
+                UUID_COLUMN: example_uuid(filename, index),
+                FILE_NAME_COLUMN: filename.generated_name,
+                UPLOAD_NAME_COLUMN: filename.upload_name,
+                **row,
+            }
 
     def __iter__(self) -> Iterator[Dict[Any, Any]]:
-        for filename in self.filenames:
-            rows = self.parser.parse(filename.full_path)
-            for row in rows:
-                yield {
-                    UUID_COLUMN: uuid.uuid4(),
-                    FILE_NAME_COLUMN: filename.generated_name,
-                    UPLOAD_NAME_COLUMN: filename.upload_name,
-                    **row,
-                }
+        for filename in self.pending_files():
+            yield from self.make_records(filename, self.parser.parse(filename.full_path))
+
+    def checkpoint(self, records: pd.DataFrame, batch: int) -> Dict[str, Checkpoint]:
+        """Record that the batch of records is saved, and return the updated checkpoints.
+
+        The files are read in order, so the files before the last one in the batch are done.
+        """
+        counts = records[FILE_NAME_COLUMN].value_counts()
+        lines = records.groupby(FILE_NAME_COLUMN)[LINE_NUMBER_COLUMN].max() if LINE_NUMBER_COLUMN in records else {}
+        for name, count in counts.items():
+            checkpoint = self.checkpoints.setdefault(name, Checkpoint())
+            checkpoint.offset += int(count)
+            checkpoint.batch = batch
+            line = lines.get(name)
+            if line is not None and pd.notna(line):
+                checkpoint.line = int(line)
+        names = [filename.generated_name for filename in self.filenames]
+        last = max(names.index(name) for name in counts.index)
+        for name in names[:last]:
+            self.checkpoints.setdefault(name, Checkpoint()).done = True
+        return self.checkpoints
+
+    def estimate_rows(self) -> Optional[int]:
+        """Estimate the number of records not saved yet, or return None if the parser can't estimate them."""
+        total = 0
+        for filename in self.pending_files():
+            rows = self.parser.estimate_rows(filename.full_path)
+            if rows is None:
+                return None
+            total += max(rows - self.checkpoint_of(filename).offset, 0)
+        return total
+
+    @contextmanager
+    def pool(self) -> Iterator[Optional[Executor]]:
+        """Open the worker processes used by `map` while in the context. `Reader` has none."""
+        yield None
+
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        """Yield each item with the result of the function on it, in the order of the items."""
+        for item in items:
+            yield item, function(item)
 
     def batch(self, batch_size: int) -> Iterator[pd.DataFrame]:
         batch = []
@@ -87,4 +221,139 @@ class Reader(BaseReader):
 
     @property
     def errors(self) -> List[FileParseException]:
-        return self.parser.errors
+        return self.drop_resumed_errors(self.parser.errors)
+
+    def drop_resumed_errors(self, errors: List[FileParseException]) -> List[FileParseException]:
+        """Drop the errors of the lines before the last record saved before resuming, as the lines are parsed again."""
+        return [error for error in errors if error.line_num > self.resumed_lines.get(error.filename, 0)]
+
+    def clear_errors(self):
+        self.parser.errors.clear()
+
+
+def create_executor(workers: int) -> Executor:
+    """Start a pool of worker processes.
+
+    A daemonic process, e.g. a prefork Celery worker, can't start the processes of multiprocessing,
+    so the processes of billiard, the fork of multiprocessing made by Celery, are started from it instead.
+    """
+    context = billiard.get_context() if multiprocessing.current_process().daemon else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def parse_file_range(
+    parser: Parser, filename: str, file_range: FileRange
+) -> Tuple[List[Dict[Any, Any]], List[FileParseException], int]:
+    """Parse a range of a file in a worker process. The range is at most the chunk size, so it fits in memory."""
+    records = list(parser.parse_range(filename, file_range))
+    return records, parser.errors, parser.count_lines(filename, file_range)
+
+
+class ParallelReader(Reader):
+    """Reader parsing the ranges of large files in worker processes.
+
+    The records are yielded in the order of the files, with the line numbers counted from the start of each file.
+    The workers are also used by `map`, e.g. to make the examples of the batches of records while in `pool`.
+
+    A worker returns the records of its range at once, so only the ranges of at most `chunk_size` bytes are
+    parsed in the workers, and only `workers + 1` of them at a time. The files which can't be split that small,
+    e.g. CSV files, are streamed in the calling process instead.
+    """
+
+    def __init__(self, filenames: List[FileName], parser: Parser, workers: int, chunk_size: int):
+        super().__init__(filenames, parser)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._errors: List[FileParseException] = []
+        self._executor: Optional[Executor] = None
+
+    def tasks(self) -> List[Tuple[FileName, Optional[FileRange]]]:
+        """The ranges of the pending files to parse in a worker, or None for a file to stream in this process."""
+        tasks: List[Tuple[FileName, Optional[FileRange]]] = []
+        for filename in self.pending_files():
+            ranges = self.parser.split(filename.full_path, self.chunk_size)
+            if len(ranges) > 1 or os.path.getsize(filename.full_path) <= self.chunk_size:
+                tasks.extend((filename, file_range) for file_range in ranges)
+            else:
+                tasks.append((filename, None))
+        return tasks
+
+    @contextmanager
+    def pool(self) -> Iterator[Optional[Executor]]:
+        if self.workers <= 1 or self._executor is not None:
+            yield self._executor
+            return
+        with create_executor(self.workers) as executor:
+            self._executor = executor
+            try:
+                yield executor
+            finally:
+                self._executor = None
+
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        if self._executor is None:
+            yield from super().map(function, items)
+            return
+        # Submit a few items ahead only, so that the results don't pile up in memory.
+        pending: collections.deque = collections.deque()
+        for item in items:
+            pending.append((item, self._executor.submit(function, item)))
+            if len(pending) > self.workers:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+    def __iter__(self) -> Iterator[Dict[Any, Any]]:
+        if self.workers <= 1 or not self.parser.parallel:
+            yield from super().__iter__()
+            return
+        tasks = self.tasks()
+        if sum(file_range is not None for _, file_range in tasks) <= 1:
+            yield from super().__iter__()
+            return
+
+        with self.pool() as executor:
+            yield from self.parse_ranges(executor, tasks)
+
+    def parse_ranges(
+        self, executor: Executor, tasks: List[Tuple[FileName, Optional[FileRange]]]
+    ) -> Iterator[Dict[Any, Any]]:
+        # Submit a few ranges ahead only, so that the parsed records don't pile up in memory.
+        results: Dict[int, Future] = {}
+        submitted = 0
+        line_offset = 0
+        record_offset = 0
+        previous = None
+        for index, (filename, file_range) in enumerate(tasks):
+            while submitted < len(tasks) and len(results) <= self.workers:
+                path, submitted_range = tasks[submitted][0].full_path, tasks[submitted][1]
+                if submitted_range is not None:
+                    results[submitted] = executor.submit(parse_file_range, self.parser, path, submitted_range)
+                submitted += 1
+            if file_range is None:
+                yield from self.make_records(filename, self.parser.parse(filename.full_path))
+                continue
+            if filename is not previous:
+                line_offset = 0
+                record_offset = 0
+                previous = filename
+            records, errors, line_count = results.pop(index).result()
+            for error in errors:
+                error.line_num += line_offset
+                self._errors.append(error)
+            for row in records:
+                if LINE_NUMBER_COLUMN in row:
+                    row[LINE_NUMBER_COLUMN] += line_offset
+            yield from self.make_records(filename, records, start=record_offset)
+            line_offset += line_count
+            record_offset += len(records)
+
+    @property
+    def errors(self) -> List[FileParseException]:
+        return self.drop_resumed_errors(self.parser.errors + self._errors)
+
+    def clear_errors(self):
+        super().clear_errors()
+        self._errors.clear()
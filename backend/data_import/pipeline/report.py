@@ -0,0 +1,77 @@
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Set, Type
+
+from .exceptions import FileParseException
+from .labels import Labels
+from label_types.models import LabelType
+from projects.models import Project
+
+NUMBER = re.compile(r"\d+")
+
+
+def error_type(error: FileParseException) -> str:
+    """The message of the error with its numbers masked, to group the errors of different rows."""
+    return NUMBER.sub("N", error.message)
+
+
+class DryRunReport:
+    """Statistics of a dataset checked without saving it.
+
+    Only counters and the names of the new label types are kept, so the memory doesn't grow with the file.
+    """
+
+    def __init__(self, project: Project, sample: Optional[float] = None):
+        self.project = project
+        self.sample = sample
+        self.rows = 0
+        self.checked_rows = 0
+        self.examples = 0
+        self.labels: Dict[str, Counter] = defaultdict(Counter)
+        self.new_types: Dict[str, Set[str]] = defaultdict(set)
+        self.existing_types: Dict[Type[LabelType], Set[str]] = {}
+        self.errors: Counter = Counter()
+        self.started_at = time.perf_counter()
+
+    def add_examples(self, rows: int, checked_rows: int, examples: int):
+        self.rows += rows
+        self.checked_rows += checked_rows
+        self.examples += examples
+
+    def add_labels(self, labels: Labels, example_uuids: Set):
+        """Clean the labels like an import does, and count the labels saved with the examples and the dropped ones."""
+        name = type(labels).__name__.lower()
+        before = len(labels)
+        labels.clean(self.project)
+        self.labels[name]["dropped"] += before - len(labels)
+        self.labels[name]["labels"] += sum(label.example_uuid in example_uuids for label in labels.labels)
+        for label in labels.labels:
+            label_type = label.create_type(self.project)
+            if label_type is not None and label_type.text not in self.get_existing_types(type(label_type)):
+                self.new_types[name].add(label_type.text)
+
+    def get_existing_types(self, model: Type[LabelType]) -> Set[str]:
+        if model not in self.existing_types:
+            texts = model.objects.filter(project=self.project).values_list("text", flat=True)
+            self.existing_types[model] = set(texts)
+        return self.existing_types[model]
+
+    def add_errors(self, errors: List[FileParseException]):
+        self.errors.update(error_type(error) for error in errors)
+
+    def dict(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "rows": self.rows,
+            "checked_rows": self.checked_rows,
+            "sample": self.sample,
+            "examples": self.examples,
+            "failed_rows": self.checked_rows - self.examples,
+            "labels": {
+                name: {**counts, "new_types": sorted(self.new_types[name])} for name, counts in self.labels.items()
+            },
+            "errors": dict(self.errors.most_common()),
+            "elapsed": elapsed,
+            "rows_per_second": self.rows / elapsed if elapsed > 0 else None,
+        }
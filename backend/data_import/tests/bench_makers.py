@@ -0,0 +1,63 @@
+"""Throughput of the example maker, with and without the column-wise validation.
+
+It isn't collected by the test runner. Run it explicitly:
+
+    python manage.py test data_import.tests.bench_makers
+"""
+import time
+import uuid
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from data_import.pipeline.data import TextData
+from data_import.pipeline.makers import ExampleMaker
+from data_import.pipeline.readers import (
+    FILE_NAME_COLUMN,
+    LINE_NUMBER_COLUMN,
+    UPLOAD_NAME_COLUMN,
+    UUID_COLUMN,
+)
+from projects.models import Project
+
+ROWS = 50_000
+REPEAT = 3
+BATCH_SIZE = 1000
+
+
+def make_batches():
+    records = [
+        {
+            LINE_NUMBER_COLUMN: i + 1,
+            UUID_COLUMN: uuid.uuid4(),
+            FILE_NAME_COLUMN: "file.jsonl",
+            UPLOAD_NAME_COLUMN: "file.jsonl",
+            "text": f"Text of the example {i}",
+            "label": [[0, 4, "A"], {"start_offset": 5, "end_offset": 7, "label": "B"}],
+        }
+        for i in range(ROWS)
+    ]
+    return [pd.DataFrame(records[i : i + BATCH_SIZE]) for i in range(0, ROWS, BATCH_SIZE)]
+
+
+class BenchmarkMakers(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.batches = make_batches()
+
+    def measure(self, make) -> float:
+        """Return the best throughput of a few runs, in rows per second."""
+        best = 0.0
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            for batch in self.batches:
+                make(batch)
+            best = max(best, ROWS / (time.perf_counter() - start))
+        return best
+
+    def test_throughput(self):
+        project = Project(id=1)
+        for vectorized in [False, True]:
+            maker = ExampleMaker(project, TextData, exclude_columns=["label"], vectorized=vectorized)
+            print(f"\nvectorized={vectorized}: {self.measure(maker.make):,.0f} rows/s")
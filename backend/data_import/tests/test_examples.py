@@ -2,7 +2,8 @@ import uuid
 
 from django.test import TestCase
 
-from data_import.pipeline.examples import Examples
+from data_import.pipeline.data import hash_text
+from data_import.pipeline.examples import DEDUP_MERGE, Examples
 from examples.models import Example
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
@@ -23,3 +24,40 @@ class TestExamples(TestCase):
         self.examples.save()
         example = self.examples[self.example_uuid]
         self.assertEqual(example.uuid, self.example_uuid)
+
+
+class TestDeduplicateExamples(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.existing = Example.objects.create(
+            text="A", content_hash=hash_text("A"), meta={"a": 1}, project=self.project.item
+        )
+
+    def make_examples(self, *texts):
+        return Examples(
+            [
+                Example(
+                    uuid=uuid.uuid4(), text=text, content_hash=hash_text(text), meta={"b": 2}, project=self.project.item
+                )
+                for text in texts
+            ]
+        )
+
+    def test_skip_existing_and_repeated_examples(self):
+        examples = self.make_examples("A", "B", "B")
+        self.assertEqual(examples.deduplicate(self.project.item), 2)
+        examples.save()
+        self.assertEqual(sorted(Example.objects.values_list("text", flat=True)), ["A", "B"])
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.meta, {"a": 1})
+
+    def test_merge_meta_into_existing_example(self):
+        examples = self.make_examples("A")
+        self.assertEqual(examples.deduplicate(self.project.item, DEDUP_MERGE), 1)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.meta, {"a": 1, "b": 2})
+
+    def test_ignore_other_projects(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        examples = self.make_examples("A")
+        self.assertEqual(examples.deduplicate(project.item), 0)
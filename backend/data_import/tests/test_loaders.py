@@ -0,0 +1,99 @@
+import json
+import unittest
+import uuid
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from model_mommy import mommy
+
+from data_import.pipeline.loaders import (
+    CopyLoader,
+    ModelLoader,
+    create_loader,
+    encode_row,
+    encode_value,
+)
+from examples.models import Example
+from labels.models import Span
+from metrics.models import ProjectProgress, SpanTypeCount, ThroughputBucket
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestEncodeRow(TestCase):
+    def test_escape_special_characters(self):
+        self.assertEqual(encode_value("a\tb\nc\\d\re"), "a\\tb\\nc\\\\d\\re")
+
+    def test_encode_null(self):
+        self.assertEqual(encode_value(None), "\\N")
+
+    def test_encode_example(self):
+        project = mommy.make("Project")
+        example = Example(id=1, uuid=uuid.uuid4(), project=project, text="a\tb", meta={"k": "v"}, upload_name="f")
+        fields = [Example._meta.get_field(name) for name in ["id", "uuid", "meta", "text", "project"]]
+        row = encode_row(example, fields, connection).rstrip("\n").split("\t")
+        self.assertEqual(row[0], "1")
+        self.assertEqual(uuid.UUID(row[1]), example.uuid)
+        self.assertEqual(json.loads(row[2]), {"k": "v"})
+        self.assertEqual(row[3], "a\\tb")
+        self.assertEqual(row[4], str(project.id))
+
+
+class TestCreateLoader(TestCase):
+    @unittest.skipIf(connection.vendor == "postgresql", "PostgreSQL uses COPY")
+    def test_fall_back_to_orm(self):
+        self.assertIs(type(create_loader()), ModelLoader)
+
+    @override_settings(IMPORT_USE_COPY=False)
+    def test_disable_copy(self):
+        self.assertIs(type(create_loader()), ModelLoader)
+
+
+class TestModelLoader(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        self.loader = ModelLoader()
+
+    def test_bulk_create_counts(self):
+        ProjectProgress.objects.rebuild(self.project.item.id)
+        examples = [Example(project=self.project.item, text=f"text {i}") for i in range(3)]
+        examples = self.loader.bulk_create(Example, examples)
+        self.assertTrue(all(example.pk for example in examples))
+        self.assertEqual(ProjectProgress.objects.get(project=self.project.item).total, 3)
+
+        label_type = mommy.make("SpanType", project=self.project.item)
+        spans = [
+            Span(example=example, user=self.project.admin, label=label_type, start_offset=0, end_offset=1)
+            for example in examples
+        ]
+        self.loader.bulk_create(Span, spans)
+        label_type.refresh_from_db()
+        self.assertEqual(label_type.usage_count, 3)
+        self.assertEqual(SpanTypeCount.objects.get(label_type=label_type, user=self.project.admin).count, 3)
+        buckets = ThroughputBucket.objects.filter(project=self.project.item, user=self.project.admin)
+        self.assertTrue(buckets.exists())
+        self.assertTrue(all(bucket.labels == 3 for bucket in buckets))
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "COPY requires PostgreSQL")
+class TestCopyLoader(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        self.loader = CopyLoader()
+
+    def test_bulk_create(self):
+        examples = [Example(project=self.project.item, text=f"text\t{i}", meta={"i": i}) for i in range(3)]
+        examples = self.loader.bulk_create(Example, examples)
+        for example in examples:
+            saved = Example.objects.get(pk=example.pk)
+            self.assertEqual((saved.uuid, saved.text, saved.meta), (example.uuid, example.text, example.meta))
+
+        label_type = mommy.make("SpanType", project=self.project.item)
+        spans = [
+            Span(example=example, user=self.project.admin, label=label_type, start_offset=0, end_offset=1)
+            for example in examples
+        ]
+        self.loader.bulk_create(Span, spans)
+        self.assertEqual(Span.objects.filter(label=label_type).count(), 3)
+        label_type.refresh_from_db()
+        self.assertEqual(label_type.usage_count, 3)
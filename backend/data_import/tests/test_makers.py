@@ -49,6 +49,22 @@ class TestExamplesMaker(TestCase):
         self.assertEqual(len(examples), 0)
         self.assertEqual(len(self.maker.errors), 1)
 
+    def test_non_string_text_reports_line_number(self):
+        self.record[self.text_column] = 1
+        df = pd.DataFrame([self.record])
+        examples = self.maker.make(df)
+        self.assertEqual(len(examples), 0)
+        self.assertEqual(self.maker.errors[0].line_num, 1)
+
+    def test_vectorized_examples_are_same_as_parsed_ones(self):
+        records = [{**self.record, UUID_COLUMN: uuid.uuid4(), self.text_column: text} for text in ["a", "", b"b", "c"]]
+        df = pd.DataFrame(records)
+        maker = ExampleMaker(self.project.item, TextData, self.text_column, [self.label_column], vectorized=False)
+        expected = [(example.text, example.meta) for example in maker.make(df)]
+        actual = [(example.text, example.meta) for example in self.maker.make(df)]
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(self.maker.errors), len(maker.errors))
+
 
 class TestLabelFormatter(TestCase):
     def setUp(self):
@@ -1,8 +1,11 @@
+import codecs
+import io
 import json
 import os
 import shutil
 import tempfile
 import unittest
+from unittest.mock import patch
 
 from data_import.pipeline import parsers
 from data_import.pipeline.readers import LINE_NUMBER_COLUMN
@@ -82,6 +85,54 @@ class TestJSONParser(TestParser):
         expected = json.loads(content)
         self.assert_record(content, parser, expected)
 
+    def test_skip_malformed_elements(self):
+        content = '[\n{"text": "a"},\n{"text": "b",},\n["c"],\n{"text": "d [\\"]"}\n]'
+        parser = parsers.JSONParser()
+        self.assert_record(content, parser, [{"text": "a"}, {"text": 'd ["]'}])
+        errors = [(error.line_num, error.message.split(":")[0]) for error in parser.errors]
+        self.assertEqual(errors, [(3, "Element 1"), (4, "Element 2")])
+
+    def test_report_file_which_is_not_array(self):
+        parser = parsers.JSONParser()
+        self.assert_record('{"text": "a"}', parser, [])
+        self.assertEqual(len(parser.errors), 1)
+
+
+class TestJSONArrayStream(unittest.TestCase):
+    def stream(self, content, chunk_size=3):
+        return list(parsers.JSONArrayStream(io.StringIO(content), chunk_size=chunk_size))
+
+    def test_read_elements_across_chunks(self):
+        elements = [{"text": "long text, with [brackets]"}, 1234567, "string", None, [1, [2]]]
+        content = json.dumps(elements, indent=1)
+        for chunk_size in [1, 3, 1024]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual([element for _, _, element, _ in self.stream(content, chunk_size)], elements)
+
+    def test_report_index_and_line_of_malformed_element(self):
+        rows = self.stream('[1,\n{"a": tru},\n  {"b": 2}]')
+        self.assertEqual(
+            [(index, line, error is None) for index, line, _, error in rows],
+            [(0, 1, True), (1, 2, False), (2, 3, True)],
+        )
+
+    def test_empty_array(self):
+        self.assertEqual(self.stream(" [ ] "), [])
+
+    def test_raise_error_if_array_is_truncated(self):
+        with self.assertRaises(ValueError):
+            self.stream('[{"a": 1}, {"b"')
+
+    def test_raise_error_if_data_follows_array(self):
+        for content in ['[{"a": 1}] {"b": 2}', "[] 1"]:
+            with self.subTest(content=content), self.assertRaises(ValueError):
+                self.stream(content)
+
+    def test_raise_error_if_element_is_too_large(self):
+        stream = parsers.JSONArrayStream(io.StringIO('[1, "' + "a" * 100 + '", 2]'), chunk_size=8, max_element_size=32)
+        with self.assertRaises(ValueError):
+            list(stream)
+
 
 class TestJSONLParser(TestParser):
     def test_read(self):
@@ -92,6 +143,84 @@ class TestJSONLParser(TestParser):
         expected = [json.loads(line1), json.loads(line2)]
         self.assert_record(content, parser, expected)
 
+    def test_read_with_standard_decoder(self):
+        line = json.dumps({"text": "line1"})
+        with patch.object(parsers, "json_loads", json.loads):
+            self.assert_record(f"{line}\n\n", parsers.JSONLParser(), [{"text": "line1"}])
+            parser = parsers.JSONLParser()
+            list(parser.parse(self.test_file))
+            self.assertEqual([error.line_num for error in parser.errors], [2])
+
+
+class TestLineReader(TestParser):
+    def read(self, content: bytes, encoding: str):
+        with open(self.test_file, "wb") as f:
+            f.write(content)
+        mapped = list(parsers.LineReader(self.test_file, encoding))
+        with open(self.test_file, encoding=encoding) as f:
+            expected = [line.rstrip() for line in f]
+        self.assertEqual(mapped, expected)
+        return mapped
+
+    def test_mapped_lines_equal_text_lines(self):
+        content = "a\r\nこんにちは \n\nb\rc\r\r\nd\r".encode()
+        self.assertEqual(self.read(content, "utf-8"), ["a", "こんにちは", "", "b", "c", "", "d"])
+
+    def test_skip_bom_only_with_utf8_sig(self):
+        content = codecs.BOM_UTF8 + b"a\n" + codecs.BOM_UTF8 + b"b"
+        self.assertEqual(self.read(content, "utf-8-sig"), ["a", "\ufeffb"])
+        self.assertEqual(self.read(content, "utf-8"), ["\ufeffa", "\ufeffb"])
+
+    def test_split_blocks_at_line_breaks(self):
+        content = "ab\r\nc\rこんにちは\n\nd".encode()
+        with patch.object(parsers, "MAPPED_BLOCK_SIZE", 3):
+            self.assertEqual(self.read(content, "utf-8"), ["ab", "c", "こんにちは", "", "d"])
+            reader = parsers.LineReader(self.test_file, "utf-8")
+            self.assertEqual(list(reader.iter_bytes()), [line.encode() for line in reader])
+
+    def test_read_empty_file(self):
+        self.assertEqual(self.read(b"", "utf-8"), [])
+
+    def test_detect_encoding_from_head(self):
+        self.create_file("")
+        with open(self.test_file, "wb") as f:
+            f.write(b"a" * 100 + "é".encode("latin-1"))
+        # The head is ASCII only, which is read as UTF-8.
+        self.assertEqual(parsers.detect_encoding(self.test_file, sample_size=100), "utf-8")
+
+
+@unittest.skipIf(parsers.pq is None, "pyarrow is not installed")
+class TestParquetParser(TestParser):
+    def setUp(self):
+        super().setUp()
+        self.test_file = os.path.join(self.test_dir, "test_file.parquet")
+        rows = [{"text": f"line{i}", "labels": [f"Label{i}"]} for i in range(5)]
+        table = parsers.pyarrow.Table.from_pylist(rows)
+        parsers.pq.write_table(table, self.test_file, row_group_size=2)
+
+    def test_read(self):
+        rows = list(parsers.ParquetParser(batch_size=3).parse(self.test_file))
+        self.assertEqual([row[LINE_NUMBER_COLUMN] for row in rows], [1, 2, 3, 4, 5])
+        self.assertEqual(rows[1], {LINE_NUMBER_COLUMN: 2, "text": "line1", "labels": ["Label1"]})
+
+    def test_split_into_row_groups(self):
+        parser = parsers.ParquetParser()
+        ranges = parser.split(self.test_file, chunk_size=1)
+        self.assertEqual(len(ranges), 3)
+        rows = [row for file_range in ranges for row in parser.parse_range(self.test_file, file_range)]
+        self.assertEqual([row["text"] for row in rows], [f"line{i}" for i in range(5)])
+        counts = [parser.count_lines(self.test_file, file_range) for file_range in ranges]
+        self.assertEqual(counts, [2, 2, 1])
+
+    def test_estimate_rows_from_metadata(self):
+        self.assertEqual(parsers.ParquetParser().estimate_rows(self.test_file), 5)
+
+    def test_report_invalid_file(self):
+        self.create_file("text")
+        parser = parsers.ParquetParser()
+        self.assertEqual(list(parser.parse(self.test_file)), [])
+        self.assertEqual(len(parser.errors), 1)
+
 
 class TestFastTextParser(TestParser):
     def test_read(self):
@@ -1,17 +1,30 @@
+import multiprocessing
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
+from data_import.pipeline.parsers import JSONLParser, LineReader
 from data_import.pipeline.readers import (
     FILE_NAME_COLUMN,
+    LINE_NUMBER_COLUMN,
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
+    Checkpoint,
+    FileName,
+    FileRange,
+    ParallelReader,
     Reader,
 )
 
 
+def worker_pid(_):
+    return os.getpid()
+
+
 class TestReader(unittest.TestCase):
     def setUp(self):
         self.parser = MagicMock()
@@ -36,16 +49,139 @@ class TestReader(unittest.TestCase):
             },
         ]
 
-    @patch("data_import.pipeline.readers.uuid.uuid4")
+    @patch("data_import.pipeline.readers.example_uuid")
     def test_iter_method(self, mock):
         mock.return_value = "uuid"
         reader = Reader(self.filenames, self.parser)
         self.assertEqual(list(reader), self.rows)
 
-    @patch("data_import.pipeline.readers.uuid.uuid4")
+    @patch("data_import.pipeline.readers.example_uuid")
     def test_batch(self, mock):
         mock.return_value = "uuid"
         reader = Reader(self.filenames, self.parser)
         batch = next(reader.batch(2))
         expected_df = pd.DataFrame(self.rows)
         assert_frame_equal(batch, expected_df)
+
+
+class TestReaderCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.parser = MagicMock()
+        self.parser.parse.side_effect = lambda path: iter([{"a": f"{path}1"}, {"a": f"{path}2"}, {"a": f"{path}3"}])
+        self.filenames = [FileName(full_path=name, generated_name=f"id/{name}", upload_name=name) for name in "xy"]
+
+    def read(self, checkpoints=None):
+        reader = Reader(self.filenames, self.parser)
+        reader.resume(checkpoints or {})
+        return reader, list(reader.batch(2))
+
+    def test_example_uuids_are_deterministic(self):
+        _, first = self.read()
+        _, second = self.read()
+        self.assertEqual(first[0][UUID_COLUMN].tolist(), second[0][UUID_COLUMN].tolist())
+        self.assertEqual(first[0][UUID_COLUMN][0].version, 4)
+        uuids = [uuid for batch in first for uuid in batch[UUID_COLUMN]]
+        self.assertEqual(len(set(uuids)), 6)
+
+    def test_checkpoint_marks_the_previous_files_done(self):
+        reader, batches = self.read()
+        reader.checkpoint(batches[0], batch=1)
+        self.assertEqual(reader.checkpoints["id/x"], Checkpoint(offset=2, batch=1))
+        reader.checkpoint(batches[1], batch=2)
+        self.assertEqual(reader.checkpoints["id/x"], Checkpoint(offset=3, batch=2, done=True))
+        self.assertEqual(reader.checkpoints["id/y"], Checkpoint(offset=1, batch=2))
+
+    def test_resume_after_checkpoint(self):
+        _, expected = self.read()
+        expected = pd.concat(expected, ignore_index=True)
+        checkpoints = {"id/x": Checkpoint(offset=3, batch=2, done=True), "id/y": Checkpoint(offset=1, batch=2)}
+        _, batches = self.read(checkpoints)
+        assert_frame_equal(pd.concat(batches, ignore_index=True), expected[4:].reset_index(drop=True))
+        self.assertEqual(self.parser.parse.call_count, 2 + 1)
+
+
+class TestParallelReader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filenames = []
+        for i, lines in enumerate([['{"text": "a"}', "broken", '{"text": "b"}', '{"text": "c"}'], ['{"text": "d"}']]):
+            path = os.path.join(self.directory.name, f"{i}.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self.filenames.append(FileName(full_path=path, generated_name=f"{i}.jsonl", upload_name=f"{i}.jsonl"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, workers, chunk_size):
+        reader = ParallelReader(self.filenames, JSONLParser(encoding="utf-8"), workers=workers, chunk_size=chunk_size)
+        rows = [(row[FILE_NAME_COLUMN], row[LINE_NUMBER_COLUMN], row["text"]) for row in reader]
+        return rows, [(error.line_num, error.filename) for error in reader.errors]
+
+    def test_parallel_reading_equals_sequential_reading(self):
+        expected = self.read(workers=1, chunk_size=1024)
+        self.assertEqual(expected[0][-2:], [("0.jsonl", 4, "c"), ("1.jsonl", 1, "d")])
+        # Split the first file after every line.
+        self.assertEqual(self.read(workers=2, chunk_size=1), expected)
+
+    def test_resume_without_errors_of_saved_lines(self):
+        for workers, chunk_size in [(1, 1024), (2, 1)]:
+            reader = ParallelReader(
+                self.filenames, JSONLParser(encoding="utf-8"), workers=workers, chunk_size=chunk_size
+            )
+            reader.resume({"0.jsonl": Checkpoint(offset=2, batch=1, line=3)})
+            rows = [(row[FILE_NAME_COLUMN], row[LINE_NUMBER_COLUMN]) for row in reader]
+            self.assertEqual(rows, [("0.jsonl", 4), ("1.jsonl", 1)])
+            self.assertEqual(reader.errors, [])
+
+    def test_checkpoint_records_line_of_last_record(self):
+        reader = ParallelReader(self.filenames, JSONLParser(encoding="utf-8"), workers=1, chunk_size=1024)
+        batch = next(reader.batch(2))
+        reader.checkpoint(batch, batch=1)
+        self.assertEqual(reader.checkpoints["0.jsonl"], Checkpoint(offset=2, batch=1, line=3))
+
+    def test_parse_in_daemonic_process(self):
+        # A Celery worker is daemonic, and the workers must still be started from it.
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=lambda: queue.put(self.read(workers=2, chunk_size=1)), daemon=True)
+        process.start()
+        result = queue.get(timeout=30)
+        process.join()
+        self.assertEqual(result, self.read(workers=1, chunk_size=1024))
+
+    def test_map_in_workers_of_daemonic_process(self):
+        def run():
+            reader = ParallelReader(self.filenames, JSONLParser(), workers=2, chunk_size=1)
+            with reader.pool():
+                results = list(reader.map(worker_pid, range(4)))
+            queue.put(([item for item, _ in results], os.getpid() in {pid for _, pid in results}))
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run, daemon=True)
+        process.start()
+        items, in_process = queue.get(timeout=30)
+        process.join()
+        self.assertEqual(items, [0, 1, 2, 3])
+        self.assertFalse(in_process)
+
+    def test_map_in_process_without_workers(self):
+        reader = ParallelReader(self.filenames, JSONLParser(), workers=1, chunk_size=1)
+        with reader.pool():
+            self.assertEqual({pid for _, pid in reader.map(worker_pid, range(2))}, {os.getpid()})
+
+    def test_detect_encoding_of_each_file(self):
+        with open(self.filenames[1].full_path, "w", encoding="utf-16") as f:
+            f.write('{"text": "d"}\n{"text": "e"}\n')
+        reader = ParallelReader(self.filenames, JSONLParser(), workers=2, chunk_size=8)
+        self.assertEqual([row["text"] for row in reader], ["a", "b", "c", "d", "e"])
+        self.assertEqual(reader.parser.encoding, "Auto")
+
+    def test_split_at_line_boundaries(self):
+        parser = JSONLParser(encoding="utf-8")
+        ranges = parser.split(self.filenames[0].full_path, chunk_size=8)
+        lines = [line for file_range in ranges for line in LineReader(self.filenames[0].full_path, "utf-8", file_range)]
+        self.assertEqual(lines, ['{"text": "a"}', "broken", '{"text": "b"}', '{"text": "c"}'])
+
+    def test_does_not_split_encoding_without_ascii_newline(self):
+        ranges = JSONLParser(encoding="utf-16").split(self.filenames[0].full_path, chunk_size=1)
+        self.assertEqual(ranges, [FileRange(encoding="utf-16")])
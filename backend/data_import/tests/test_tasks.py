@@ -1,14 +1,18 @@
 import os
 import pathlib
 import shutil
+from unittest import skipIf
 
 from django.core.files import File
 from django.test import TestCase, override_settings
 from django_drf_filepond.models import StoredUpload, TemporaryUpload
 from django_drf_filepond.utils import _get_file_id
 
-from data_import.celery_tasks import import_dataset
+from data_import.celery_tasks import check_dataset, import_dataset
+from data_import.models import ImportJob, ImportStatus
+from data_import.pipeline import parsers
 from data_import.pipeline.catalog import RELATION_EXTRACTION
+from data_import.pipeline.data import hash_file, hash_text
 from examples.models import Example
 from label_types.models import SpanType
 from labels.models import Category, Span
@@ -35,7 +39,7 @@ class TestImportData(TestCase):
         except StoredUpload.DoesNotExist:
             pass
 
-    def import_dataset(self, filename, file_format, task, kwargs=None):
+    def import_dataset(self, filename, file_format, task, kwargs=None, task_id=None):
         file_path = str(self.data_path / filename)
         TemporaryUpload.objects.create(
             upload_id=self.upload_id,
@@ -46,7 +50,10 @@ class TestImportData(TestCase):
         )
         upload_ids = [self.upload_id]
         kwargs = kwargs or {}
-        return import_dataset(self.user.id, self.project.item.id, file_format, upload_ids, task, **kwargs)
+        args = (self.user.id, self.project.item.id, file_format, upload_ids, task)
+        if task_id is not None:
+            return import_dataset.apply(args, kwargs, task_id=task_id).get()
+        return import_dataset(*args, **kwargs)
 
 
 @override_settings(MAX_UPLOAD_SIZE=0)
@@ -132,6 +139,16 @@ class TestImportClassificationData(TestImportData):
         self.import_dataset(filename, file_format, self.task)
         self.assert_examples(dataset)
 
+    @skipIf(parsers.pq is None, "pyarrow is not installed")
+    def test_parquet(self):
+        filename = "text_classification/example.parquet"
+        file_format = "Parquet"
+        kwargs = {"column_label": "labels"}
+        dataset = [("exampleA", ["positive"]), ("exampleB", ["positive", "negative"]), ("exampleC", [])]
+        self.import_dataset(filename, file_format, self.task, kwargs)
+        self.assert_examples(dataset)
+        self.assertEqual(Example.objects.get(text="exampleA").meta, {"meta": {"wikiPageID": 1}})
+
     def test_textfile(self):
         filename = "example.txt"
         file_format = "TextFile"
@@ -173,6 +190,11 @@ class TestImportClassificationData(TestImportData):
         self.assert_parse_error(response)
 
 
+@override_settings(IMPORT_WORKERS=2)
+class TestImportClassificationDataInWorkers(TestImportClassificationData):
+    """The same imports, with the examples and the labels made in the worker processes of the reader."""
+
+
 class TestImportSequenceLabelingData(TestImportData):
     task = ProjectType.SEQUENCE_LABELING
 
@@ -196,6 +218,14 @@ class TestImportSequenceLabelingData(TestImportData):
         self.import_dataset(filename, file_format, self.task)
         self.assert_examples(dataset)
 
+    @skipIf(parsers.pq is None, "pyarrow is not installed")
+    def test_parquet(self):
+        filename = "sequence_labeling/example.parquet"
+        file_format = "Parquet"
+        dataset = [("exampleA", [[0, 1, "LOC"]]), ("exampleB", [])]
+        self.import_dataset(filename, file_format, self.task)
+        self.assert_examples(dataset)
+
     def test_conll(self):
         filename = "sequence_labeling/example.conll"
         file_format = "CoNLL"
@@ -329,3 +359,80 @@ class TestFileTypeChecking(TestImportData):
         response = self.import_dataset(filename, file_format, self.task)
         self.assertEqual(len(response["error"]), 1)
         self.assertIn("unexpected", response["error"][0]["message"])
+
+
+class TestResumableImport(TestImportData):
+    task = ProjectType.DOCUMENT_CLASSIFICATION
+    filename = "text_classification/example.jsonl"
+
+    @override_settings(IMPORT_BATCH_SIZE=2)
+    def test_record_checkpoints(self):
+        self.import_dataset(self.filename, "JSONL", self.task, {"column_label": "labels"}, task_id="task")
+        job = ImportJob.objects.get(task_id="task")
+        self.assertEqual(job.status, ImportStatus.SUCCESS)
+        self.assertEqual((job.rows, job.total_rows, job.batches, job.attempts), (3, 3, 2, 1))
+        self.assertEqual(
+            job.checkpoints[f"{self.upload_id}/example.jsonl"], {"offset": 3, "batch": 2, "done": False, "line": 3}
+        )
+        self.assertEqual(job.eta, 0.0)
+
+    def test_resume_after_last_checkpoint(self):
+        ImportJob.objects.create(
+            task_id="task",
+            project=self.project.item,
+            user=self.user,
+            checkpoints={f"{self.upload_id}/example.jsonl": {"offset": 1, "batch": 1, "done": False}},
+            batches=1,
+            rows=1,
+        )
+        self.import_dataset(self.filename, "JSONL", self.task, {"column_label": "labels"}, task_id="task")
+        self.assertEqual(sorted(Example.objects.values_list("text", flat=True)), ["exampleB", "exampleC"])
+        job = ImportJob.objects.get(task_id="task")
+        self.assertEqual((job.rows, job.batches, job.attempts), (3, 2, 1))
+
+
+class TestDeduplicatedImport(TestImportData):
+    task = ProjectType.DOCUMENT_CLASSIFICATION
+
+    def test_skip_existing_examples(self):
+        kwargs = {"column_label": "labels", "dedup": "skip"}
+        Example.objects.create(text="exampleA", content_hash=hash_text("exampleA"), project=self.project.item)
+        self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, kwargs)
+        self.assertEqual(Example.objects.count(), 3)
+        self.assertFalse(Category.objects.filter(example__text="exampleA").exists())
+
+    def test_hash_binary_files(self):
+        self.import_dataset("images/1500x500.jpeg", "ImageFile", ProjectType.IMAGE_CLASSIFICATION)
+        example = Example.objects.get()
+        self.assertEqual(example.content_hash, hash_file(str(self.data_path / "images/1500x500.jpeg")))
+
+
+class TestCheckDataset(TestImportData):
+    task = ProjectType.SEQUENCE_LABELING
+
+    def check_dataset(self, sample=None):
+        filename = "sequence_labeling/example_dry_run.jsonl"
+        TemporaryUpload.objects.create(
+            upload_id=self.upload_id,
+            file_id="1",
+            file=File(open(self.data_path / filename, mode="rb"), "example_dry_run.jsonl"),
+            upload_name=filename,
+            upload_type="F",
+        )
+        return check_dataset(self.project.item.id, "JSONL", [self.upload_id], self.task, sample=sample)
+
+    def tearDown(self):
+        TemporaryUpload.objects.filter(upload_id=self.upload_id).delete()
+
+    def test_report_without_saving(self):
+        report = self.check_dataset()["report"]
+        self.assertEqual((report["rows"], report["examples"], report["failed_rows"]), (3, 2, 1))
+        self.assertEqual(report["labels"]["spans"], {"labels": 2, "dropped": 1, "new_types": ["LOC", "MISC", "ORG"]})
+        self.assertEqual(report["errors"], {"Column text not found in record": 1})
+        self.assertEqual(Example.objects.count(), 0)
+        self.assertEqual(SpanType.objects.count(), 0)
+        self.assertTrue(TemporaryUpload.objects.filter(upload_id=self.upload_id).exists())
+
+    def test_check_sample(self):
+        report = self.check_dataset(sample=1e-9)["report"]
+        self.assertEqual((report["rows"], report["checked_rows"], report["examples"]), (3, 0, 0))
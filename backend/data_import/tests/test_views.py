@@ -1,7 +1,10 @@
+from unittest.mock import patch
+
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from api.tests.utils import CRUDMixin
+from data_import.models import ImportJob
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -19,3 +22,59 @@ class TestImportCatalog(CRUDMixin):
     def test_denies_project_staff_to_list_catalog(self):
         for member in self.project.staffs:
             self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+
+class TestImportProgress(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.job = ImportJob.objects.create(task_id="task", project=self.project.item, rows=10)
+        self.job.start(total_rows=30)
+        self.url = reverse(viewname="upload_progress", args=[self.project.item.id, "task"])
+
+    def test_allows_project_admin_to_get_progress(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "RUNNING")
+        self.assertEqual((response.data["rows"], response.data["total_rows"]), (10, 40))
+        self.assertIn("eta", response.data)
+
+    def test_denies_project_staff_to_get_progress(self):
+        for member in self.project.staffs:
+            self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+    def test_returns_404_for_task_of_other_project(self):
+        other = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.url = reverse(viewname="upload_progress", args=[other.item.id, "task"])
+        self.assert_fetch(other.admin, status.HTTP_404_NOT_FOUND)
+
+
+class TestImportDataset(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.url = reverse(viewname="upload", args=[self.project.item.id])
+        self.data = {"uploadIds": ["id"], "format": "JSONL", "task": ProjectType.DOCUMENT_CLASSIFICATION}
+
+    @patch("data_import.views.import_dataset.apply_async")
+    def test_creates_job_of_task(self, apply_async):
+        apply_async.side_effect = lambda kwargs, task_id: type("Result", (), {"task_id": task_id})
+        response = self.assert_create(self.project.admin, status.HTTP_200_OK)
+        job = ImportJob.objects.get(task_id=response.data["task_id"])
+        self.assertEqual(job.project, self.project.item)
+        self.assertEqual(apply_async.call_args.kwargs["kwargs"]["upload_ids"], ["id"])
+
+    @patch("data_import.views.check_dataset.delay")
+    def test_dry_run_does_not_create_job(self, delay):
+        delay.return_value.task_id = "task"
+        self.data.update(dryRun=True, sample=0.5)
+        response = self.assert_create(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["task_id"], "task")
+        self.assertEqual(delay.call_args.kwargs["sample"], 0.5)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_dry_run_rejects_invalid_sample(self):
+        self.data.update(dryRun=True, sample=2)
+        self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_unknown_dedup_mode(self):
+        self.data.update(dedup="replace")
+        self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImportJob.objects.exists())
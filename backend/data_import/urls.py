@@ -1,9 +1,14 @@
 from django.urls import include, path
 
-from .views import DatasetCatalog, DatasetImportAPI
+from .views import DatasetCatalog, DatasetImportAPI, DatasetImportProgress
 
 urlpatterns = [
     path("fp/", include("django_drf_filepond.urls")),
     path(route="projects/<int:project_id>/upload", view=DatasetImportAPI.as_view(), name="upload"),
+    path(
+        route="projects/<int:project_id>/upload/<str:task_id>",
+        view=DatasetImportProgress.as_view(),
+        name="upload_progress",
+    ),
     path(route="projects/<int:project_id>/catalog", view=DatasetCatalog.as_view(), name="catalog"),
 ]
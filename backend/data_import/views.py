@@ -1,12 +1,16 @@
+from celery.utils import uuid
 from django.shortcuts import get_object_or_404
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .celery_tasks import import_dataset
+from .celery_tasks import check_dataset, import_dataset
+from .models import ImportJob
 from .pipeline.catalog import Options
-from projects.models import Project
+from .pipeline.examples import DEDUP_MODES
+from projects.context import get_project_context
 from projects.permissions import IsProjectAdmin
 
 
@@ -15,7 +19,7 @@ class DatasetCatalog(APIView):
 
     def get(self, request, *args, **kwargs):
         project_id = kwargs["project_id"]
-        project = get_object_or_404(Project, pk=project_id)
+        project = get_project_context(self.request, project_id).project
         use_relation = getattr(project, "use_relation", False)
         options = Options.filter_by_task(project.project_type, use_relation)
         return Response(data=options, status=status.HTTP_200_OK)
@@ -28,12 +32,53 @@ class DatasetImportAPI(APIView):
         upload_ids = request.data.pop("uploadIds")
         file_format = request.data.pop("format")
         task = request.data.pop("task")
-        celery_task = import_dataset.delay(
-            user_id=request.user.id,
-            project_id=self.kwargs["project_id"],
-            file_format=file_format,
-            upload_ids=upload_ids,
-            task=task,
-            **request.data,
+        dedup = request.data.get("dedup")
+        if dedup is not None and dedup not in DEDUP_MODES:
+            raise ValidationError({"dedup": f"The dedup mode must be one of {', '.join(DEDUP_MODES)}."})
+        if request.data.pop("dryRun", False):
+            sample = request.data.get("sample")
+            if sample is not None and not (isinstance(sample, (int, float)) and 0 < sample <= 1):
+                raise ValidationError({"sample": "The sample must be a number greater than 0 and at most 1."})
+            celery_task = check_dataset.delay(
+                project_id=self.kwargs["project_id"],
+                file_format=file_format,
+                upload_ids=upload_ids,
+                task=task,
+                **request.data,
+            )
+            return Response({"task_id": celery_task.task_id})
+        # Create the job before the task starts, so that its progress can be fetched right away.
+        job = ImportJob.objects.create(task_id=uuid(), project_id=self.kwargs["project_id"], user=request.user)
+        celery_task = import_dataset.apply_async(
+            kwargs=dict(
+                user_id=request.user.id,
+                project_id=self.kwargs["project_id"],
+                file_format=file_format,
+                upload_ids=upload_ids,
+                task=task,
+                **request.data,
+            ),
+            task_id=job.task_id,
         )
         return Response({"task_id": celery_task.task_id})
+
+
+class DatasetImportProgress(APIView):
+    permission_classes = [IsAuthenticated & IsProjectAdmin]
+
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(ImportJob, project_id=self.kwargs["project_id"], task_id=self.kwargs["task_id"])
+        return Response(
+            {
+                "task_id": job.task_id,
+                "status": job.status,
+                "rows": job.rows,
+                "total_rows": job.total_rows,
+                "batches": job.batches,
+                "attempts": job.attempts,
+                "rows_per_second": job.rows_per_second,
+                "eta": job.eta,
+                "checkpoints": job.checkpoints,
+                "updated_at": job.updated_at,
+            }
+        )
@@ -1,4 +1,8 @@
-from django.db.models import Count, Manager
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Manager, QuerySet
 
 
 class ExampleManager(Manager):
@@ -6,10 +10,71 @@ class ExampleManager(Manager):
         super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
         uuids = [data.uuid for data in objs]
         examples = self.in_bulk(uuids, field_name="uuid")
+        ProjectProgress = apps.get_model("metrics", "ProjectProgress")
+        if ignore_conflicts:
+            # The skipped rows are unknown, so the progress is counted again.
+            for project_id in {example.project_id for example in objs}:
+                ProjectProgress.objects.invalidate(project_id)
+        else:
+            self.add_progress(objs)
         return [examples[uid] for uid in uuids]
 
+    def add_progress(self, examples):
+        """Add the created examples to the progress of their projects."""
+        ProjectProgress = apps.get_model("metrics", "ProjectProgress")
+        for project_id, count in Counter(example.project_id for example in examples).items():
+            ProjectProgress.objects.add_examples(project_id, count)
+
+    def remove_progress(self, queryset: QuerySet):
+        """Remove the examples of the queryset, and their confirmations, from the progress of their projects.
+
+        It must be called before they are deleted, as their states are deleted along with them.
+        """
+        ProjectProgress = apps.get_model("metrics", "ProjectProgress")
+        ExampleState = apps.get_model("examples", "ExampleState")
+        ExampleState.objects.filter(example__in=queryset.values("pk")).add_progress(-1)
+        counts = queryset.order_by().values("project_id").annotate(count=Count("pk"))
+        for item in counts:
+            ProjectProgress.objects.add_examples(item["project_id"], -item["count"])
+
+
+class ExampleStateQuerySet(QuerySet):
+    def add_progress(self, sign: int = 1):
+        """Add the confirmations of this queryset to the progress of their projects, or remove them with -1.
+
+        It must be called after the states are created, or before they are deleted:
+        an example is counted as done by the first state added to it, and undone by the last one removed.
+        """
+        rows = list(self.order_by().values_list("pk", "example_id", "example__project_id", "confirmed_by_id"))
+        if not rows:
+            return
+        others = set(
+            self.model._default_manager.filter(example_id__in={example_id for _, example_id, _, _ in rows})
+            .exclude(pk__in=[pk for pk, _, _, _ in rows])
+            .values_list("example_id", flat=True)
+        )
+        users: defaultdict = defaultdict(Counter)
+        examples: defaultdict = defaultdict(set)
+        for _, example_id, project_id, user_id in rows:
+            users[project_id][user_id] += sign
+            if example_id not in others:
+                examples[project_id].add(example_id)
+        ProjectProgress = apps.get_model("metrics", "ProjectProgress")
+        for project_id, counter in users.items():
+            ProjectProgress.objects.add_confirmations(project_id, counter, sign * len(examples[project_id]))
+
+    def add_throughput(self):
+        """Count the confirmations of this queryset in the throughput of their users."""
+        rows = self.order_by().values_list("example__project_id", "confirmed_by_id", "confirmed_at")
+        apps.get_model("metrics", "ThroughputBucket").objects.add("confirmations", Counter(rows))
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            self.add_progress(-1)
+            return super().delete()
+
 
-class ExampleStateManager(Manager):
+class ExampleStateManager(Manager.from_queryset(ExampleStateQuerySet)):  # type: ignore
     def count_done(self, examples, user=None):
         if user:
             queryset = self.filter(example_id__in=examples, confirmed_by=user)
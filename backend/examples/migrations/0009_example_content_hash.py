@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:53
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_texts(apps, schema_editor):
+    # The files of the binary examples are in the storage, so only the texts are hashed here.
+    Example = apps.get_model("examples", "example")
+    examples = Example.objects.filter(text__isnull=False).only("id", "text")
+    batch = []
+    for example in examples.iterator(chunk_size=1000):
+        example.content_hash = hashlib.sha256(example.text.encode("utf-8")).hexdigest()
+        batch.append(example)
+        if len(batch) == 1000:
+            Example.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    Example.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0008_assignment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="example",
+            name="content_hash",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.RunPython(hash_texts, reverse_code=migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="example",
+            index=models.Index(fields=["project", "content_hash"], name="example_content_hash_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0009_example_content_hash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="examplestate",
+            name="confirmed_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -1,14 +1,19 @@
+import hashlib
 import uuid
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django_drf_filepond.models import DrfFilePondStoredStorage
 
 from .managers import ExampleManager, ExampleStateManager
 from projects.models import Project
 
 
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 class Example(models.Model):
     objects = ExampleManager()
 
@@ -19,10 +24,25 @@ class Example(models.Model):
     project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="examples")
     annotations_approved_by = models.ForeignKey(to=User, on_delete=models.SET_NULL, null=True, blank=True)
     text = models.TextField(null=True, blank=True)
+    # The SHA-256 of the text, or of the file for a binary example, to find the duplicates of an import.
+    content_hash = models.CharField(max_length=64, default="", blank=True, editable=False)
     score = models.FloatField(default=100)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # A binary example has no text, and keeps the hash of its file.
+        if self.text is not None:
+            self.content_hash = hash_text(self.text)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "text" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "content_hash"}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Example.objects.add_progress([self])
+
     @property
     def comment_count(self):
         return Comment.objects.filter(example=self.id).count()
@@ -36,6 +56,7 @@ class Example(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [models.Index(fields=["project", "content_hash"], name="example_content_hash_idx")]
 
 
 class Assignment(models.Model):
@@ -65,7 +86,21 @@ class ExampleState(models.Model):
     objects = ExampleStateManager()
     example = models.ForeignKey(to=Example, on_delete=models.CASCADE, related_name="states")
     confirmed_by = models.ForeignKey(to=User, on_delete=models.CASCADE)
-    confirmed_at = models.DateTimeField(auto_now=True)
+    confirmed_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                states = ExampleState.objects.filter(pk=self.pk)
+                states.add_progress()
+                states.add_throughput()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ExampleState.objects.filter(pk=self.pk).add_progress(-1)
+            return super().delete(*args, **kwargs)
 
     class Meta:
         unique_together = (("example", "confirmed_by"),)
@@ -76,7 +111,7 @@ class Comment(models.Model):
     example = models.ForeignKey(to=Example, on_delete=models.CASCADE, related_name="comments")
     user = models.ForeignKey(to=User, on_delete=models.CASCADE, null=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     @property
     def username(self):
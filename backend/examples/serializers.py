@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from .models import Assignment, Comment, Example, ExampleState
+from projects.context import get_project_context
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -35,8 +36,9 @@ class ExampleSerializer(serializers.ModelSerializer):
         return approver.username if approver else None
 
     def get_is_confirmed(self, instance):
-        user = self.context.get("request").user
-        if instance.project.collaborative_annotation:
+        request = self.context.get("request")
+        user = request.user
+        if get_project_context(request, instance.project_id).project.collaborative_annotation:
             states = instance.states.all()
         else:
             states = instance.states.filter(confirmed_by_id=user.id)
@@ -1,9 +1,13 @@
 from django.utils.http import urlencode
+from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from .utils import make_assignment, make_doc, make_example_state
 from api.tests.utils import CRUDMixin
+from examples.models import Example, hash_text
+from labels.models import LabelTombstone
+from metrics.models import MemberProgress, ProjectProgress
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 from users.tests.utils import make_user
@@ -35,6 +39,8 @@ class TestExampleListAPI(CRUDMixin):
 
     def test_allows_project_admin_to_create_example(self):
         response = self.assert_create(self.project.admin, status.HTTP_201_CREATED)
+        example = Example.objects.get(pk=response.data["id"])
+        self.assertEqual(example.content_hash, hash_text(self.data["text"]))
         self.assertEqual(response.data["text"], self.data["text"])
 
     def test_denies_non_admin_to_create_example(self):
@@ -111,9 +117,9 @@ class TestExampleDetail(CRUDMixin):
     def setUp(self):
         self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
         self.non_member = make_user()
-        example = make_doc(self.project.item)
+        self.example = make_doc(self.project.item)
         self.data = {"text": "example"}
-        self.url = reverse(viewname="example_detail", args=[self.project.item.id, example.id])
+        self.url = reverse(viewname="example_detail", args=[self.project.item.id, self.example.id])
 
     def test_allows_project_member_to_get_example(self):
         for member in self.project.members:
@@ -129,6 +135,19 @@ class TestExampleDetail(CRUDMixin):
     def test_allows_project_admin_to_update_example(self):
         response = self.assert_update(self.project.admin, status.HTTP_200_OK)
         self.assertEqual(response.data["text"], self.data["text"])
+        example = Example.objects.get(pk=response.data["id"])
+        self.assertEqual(example.content_hash, hash_text(self.data["text"]))
+
+    def test_rehash_emptied_text(self):
+        self.data = {"text": ""}
+        self.assert_update(self.project.admin, status.HTTP_200_OK)
+        self.example.refresh_from_db()
+        self.assertEqual(self.example.content_hash, hash_text(""))
+
+    def test_keep_file_hash_of_binary_example(self):
+        example = Example.objects.create(project=self.project.item, text=None, content_hash="filehash")
+        example.save()
+        self.assertEqual(example.content_hash, "filehash")
 
     def test_denies_non_admin_to_update_example(self):
         for member in self.project.staffs:
@@ -140,6 +159,20 @@ class TestExampleDetail(CRUDMixin):
     def test_allows_project_admin_to_delete_example(self):
         self.assert_delete(self.project.admin, status.HTTP_204_NO_CONTENT)
 
+    def test_delete_records_tombstones_of_labels(self):
+        category = mommy.make("Category", example=self.example, user=self.project.admin)
+        self.assert_delete(self.project.admin, status.HTTP_204_NO_CONTENT)
+        tombstone = LabelTombstone.objects.get()
+        self.assertEqual((tombstone.label_uuid, tombstone.example_id), (category.uuid, self.example.id))
+
+    def test_delete_uncounts_progress(self):
+        ProjectProgress.objects.rebuild(self.project.item.id)
+        make_example_state(self.example, self.project.admin)
+        self.assert_delete(self.project.admin, status.HTTP_204_NO_CONTENT)
+        progress = ProjectProgress.objects.get(project=self.project.item)
+        member = MemberProgress.objects.get(project=self.project.item, user=self.project.admin)
+        self.assertEqual((progress.total, progress.done, member.done), (0, 0, 0))
+
     def test_denies_non_admin_to_delete_example(self):
         for member in self.project.staffs:
             self.assert_delete(member, status.HTTP_403_FORBIDDEN)
@@ -1,4 +1,5 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
 from rest_framework.permissions import IsAuthenticated
@@ -7,7 +8,8 @@ from rest_framework.response import Response
 from examples.filters import ExampleFilter
 from examples.models import Example
 from examples.serializers import ExampleSerializer
-from projects.models import Member, Project
+from labels.managers import create_label_tombstones, release_label_types
+from projects.context import get_project_context
 from projects.permissions import IsProjectAdmin, IsProjectMember
 
 
@@ -22,11 +24,13 @@ class ExampleList(generics.ListCreateAPIView):
 
     @property
     def project(self):
-        return get_object_or_404(Project, pk=self.kwargs["project_id"])
+        return get_project_context(self.request, self.kwargs["project_id"]).project
 
     def get_queryset(self):
-        member = get_object_or_404(Member, project=self.project, user=self.request.user)
-        if member.is_admin():
+        context = get_project_context(self.request, self.kwargs["project_id"])
+        if context.role_name is None:
+            raise Http404
+        if context.is_admin:
             return self.model.objects.filter(project=self.project)
 
         queryset = self.model.objects.filter(project=self.project, assignments__assignee=self.request.user)
@@ -41,9 +45,14 @@ class ExampleList(generics.ListCreateAPIView):
         queryset = self.project.examples
         delete_ids = request.data["ids"]
         if delete_ids:
-            queryset.filter(pk__in=delete_ids).delete()
+            queryset = queryset.filter(pk__in=delete_ids)
         else:
-            queryset.all().delete()
+            queryset = queryset.all()
+        with transaction.atomic():
+            release_label_types(queryset)
+            create_label_tombstones(queryset)
+            Example.objects.remove_progress(queryset)
+            queryset.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -52,3 +61,11 @@ class ExampleDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ExampleSerializer
     lookup_url_kwarg = "example_id"
     permission_classes = [IsAuthenticated & IsProjectMember]
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        queryset = Example.objects.filter(pk=instance.pk)
+        release_label_types(queryset)
+        create_label_tombstones(queryset)
+        Example.objects.remove_progress(queryset)
+        instance.delete()
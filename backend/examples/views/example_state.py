@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 
 from examples.models import Example, ExampleState
 from examples.serializers import ExampleStateSerializer
-from projects.models import Project
+from projects.context import get_project_context
 from projects.permissions import IsProjectMember
 
 
@@ -14,7 +14,7 @@ class ExampleStateList(generics.ListCreateAPIView):
 
     @property
     def can_confirm_per_user(self):
-        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
         return not project.collaborative_annotation
 
     def get_queryset(self):
@@ -0,0 +1,15 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .upload import SERIALIZERS, LabelTypeUploader
+
+
+@shared_task
+def upload_label_types(project_id: int, model_name: str, path: str):
+    try:
+        uploader = LabelTypeUploader(project_id, SERIALIZERS[model_name], batch_size=settings.IMPORT_BATCH_SIZE)
+        with default_storage.open(path, "rb") as f:
+            return uploader.upload(f)
+    finally:
+        default_storage.delete(path)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from label_types.models import CategoryType, RelationType, SpanType
+
+
+class Command(BaseCommand):
+    help = "Recalculate the usage count of label types"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, default=None, help="The id of the project. Defaults to all.")
+
+    def handle(self, *args, **options):
+        project_id = options.get("project")
+        for model in [CategoryType, SpanType, RelationType]:
+            queryset = model.objects.all()
+            if project_id is not None:
+                queryset = queryset.filter(project_id=project_id)
+            updated = queryset.rebuild_usage_count()
+            self.stdout.write(self.style.SUCCESS(f"Updated {updated} {model._meta.verbose_name_plural}."))
@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Manager, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.utils import timezone
+
+
+class LabelTypeQuerySet(QuerySet):
+    def rebuild_usage_count(self) -> int:
+        """Recalculate `usage_count` from the labels referencing each label type.
+
+        The counters are maintained incrementally by the label managers,
+        so this is only needed to repair them, e.g. after a migration or raw SQL.
+
+        Returns:
+            the number of updated label types.
+        """
+        usage = Value(0)
+        for relation in self.model._meta.related_objects:
+            if not relation.one_to_many:
+                continue
+            field = relation.field.name
+            # Only the labels count, not the other models referencing label types, e.g. the metrics.
+            if getattr(relation.related_model._default_manager, "label_type_field", None) != field:
+                continue
+            counts = (
+                relation.related_model._base_manager.filter(**{field: OuterRef("pk")})
+                .order_by()
+                .values(field)
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            usage = usage + Coalesce(Subquery(counts), 0)
+        return self.update(usage_count=usage)
+
+    def create_label_tombstones(self):
+        """Record the labels of the label types in this queryset as deleted, as they are deleted along with them."""
+        for relation in self.model._meta.related_objects:
+            manager = relation.related_model._default_manager
+            if relation.one_to_many and getattr(manager, "label_type_field", None) == relation.field.name:
+                manager.filter(**{f"{relation.field.name}__in": self.values("pk")}).create_tombstones()
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            for project_id in set(self.values_list("project_id", flat=True).distinct()):
+                self.model.label_set_changed(project_id)
+            self.create_label_tombstones()
+            return super().delete()
+
+
+class LabelTypeManager(Manager.from_queryset(LabelTypeQuerySet)):  # type: ignore
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            label_types = super().bulk_create(objs, *args, **kwargs)
+            for project_id in {label_type.project_id for label_type in label_types}:
+                self.model.label_set_changed(project_id)
+        return label_types
+
+    def add_usage(self, counter: Dict[int, int]):
+        """Add the given deltas to `usage_count`.
+
+        Label types sharing the same delta are updated by a single query,
+        so a batch of labels costs a few queries instead of one per label type.
+
+        Args:
+            counter: mapping from label type id to the delta of its usage.
+        """
+        ids_by_delta = defaultdict(list)
+        for label_type_id, delta in counter.items():
+            if label_type_id is not None and delta:
+                ids_by_delta[delta].append(label_type_id)
+        if not ids_by_delta:
+            return
+        with transaction.atomic(using=self.db):
+            for delta, ids in ids_by_delta.items():
+                self.filter(pk__in=ids).update(usage_count=F("usage_count") + delta)
+
+
+class HierarchicalLabelTypeQuerySet(LabelTypeQuerySet):
+    def reparent_children(self) -> List[int]:
+        """Move the children of the label types to their parents, so that deleting them keeps their subtrees.
+
+        The deepest label types are handled first, so that a child ends up under its closest remaining ancestor.
+
+        Returns:
+            the ids of the label types.
+        """
+        separator = self.model.PATH_SEPARATOR
+        label_types = sorted(self.values_list("pk", "parent_id", "path"), key=lambda row: -row[2].count(separator))
+        manager = self.model._base_manager
+        for pk, parent_id, path in label_types:
+            prefix = f"{path}{pk}{separator}"
+            manager.filter(parent_id=pk).update(parent_id=parent_id)
+            manager.filter(path__startswith=prefix).update(path=Concat(Value(path), Substr("path", len(prefix) + 1)))
+        return [pk for pk, _, _ in label_types]
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            pks = self.reparent_children()
+            # Select the label types by id, as the moved children may now match the filters of this queryset.
+            label_types = type(self)(self.model, using=self.db).filter(pk__in=pks)
+            return super(HierarchicalLabelTypeQuerySet, label_types).delete()
+
+
+class HierarchicalLabelTypeManager(LabelTypeManager.from_queryset(HierarchicalLabelTypeQuerySet)):  # type: ignore
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.update_path()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def copy_taxonomy(self, source_project_id: int, target_project_id: int):
+        """Nest the label types of a cloned project like those of the source project.
+
+        The label types are matched by text, which is unique in a project.
+        """
+        source = self.filter(project_id=source_project_id).values_list("id", "text", "parent_id", "path")
+        target_ids = dict(self.filter(project_id=target_project_id).values_list("text", "id"))
+        id_map = {pk: target_ids[text] for pk, text, _, _ in source if text in target_ids}
+        label_types = []
+        for pk, text, parent_id, path in source:
+            if parent_id is None or pk not in id_map or parent_id not in id_map:
+                continue
+            ancestor_ids = [id_map.get(int(ancestor_id)) for ancestor_id in path.split(self.model.PATH_SEPARATOR)[:-1]]
+            if None in ancestor_ids:
+                continue
+            label_type = self.model(pk=id_map[pk], parent_id=id_map[parent_id])
+            label_type.path = "".join(f"{ancestor_id}{self.model.PATH_SEPARATOR}" for ancestor_id in ancestor_ids)
+            label_types.append(label_type)
+        with transaction.atomic(using=self.db):
+            self.bulk_update(label_types, ["parent", "path"])
+            self.model.label_set_changed(target_project_id)
+
+
+class LabelTypeUsageManager(Manager):
+    def record(self, user, label_type, used_at: Optional[datetime] = None):
+        """Add one use of the label type to the user's ranking.
+
+        Args:
+            user: the user who used the label type.
+            label_type: the used label type.
+            used_at: the time of the use. Defaults to now.
+        """
+        used_at = used_at or timezone.now()
+        score = self.model.time_to_score(used_at)
+        with transaction.atomic():
+            usage, created = self.select_for_update().get_or_create(
+                user=user,
+                label_type=label_type,
+                defaults={"project_id": label_type.project_id, "score": score, "used_at": used_at},
+            )
+            if not created:
+                usage.score = self.model.add_scores(usage.score, score)
+                usage.used_at = max(usage.used_at, used_at)
+                usage.save(update_fields=["score", "used_at"])
+        return usage
+
+
+class LabelSetVersionManager(Manager):
+    def get_version(self, project_id: int) -> int:
+        """Return the label set version of the project."""
+        version = self.filter(pk=project_id).values_list("version", flat=True).first()
+        if version is None:
+            version = self.get_or_create(project_id=project_id)[0].version
+        return version
+
+    def bump(self, project_id: int):
+        """Increment the version after a label type of the project is created, updated or deleted."""
+        if not self.filter(pk=project_id).update(version=F("version") + 1):
+            _, created = self.get_or_create(project_id=project_id)
+            if not created:
+                self.filter(pk=project_id).update(version=F("version") + 1)
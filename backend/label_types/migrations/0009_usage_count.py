@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_usage_count(apps, schema_editor):
+    for model_name in ["CategoryType", "SpanType", "RelationType"]:
+        model = apps.get_model("label_types", model_name)
+        usage = Value(0)
+        for relation in model._meta.related_objects:
+            if not relation.one_to_many:
+                continue
+            field = relation.field.name
+            counts = (
+                relation.related_model.objects.filter(**{field: OuterRef("pk")})
+                .order_by()
+                .values(field)
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            usage = usage + Coalesce(Subquery(counts), 0)
+        model.objects.update(usage_count=usage)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("label_types", "0008_alter_categorytype_text_alter_relationtype_text_and_more"),
+        ("labels", "0016_segmentation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="categorytype",
+            name="usage_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="relationtype",
+            name="usage_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="spantype",
+            name="usage_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="categorytype",
+            index=models.Index(fields=["project", "usage_count"], name="categorytype_usage_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="relationtype",
+            index=models.Index(fields=["project", "usage_count"], name="relationtype_usage_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="spantype",
+            index=models.Index(fields=["project", "usage_count"], name="spantype_usage_idx"),
+        ),
+        migrations.RunPython(code=populate_usage_count, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+        ("label_types", "0009_usage_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelationTypeUsage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("score", models.FloatField()),
+                ("used_at", models.DateTimeField()),
+                (
+                    "label_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usages",
+                        to="label_types.relationtype",
+                    ),
+                ),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="projects.project")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="CategoryTypeUsage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("score", models.FloatField()),
+                ("used_at", models.DateTimeField()),
+                (
+                    "label_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usages",
+                        to="label_types.categorytype",
+                    ),
+                ),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="projects.project")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SpanTypeUsage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("score", models.FloatField()),
+                ("used_at", models.DateTimeField()),
+                (
+                    "label_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="usages", to="label_types.spantype"
+                    ),
+                ),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="projects.project")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [models.Index(fields=["project", "user", "score"], name="spantypeusage_rank_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="spantypeusage",
+            constraint=models.UniqueConstraint(
+                fields=("user", "label_type"), name="label_types_spantypeusage_is_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="relationtypeusage",
+            index=models.Index(fields=["project", "user", "score"], name="relationtypeusage_rank_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="relationtypeusage",
+            constraint=models.UniqueConstraint(
+                fields=("user", "label_type"), name="label_types_relationtypeusage_is_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="categorytypeusage",
+            index=models.Index(fields=["project", "user", "score"], name="categorytypeusage_rank_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="categorytypeusage",
+            constraint=models.UniqueConstraint(
+                fields=("user", "label_type"), name="label_types_categorytypeusage_is_unique"
+            ),
+        ),
+    ]
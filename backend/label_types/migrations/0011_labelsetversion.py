@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import label_types.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+        ("label_types", "0010_labeltypeusage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LabelSetVersion",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=label_types.models.generate_initial_version)),
+                ("usage_version", models.PositiveBigIntegerField(default=label_types.models.generate_initial_version)),
+            ],
+        ),
+    ]
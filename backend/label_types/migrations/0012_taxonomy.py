@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("label_types", "0011_labelsetversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="categorytype",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="children",
+                to="label_types.categorytype",
+            ),
+        ),
+        migrations.AddField(
+            model_name="categorytype",
+            name="path",
+            field=models.CharField(blank=True, default="", editable=False, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name="spantype",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="children",
+                to="label_types.spantype",
+            ),
+        ),
+        migrations.AddField(
+            model_name="spantype",
+            name="path",
+            field=models.CharField(blank=True, default="", editable=False, max_length=1000),
+        ),
+        migrations.AddIndex(
+            model_name="categorytype",
+            index=models.Index(fields=["path"], name="categorytype_path_idx", opclasses=["varchar_pattern_ops"]),
+        ),
+        migrations.AddIndex(
+            model_name="spantype",
+            index=models.Index(fields=["path"], name="spantype_path_idx", opclasses=["varchar_pattern_ops"]),
+        ),
+    ]
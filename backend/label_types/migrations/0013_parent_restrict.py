@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("label_types", "0012_taxonomy"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="categorytype",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="children",
+                to="label_types.categorytype",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="spantype",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="children",
+                to="label_types.spantype",
+            ),
+        ),
+    ]
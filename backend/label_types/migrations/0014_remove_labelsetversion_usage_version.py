@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("label_types", "0013_parent_restrict"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="labelsetversion",
+            name="usage_version",
+        ),
+    ]
@@ -1,9 +1,22 @@
+import math
 import random
 import string
+from datetime import datetime, timedelta
+from typing import List, Optional
 
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
-
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+from .managers import (
+    HierarchicalLabelTypeManager,
+    LabelSetVersionManager,
+    LabelTypeManager,
+    LabelTypeUsageManager,
+)
 from projects.models import Project
 
 
@@ -12,6 +25,8 @@ def generate_random_hex_color():
 
 
 class LabelType(models.Model):
+    objects = LabelTypeManager()
+
     text = models.CharField(max_length=400, db_index=True)
     prefix_key = models.CharField(
         max_length=10,
@@ -29,6 +44,7 @@ class LabelType(models.Model):
     )
     background_color = models.CharField(max_length=7, default=generate_random_hex_color)
     text_color = models.CharField(max_length=7, default="#ffffff")
+    usage_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -39,6 +55,25 @@ class LabelType(models.Model):
     def labels(self):
         raise NotImplementedError()
 
+    def record_usage(self, user, used_at=None):
+        """Add one use of this label type to the user's ranking of recently used label types."""
+        return self.usages.model.objects.record(user, self, used_at=used_at)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.label_set_changed(self.project_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self.label_set_changed(self.project_id)
+            type(self).objects.filter(pk=self.pk).create_label_tombstones()
+            return super().delete(*args, **kwargs)
+
+    @staticmethod
+    def label_set_changed(project_id: int):
+        LabelSetVersion.objects.bump(project_id)
+
     def clean(self):
         # Don't allow shortcut key not to have a suffix key.
         if self.prefix_key and not self.suffix_key:
@@ -57,16 +92,84 @@ class LabelType(models.Model):
     class Meta:
         abstract = True
         constraints = [models.UniqueConstraint(fields=["project", "text"], name="%(app_label)s_%(class)s_is_unique")]
+        indexes = [models.Index(fields=["project", "usage_count"], name="%(class)s_usage_idx")]
         ordering = ["created_at"]
 
 
-class CategoryType(LabelType):
+class HierarchicalLabelType(LabelType):
+    """A label type which may be nested under another label type of the same project.
+
+    `path` materializes the ids of the ancestors, root first, as "1/5/". The subtree of a label type
+    is then a single prefix query on an index, and its ancestors a single primary key lookup.
+    """
+
+    PATH_SEPARATOR = "/"
+
+    objects = HierarchicalLabelTypeManager()
+
+    # The children are moved to the parent of a deleted label type, see `HierarchicalLabelTypeQuerySet.delete`.
+    parent = models.ForeignKey(to="self", on_delete=models.RESTRICT, null=True, blank=True, related_name="children")
+    path = models.CharField(max_length=1000, default="", blank=True, editable=False)
+
+    @property
+    def descendant_path(self) -> str:
+        """The path shared by the descendants of this label type."""
+        return f"{self.path}{self.pk}{self.PATH_SEPARATOR}"
+
+    @property
+    def ancestor_ids(self) -> List[int]:
+        return [int(pk) for pk in self.path.split(self.PATH_SEPARATOR) if pk]
+
+    @property
+    def depth(self) -> int:
+        return len(self.ancestor_ids)
+
+    def update_path(self):
+        self.path = self.parent.descendant_path if self.parent_id else ""
+
+    def get_ancestors(self) -> models.QuerySet:
+        """Return the ancestors, root first."""
+        return type(self).objects.filter(pk__in=self.ancestor_ids).order_by("path")
+
+    def get_descendants(self) -> models.QuerySet:
+        return type(self).objects.filter(project_id=self.project_id, path__startswith=self.descendant_path)
+
+    def is_descendant_of(self, other: "HierarchicalLabelType") -> bool:
+        return other.pk in self.ancestor_ids
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old_path = None
+            if self.pk is not None and not self._state.adding:
+                old_path = type(self).objects.filter(pk=self.pk).values_list("path", flat=True).first()
+            self.update_path()
+            super().save(*args, **kwargs)
+            if old_path is not None and old_path != self.path:
+                # Move the subtree along with this label type.
+                old_prefix = f"{old_path}{self.pk}{self.PATH_SEPARATOR}"
+                type(self).objects.filter(path__startswith=old_prefix).update(
+                    path=Concat(Value(self.descendant_path), Substr("path", len(old_prefix) + 1))
+                )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            type(self).objects.filter(pk=self.pk).reparent_children()
+            return super().delete(*args, **kwargs)
+
+    class Meta(LabelType.Meta):
+        abstract = True
+        indexes = LabelType.Meta.indexes + [
+            models.Index(fields=["path"], name="%(class)s_path_idx", opclasses=["varchar_pattern_ops"])
+        ]
+
+
+class CategoryType(HierarchicalLabelType):
     @property
     def labels(self):
         return CategoryType.objects.filter(project=self.project)
 
 
-class SpanType(LabelType):
+class SpanType(HierarchicalLabelType):
     @property
     def labels(self):
         return SpanType.objects.filter(project=self.project)
@@ -76,3 +179,68 @@ class RelationType(LabelType):
     @property
     def labels(self):
         return RelationType.objects.filter(project=self.project)
+
+
+def generate_initial_version():
+    # Start at random, so that a project reusing the id of a deleted one doesn't reuse its versions.
+    return random.getrandbits(48)
+
+
+class LabelSetVersion(models.Model):
+    """Version of the label types of a project, used for conditional requests and caching.
+
+    `version` changes on any write to the label types of the project, but not with their usage counts.
+    """
+
+    objects = LabelSetVersionManager()
+
+    project = models.OneToOneField(to=Project, on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveBigIntegerField(default=generate_initial_version)
+
+
+class LabelTypeUsage(models.Model):
+    """How often and how recently a user has used a label type.
+
+    `score` is log2 of the sum of 2 ** (t / HALF_LIFE) over the times t of the uses,
+    so ordering by it ranks label types by exponentially decayed frequency at any moment,
+    and recording a use only touches one row.
+    """
+
+    HALF_LIFE = timedelta(days=7)
+
+    objects = LabelTypeUsageManager()
+
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    score = models.FloatField()
+    used_at = models.DateTimeField()
+
+    @classmethod
+    def time_to_score(cls, time: datetime) -> float:
+        return time.timestamp() / cls.HALF_LIFE.total_seconds()
+
+    @staticmethod
+    def add_scores(a: float, b: float) -> float:
+        high, low = max(a, b), min(a, b)
+        return high + math.log2(1 + 2 ** (low - high))
+
+    def frequency(self, now: Optional[datetime] = None) -> float:
+        """The number of uses, each decayed by its age."""
+        return 2 ** (self.score - self.time_to_score(now or timezone.now()))
+
+    class Meta:
+        abstract = True
+        constraints = [models.UniqueConstraint(fields=["user", "label_type"], name="%(app_label)s_%(class)s_is_unique")]
+        indexes = [models.Index(fields=["project", "user", "score"], name="%(class)s_rank_idx")]
+
+
+class CategoryTypeUsage(LabelTypeUsage):
+    label_type = models.ForeignKey(to=CategoryType, on_delete=models.CASCADE, related_name="usages")
+
+
+class SpanTypeUsage(LabelTypeUsage):
+    label_type = models.ForeignKey(to=SpanType, on_delete=models.CASCADE, related_name="usages")
+
+
+class RelationTypeUsage(LabelTypeUsage):
+    label_type = models.ForeignKey(to=RelationType, on_delete=models.CASCADE, related_name="usages")
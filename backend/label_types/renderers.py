@@ -0,0 +1,32 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """Render the label types as parallel arrays instead of a list of objects."""
+
+    media_type = "application/vnd.doccano.compact+json"
+    format = "compact"
+
+
+class CompactMsgpackRenderer(BaseRenderer):
+    """Render the label types as parallel arrays encoded with MessagePack."""
+
+    media_type = "application/vnd.doccano.compact+msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, use_bin_type=True)
+
+
+# MessagePack is optional: without the package, only the compact JSON representation is offered.
+COMPACT_RENDERERS = [CompactJSONRenderer] + ([CompactMsgpackRenderer] if msgpack is not None else [])
+COMPACT_FORMATS = {renderer.format for renderer in COMPACT_RENDERERS}
@@ -0,0 +1,155 @@
+import bisect
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Iterator, List, Sequence, Set, Tuple, Type
+
+from django.db.models import QuerySet
+
+from .models import LabelSetVersion, LabelType
+
+# Fuzzy matching is only a fallback when the other rankings find few labels.
+FUZZY_MIN_RESULTS = 20
+FUZZY_THRESHOLD = 0.3
+# The indexes of the projects searched least recently are dropped past this number.
+MAX_INDEXES = 256
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of the text padded like pg_trgm, so that short words have trigrams too."""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class LabelSearchIndex:
+    """In-memory index over the label type texts of a project.
+
+    Matches are ranked as exact, then prefix, then substring, then fuzzy (trigram similarity).
+    """
+
+    def __init__(self, items: Sequence[Tuple[int, str]]):
+        # Order the labels by (length, text) once, so every group of matches is already sorted.
+        items = sorted(items, key=lambda item: (len(item[1]), item[1].lower(), item[0]))
+        self.ids = [pk for pk, _ in items]
+        self.texts = [text.lower() for _, text in items]
+        self.exact: Dict[str, List[int]] = defaultdict(list)
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.gram_counts: List[int] = []
+        for position, text in enumerate(self.texts):
+            self.exact[text].append(position)
+            grams = trigrams(text)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(position)
+        self.sorted_texts = sorted((text, position) for position, text in enumerate(self.texts))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _prefix(self, query: str) -> List[int]:
+        start = bisect.bisect_left(self.sorted_texts, (query, -1))
+        end = bisect.bisect_left(self.sorted_texts, (query + "\uffff", -1))
+        return sorted(position for _, position in self.sorted_texts[start:end])
+
+    def _substring(self, query: str) -> List[int]:
+        grams = trigrams(query)
+        # Only the inner trigrams of the query are guaranteed to occur inside a longer text.
+        inner = {gram for gram in grams if " " not in gram}
+        if not inner:
+            return [position for position, text in enumerate(self.texts) if query in text]
+        postings = sorted((self.postings.get(gram, []) for gram in inner), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+        return sorted(position for position in candidates if query in self.texts[position])
+
+    def _fuzzy(self, query: str) -> List[int]:
+        grams = trigrams(query)
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, []))
+        scores = []
+        for position, count in shared.items():
+            # Jaccard similarity of the trigram sets.
+            similarity = count / (len(grams) + self.gram_counts[position] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                scores.append((-similarity, position))
+        return [position for _, position in sorted(scores)]
+
+    def search(self, query: str) -> List[int]:
+        """Return the ids of the matching label types, best match first."""
+        query = query.strip().lower()
+        if not query:
+            return list(self.ids)
+        seen: Set[int] = set()
+        ranked: List[int] = []
+        groups = [self.exact.get(query, []), self._prefix(query), self._substring(query)]
+        for group in groups:
+            for position in group:
+                if position not in seen:
+                    seen.add(position)
+                    ranked.append(position)
+        if len(ranked) < FUZZY_MIN_RESULTS:
+            ranked.extend(position for position in self._fuzzy(query) if position not in seen)
+        return [self.ids[position] for position in ranked]
+
+
+class SearchResult(Sequence):
+    """Ranked label types, loaded from the database only for the requested slice.
+
+    It supports `len()` and slicing, which is all the paginators need.
+    """
+
+    def __init__(self, queryset: QuerySet, ids: List[int]):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            ids = self.ids[item]
+            objects = self.queryset.in_bulk(ids)
+            return [objects[pk] for pk in ids if pk in objects]
+        return self.queryset.get(pk=self.ids[item])
+
+    def __iter__(self) -> Iterator:
+        return iter(self[:])
+
+
+_lock = threading.Lock()
+_indexes: "OrderedDict[Tuple[str, int], Tuple[int, LabelSearchIndex]]" = OrderedDict()
+
+
+def get_index(model: Type[LabelType], project_id: int) -> LabelSearchIndex:
+    """Return the search index of the project, building it if the label set version changed."""
+    # Read the version before the labels, so that the index is never older than its version.
+    version = LabelSetVersion.objects.get_version(project_id)
+    key = (model._meta.label_lower, project_id)
+    with _lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            _indexes.move_to_end(key)
+            return cached[1]
+    items = model.objects.filter(project_id=project_id).values_list("id", "text")
+    index = LabelSearchIndex(list(items))
+    with _lock:
+        _indexes[key] = (version, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def search_label_types(queryset: QuerySet, project_id: int, query: str, scoped: bool = False) -> SearchResult:
+    """Search the label types of the project, ranked by relevance.
+
+    The index covers the whole project. If the queryset is `scoped` to a part of it, e.g. a subtree,
+    the matches are restricted to the label types in the queryset.
+    """
+    index = get_index(queryset.model, project_id)
+    ids = index.search(query)
+    if scoped:
+        allowed = set(queryset.values_list("pk", flat=True))
+        ids = [pk for pk in ids if pk in allowed]
+    return SearchResult(queryset, ids)
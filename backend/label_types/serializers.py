@@ -39,6 +39,21 @@ class LabelSerializer(serializers.ModelSerializer):
 
         return super().validate(attrs)
 
+    def validate_parent(self, parent):
+        if parent is None:
+            return parent
+        try:
+            project_id = self.context["request"].parser_context["kwargs"]["project_id"]
+        except (AttributeError, KeyError):
+            project_id = self.context.get("project_id")
+        if project_id is not None and parent.project_id != int(project_id):
+            raise ValidationError("The parent must belong to the same project.")
+        if self.instance is not None and (parent.pk == self.instance.pk or parent.is_descendant_of(self.instance)):
+            raise ValidationError("A label type may not be nested under itself.")
+        if len(parent.descendant_path) > parent._meta.get_field("path").max_length:
+            raise ValidationError("The label type is nested too deeply.")
+        return parent
+
     class Meta:
         model = LabelType
         fields = (
@@ -54,13 +69,13 @@ class LabelSerializer(serializers.ModelSerializer):
 class CategoryTypeSerializer(LabelSerializer):
     class Meta:
         model = CategoryType
-        fields = LabelSerializer.Meta.fields
+        fields = LabelSerializer.Meta.fields + ("parent",)
 
 
 class SpanTypeSerializer(LabelSerializer):
     class Meta:
         model = SpanType
-        fields = LabelSerializer.Meta.fields
+        fields = LabelSerializer.Meta.fields + ("parent",)
 
 
 class RelationTypeSerializer(serializers.ModelSerializer):
@@ -1,9 +1,19 @@
+from io import StringIO
+
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
 from model_mommy import mommy
 
-from label_types.models import CategoryType, generate_random_hex_color
+from label_types.models import (
+    CategoryType,
+    SpanType,
+    SpanTypeUsage,
+    generate_random_hex_color,
+)
+from labels.models import Category, Span
 
 
 class TestLabel(TestCase):
@@ -54,3 +64,150 @@ class TestGeneratedColor(TestCase):
         for _ in range(100):
             color = generate_random_hex_color()
             self.assertEqual(len(color), 7)
+
+
+class TestUsageCount(TestCase):
+    def setUp(self):
+        self.project = mommy.make("SequenceLabelingProject", allow_overlapping=True)
+        self.example = mommy.make("Example", project=self.project)
+        self.span_type = mommy.make("SpanType", project=self.project)
+        self.relation_type = mommy.make("RelationType", project=self.project)
+        self.user = mommy.make("User")
+
+    def make_span(self, **kwargs):
+        return mommy.make("Span", example=self.example, label=self.span_type, start_offset=0, end_offset=1, **kwargs)
+
+    def assert_usage(self, label_type, expected):
+        label_type.refresh_from_db()
+        self.assertEqual(label_type.usage_count, expected)
+
+    def test_create_increments_usage(self):
+        self.make_span()
+        self.assert_usage(self.span_type, 1)
+
+    def test_bulk_create_increments_usage(self):
+        spans = [
+            Span(example=self.example, label=self.span_type, user=self.user, start_offset=0, end_offset=1)
+            for _ in range(3)
+        ]
+        Span.objects.bulk_create(spans)
+        self.assert_usage(self.span_type, 3)
+
+    def test_update_moves_usage(self):
+        span = self.make_span()
+        other_type = mommy.make("SpanType", project=self.project)
+        span.label = other_type
+        span.save()
+        self.assert_usage(self.span_type, 0)
+        self.assert_usage(other_type, 1)
+
+    def test_delete_decrements_usage(self):
+        span = self.make_span()
+        span.delete()
+        self.assert_usage(self.span_type, 0)
+
+    def test_queryset_delete_decrements_usage_of_dependent_relations(self):
+        from_span = self.make_span()
+        to_span = self.make_span()
+        mommy.make("Relation", from_id=from_span, to_id=to_span, type=self.relation_type, example=self.example)
+        Span.objects.filter(example=self.example).delete()
+        self.assert_usage(self.span_type, 0)
+        self.assert_usage(self.relation_type, 0)
+
+    def test_user_delete_decrements_usage(self):
+        from_span = self.make_span(user=self.user)
+        to_span = self.make_span(user=self.user)
+        mommy.make("Relation", from_id=from_span, to_id=to_span, type=self.relation_type, example=self.example)
+        mommy.make(
+            "Relation", from_id=from_span, to_id=to_span, type=self.relation_type, example=self.example, user=self.user
+        )
+        self.make_span()
+        self.user.delete()
+        self.assert_usage(self.span_type, 1)
+        self.assert_usage(self.relation_type, 0)
+
+    def test_rebuild_usage_count(self):
+        self.make_span()
+        SpanType.objects.update(usage_count=100)
+        SpanType.objects.filter(project=self.project).rebuild_usage_count()
+        self.assert_usage(self.span_type, 1)
+
+
+class TestRebuildLabelUsageCommand(TestCase):
+    def test_rebuild_usage_count(self):
+        span = mommy.make("Span", start_offset=0, end_offset=1)
+        SpanType.objects.update(usage_count=0)
+        call_command("rebuild_label_usage", stdout=StringIO())
+        span.label.refresh_from_db()
+        self.assertEqual(span.label.usage_count, 1)
+
+
+class TestLabelTypeUsage(TestCase):
+    def test_frequency_decays_by_half_life(self):
+        label_type = mommy.make("SpanType")
+        user = mommy.make("User")
+        now = timezone.now()
+        label_type.record_usage(user, used_at=now)
+        usage = label_type.record_usage(user, used_at=now - SpanTypeUsage.HALF_LIFE)
+        self.assertAlmostEqual(usage.frequency(now), 1.5)
+        self.assertEqual(usage.used_at, now)
+
+
+class TestTaxonomy(TestCase):
+    def setUp(self):
+        self.project = mommy.make("Project")
+        self.root = mommy.make("CategoryType", project=self.project)
+        self.child = mommy.make("CategoryType", project=self.project, parent=self.root)
+        self.grandchild = mommy.make("CategoryType", project=self.project, parent=self.child)
+
+    def test_path_materializes_ancestors(self):
+        self.assertEqual(self.root.path, "")
+        self.assertEqual(self.grandchild.path, f"{self.root.id}/{self.child.id}/")
+        self.assertEqual(self.grandchild.depth, 2)
+
+    def test_get_descendants_and_ancestors(self):
+        self.assertEqual(list(self.root.get_descendants()), [self.child, self.grandchild])
+        self.assertEqual(list(self.grandchild.get_ancestors()), [self.root, self.child])
+
+    def test_moving_updates_subtree(self):
+        other = mommy.make("CategoryType", project=self.project)
+        self.child.parent = other
+        self.child.save()
+        self.grandchild.refresh_from_db()
+        self.assertEqual(self.grandchild.path, f"{other.id}/{self.child.id}/")
+        self.assertFalse(self.root.get_descendants().exists())
+
+    def test_bulk_create_sets_path(self):
+        (label_type,) = CategoryType.objects.bulk_create([CategoryType(project=self.project, parent=self.child)])
+        self.assertEqual(label_type.path, self.grandchild.path)
+
+    def test_delete_moves_children_to_parent(self):
+        category = mommy.make("Category", label=self.grandchild)
+        self.child.delete()
+        self.grandchild.refresh_from_db()
+        self.assertEqual(self.grandchild.parent, self.root)
+        self.assertEqual(self.grandchild.path, f"{self.root.id}/")
+        self.assertTrue(Category.objects.filter(pk=category.pk).exists())
+
+    def test_delete_queryset_keeps_moved_children(self):
+        CategoryType.objects.filter(parent=self.root).delete()
+        self.grandchild.refresh_from_db()
+        self.assertEqual(self.grandchild.parent, self.root)
+        self.assertEqual(list(self.root.get_descendants()), [self.grandchild])
+
+    def test_delete_nested_label_types(self):
+        CategoryType.objects.filter(pk__in=[self.root.pk, self.child.pk]).delete()
+        self.grandchild.refresh_from_db()
+        self.assertIsNone(self.grandchild.parent)
+        self.assertEqual(self.grandchild.path, "")
+
+    def test_delete_project_removes_taxonomy(self):
+        self.project.delete()
+        self.assertFalse(CategoryType.objects.filter(pk=self.grandchild.pk).exists())
+
+    def test_clone_copies_taxonomy(self):
+        project = self.project.clone()
+        grandchild = CategoryType.objects.get(project=project, text=self.grandchild.text)
+        ancestors = [label_type.text for label_type in grandchild.get_ancestors()]
+        self.assertEqual(ancestors, [self.root.text, self.child.text])
+        self.assertTrue(all(ancestor.project == project for ancestor in grandchild.get_ancestors()))
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from api.tests.utils import CRUDMixin
+from label_types import search
+from label_types.models import SpanType
+from label_types.search import LabelSearchIndex, get_index
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestLabelSearchIndex(TestCase):
+    def setUp(self):
+        texts = ["location", "Loc", "allocation", "person", "organization", "locomotive", "lokation"]
+        self.ids = {text: i for i, text in enumerate(texts)}
+        self.index = LabelSearchIndex([(i, text) for text, i in self.ids.items()])
+
+    def search(self, query):
+        inverse = {i: text for text, i in self.ids.items()}
+        return [inverse[i] for i in self.index.search(query)]
+
+    def test_ranks_exact_prefix_substring_then_fuzzy(self):
+        self.assertEqual(self.search("loc"), ["Loc", "location", "locomotive", "allocation"])
+        self.assertEqual(self.search("location")[:2], ["location", "allocation"])
+        self.assertIn("lokation", self.search("location"))
+
+    def test_short_query_matches_substring(self):
+        self.assertEqual(self.search("rs"), ["person"])
+
+    def test_empty_query_returns_all(self):
+        self.assertEqual(len(self.search(" ")), len(self.ids))
+
+
+class TestIndexInvalidation(TestCase):
+    def setUp(self):
+        self.project = mommy.make("Project")
+
+    def test_rebuilds_after_write(self):
+        self.assertEqual(len(get_index(SpanType, self.project.id)), 0)
+        label = mommy.make("SpanType", project=self.project, text="person")
+        self.assertEqual(get_index(SpanType, self.project.id).search("person"), [label.id])
+        SpanType.objects.filter(pk=label.pk).delete()
+        self.assertEqual(len(get_index(SpanType, self.project.id)), 0)
+        SpanType.objects.bulk_create([SpanType(project=self.project, text="place")])
+        self.assertEqual(len(get_index(SpanType, self.project.id)), 1)
+
+    def test_drops_least_recently_used_index(self):
+        projects = [mommy.make("Project") for _ in range(3)]
+        with patch.object(search, "_indexes", search.OrderedDict()), patch.object(search, "MAX_INDEXES", 2):
+            for project in projects:
+                get_index(SpanType, project.id)
+            get_index(SpanType, projects[1].id)
+            get_index(SpanType, projects[0].id)
+            self.assertEqual([project_id for _, project_id in search._indexes], [projects[1].id, projects[0].id])
+
+
+class TestLabelSearchAPI(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        for text in ["allocation", "location", "loc", "person"]:
+            mommy.make("SpanType", project=cls.project.item, text=text)
+        cls.url = reverse(viewname="span_types", args=[cls.project.item.id]) + "?q=loc&limit=2"
+
+    def test_returns_ranked_page(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual([label["text"] for label in response.data["results"]], ["loc", "location"])
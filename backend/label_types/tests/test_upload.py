@@ -0,0 +1,72 @@
+import io
+import os
+
+from django.test import TestCase
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from label_types.models import CategoryType
+from label_types.serializers import CategoryTypeSerializer
+from label_types.upload import LabelTypeUploader, iter_json_array
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+class TestIterJsonArray(TestCase):
+    def parse(self, text, chunk_size=3):
+        return list(iter_json_array(io.BytesIO(text.encode()), chunk_size=chunk_size))
+
+    def test_yields_elements_across_chunks(self):
+        text = ' [ {"text": "dög"}, 12345, "a,b", [1, 2] ] '
+        self.assertEqual(self.parse(text), [{"text": "dög"}, 12345, "a,b", [1, 2]])
+
+    def test_empty_array(self):
+        self.assertEqual(self.parse("[ ]"), [])
+
+    def test_raises_on_invalid_array(self):
+        for text in ['{"text": "dog"}', '[{"text": "dog"} {"text": "cat"}]', '[{"text": "dog"},', "[1, 2", "[1] 2"]:
+            with self.assertRaises(ValueError):
+                self.parse(text)
+
+
+class TestLabelTypeUploader(TestCase):
+    def setUp(self):
+        self.project = mommy.make("Project")
+        mommy.make("CategoryType", project=self.project, text="Dog", prefix_key=None, suffix_key="a")
+
+    def upload(self, text, batch_size=2):
+        uploader = LabelTypeUploader(self.project.id, CategoryTypeSerializer, batch_size=batch_size)
+        return uploader.upload(io.BytesIO(text.encode()))
+
+    def test_reports_created_skipped_and_invalid_rows(self):
+        report = self.upload(
+            '[{"text": "Cat"}, {"text": "Dog"}, {"text": "Cat"}, {"text": "Bird", "suffixKey": "a"},'
+            ' {"text": ""}, {"text": "Fish"}, {"text": "Cow"}]'
+        )
+        self.assertEqual((report["created"], report["skipped"], report["invalid"]), (3, 2, 2))
+        self.assertEqual([row["status"] for row in report["rows"]][:4], ["created", "skipped", "skipped", "invalid"])
+        texts = set(CategoryType.objects.filter(project=self.project).values_list("text", flat=True))
+        self.assertEqual(texts, {"Dog", "Cat", "Fish", "Cow"})
+
+    def test_keeps_rows_before_syntax_error(self):
+        report = self.upload('[{"text": "Cat"}, {"text": "Fish"}, {"text": "Cow"} {')
+        self.assertIsNotNone(report["error"])
+        self.assertEqual(CategoryType.objects.filter(project=self.project).count(), 4)
+
+
+class TestStreamingLabelUploadAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        cls.url = reverse(viewname="category_type_upload", args=[cls.project.item.id]) + "?mode=stream"
+
+    def test_skips_duplicates_instead_of_failing(self):
+        self.client.force_login(self.project.admin)
+        with open(os.path.join(DATA_DIR, "invalid_labels.json"), "rb") as f:
+            response = self.client.post(self.url, data={"file": f})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["skipped"]), (1, 1))
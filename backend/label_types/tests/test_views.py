@@ -1,12 +1,22 @@
+import json
 import os
+import time
+from datetime import timedelta
+from unittest.mock import patch
 
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from .utils import make_label
 from api.tests.utils import CRUDMixin
+from label_types import renderers
+from label_types.views import LABEL_USAGE_INTERVAL, LabelPagination, parse_limit
 from projects.models import ProjectType
 from projects.tests.utils import make_project, prepare_project
 from users.tests.utils import make_user
@@ -127,6 +137,177 @@ class TestLabelDetailAPI(CRUDMixin):
         self.assert_delete(expected=status.HTTP_403_FORBIDDEN)
 
 
+class TestRecentLabelList(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        cls.labels = [make_label(cls.project.item) for _ in range(3)]
+        cls.url = reverse(viewname="span_types_recent", args=[cls.project.item.id])
+        now = timezone.now()
+        user = cls.project.admin
+        # an old label used often, a recent label used once, and a label used by another user.
+        for _ in range(3):
+            cls.labels[0].record_usage(user=user, used_at=now - timedelta(days=30))
+        cls.labels[1].record_usage(user=user, used_at=now)
+        cls.labels[2].record_usage(user=cls.project.annotator, used_at=now)
+
+    def test_returns_labels_ranked_by_decayed_frequency(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual([label["id"] for label in response.data], [self.labels[1].id, self.labels[0].id])
+
+    def test_denies_non_project_member(self):
+        self.assert_fetch(make_user(), status.HTTP_403_FORBIDDEN)
+
+    def test_limits_labels(self):
+        self.client.force_login(self.project.admin)
+        response = self.client.get(self.url, {"limit": 1})
+        self.assertEqual([label["id"] for label in response.data], [self.labels[1].id])
+
+    def test_rejects_invalid_limit(self):
+        self.client.force_login(self.project.admin)
+        popular_url = reverse(viewname="span_types_popular", args=[self.project.item.id])
+        for url in [self.url, popular_url]:
+            for limit in ["abc", "-1"]:
+                response = self.client.get(url, {"limit": limit})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_clamps_limit(self):
+        self.assertEqual(parse_limit({"limit": "100000"}), LabelPagination.max_limit)
+
+
+class TestConditionalLabelList(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        cls.label = make_label(cls.project.item)
+        cls.url = reverse(viewname="span_types", args=[cls.project.item.id]) + "?no_page=true"
+
+    def setUp(self):
+        self.client.force_login(self.project.admin)
+        self.etag = self.client.get(self.url)["ETag"]
+
+    def test_returns_not_modified_if_label_set_is_unchanged(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any("label_types_spantype" in query["sql"] for query in context.captured_queries))
+
+    def test_returns_labels_if_label_set_is_changed(self):
+        make_label(self.project.item, text="new")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], self.etag)
+        self.assertEqual(len(response.data), 2)
+
+    def test_annotation_does_not_change_label_list_version(self):
+        url = self.url + "&ordering=text"
+        etag = self.client.get(url)["ETag"]
+        mommy.make("Span", label=self.label, start_offset=0, end_offset=1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_annotation_does_not_write_label_set_version(self):
+        with CaptureQueriesContext(connection) as context:
+            mommy.make("Span", label=self.label, start_offset=0, end_offset=1)
+        self.assertFalse(any("label_types_labelsetversion" in query["sql"] for query in context.captured_queries))
+
+    def test_refresh_label_list_ordered_by_usage_once_per_interval(self):
+        # The default ordering ranks the label types by their usage counts.
+        now = time.time()
+        with patch("label_types.views.time.time", return_value=now):
+            etag = self.client.get(self.url)["ETag"]
+            mommy.make("Span", label=self.label, start_offset=0, end_offset=1)
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with patch("label_types.views.time.time", return_value=now + LABEL_USAGE_INTERVAL):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_refresh_popular_labels_once_per_interval(self):
+        url = reverse(viewname="span_types_popular", args=[self.project.item.id])
+        now = time.time()
+        with patch("label_types.views.time.time", return_value=now):
+            etag = self.client.get(url)["ETag"]
+        mommy.make("Span", label=self.label, start_offset=0, end_offset=1)
+        with patch("label_types.views.time.time", return_value=now + LABEL_USAGE_INTERVAL):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestCompactLabelList(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        cls.labels = [make_label(cls.project.item, text=text) for text in ["b", "a"]]
+        cls.url = reverse(viewname="span_types", args=[cls.project.item.id])
+
+    def test_returns_parallel_arrays(self):
+        self.url += "?format=compact"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/vnd.doccano.compact+json")
+        data = json.loads(response.content)
+        self.assertEqual(data["text"], ["a", "b"])
+        self.assertEqual(data["id"], [self.labels[1].id, self.labels[0].id])
+        self.assertEqual(data["usage_count"], [0, 0])
+
+    def test_negotiates_msgpack_from_accept_header(self):
+        msgpack = renderers.msgpack
+        if msgpack is None:
+            self.skipTest("msgpack is not installed")
+        self.client.force_login(self.project.admin)
+        response = self.client.get(self.url, HTTP_ACCEPT="application/vnd.doccano.compact+msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(msgpack.unpackb(response.content)["text"], ["a", "b"])
+
+
+class TestLabelTree(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        cls.animal = make_label(cls.project.item, text="animal")
+        cls.cat = make_label(cls.project.item, text="cat", parent=cls.animal)
+        cls.lion = make_label(cls.project.item, text="lion", parent=cls.cat)
+        cls.catalog = make_label(cls.project.item, text="catalog")
+
+    def fetch(self, viewname, label_type, query=""):
+        self.url = reverse(viewname=viewname, args=[self.project.item.id, label_type.id]) + query
+        response = self.assert_fetch(self.project.annotator, status.HTTP_200_OK)
+        data = response.data["results"] if "results" in response.data else response.data
+        return [label_type["text"] for label_type in data]
+
+    def test_returns_children(self):
+        self.assertEqual(self.fetch("category_type_children", self.animal), ["cat"])
+
+    def test_returns_subtree(self):
+        self.assertEqual(self.fetch("category_type_subtree", self.animal), ["cat", "lion"])
+
+    def test_returns_ancestors(self):
+        self.assertEqual(self.fetch("category_type_ancestors", self.lion), ["animal", "cat"])
+
+    def test_returns_roots(self):
+        self.url = reverse(viewname="category_types", args=[self.project.item.id]) + "?parent=root&ordering=text"
+        response = self.assert_fetch(self.project.annotator, status.HTTP_200_OK)
+        self.assertEqual([label_type["text"] for label_type in response.data["results"]], ["animal", "catalog"])
+
+    def test_search_is_scoped_to_subtree(self):
+        self.url = reverse(viewname="category_types", args=[self.project.item.id])
+        self.url += f"?q=cat&subtree={self.animal.id}"
+        response = self.assert_fetch(self.project.annotator, status.HTTP_200_OK)
+        self.assertEqual([label_type["text"] for label_type in response.data["results"]], ["cat"])
+
+    def test_denies_nesting_under_itself(self):
+        self.url = reverse(viewname="category_type", args=[self.project.item.id, self.animal.id])
+        self.data = {"parent": self.lion.id}
+        self.assert_update(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_denies_parent_of_other_project(self):
+        other = make_label(prepare_project(ProjectType.DOCUMENT_CLASSIFICATION).item)
+        self.url = reverse(viewname="category_type", args=[self.project.item.id, self.cat.id])
+        self.data = {"parent": other.id}
+        self.assert_update(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+
 class TestLabelUploadAPI(APITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -0,0 +1,119 @@
+import codecs
+import re
+from typing import IO, Any, Dict, Iterator, List, Set, Tuple, Type
+
+from rest_framework.serializers import ModelSerializer
+
+from .serializers import (
+    CategoryTypeSerializer,
+    RelationTypeSerializer,
+    SpanTypeSerializer,
+)
+from data_import.pipeline.parsers import JSONArrayStream
+
+CHUNK_SIZE = 64 * 1024
+
+CREATED = "created"
+SKIPPED = "skipped"
+INVALID = "invalid"
+
+SERIALIZERS: Dict[str, Type[ModelSerializer]] = {
+    serializer.Meta.model._meta.model_name: serializer  # type: ignore
+    for serializer in [CategoryTypeSerializer, SpanTypeSerializer, RelationTypeSerializer]
+}
+
+
+def camel_to_snake(name):
+    name = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", name).lower()
+
+
+def camel_to_snake_dict(d):
+    return {camel_to_snake(k): v for k, v in d.items()}
+
+
+def iter_json_array(file: IO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a JSON array one by one, reading the file in chunks.
+
+    Raises:
+        ValueError: if the file is not a valid JSON array.
+    """
+    stream = JSONArrayStream(codecs.getreader("utf-8-sig")(file), chunk_size=chunk_size)
+    for index, _, element, error in stream:
+        if error is not None:
+            raise ValueError(f"Element {index}: {error}")
+        yield element
+
+
+class LabelTypeUploader:
+    """Upload label types from a JSON array without loading it at once.
+
+    Rows are validated in memory against the texts and shortcut keys already in the project,
+    and inserted in batches. Duplicated texts are skipped instead of failing the whole upload.
+    """
+
+    def __init__(self, project_id: int, serializer_class: Type[ModelSerializer], batch_size: int = 1000):
+        self.project_id = project_id
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model  # type: ignore
+        self.batch_size = batch_size
+        existing = self.model.objects.filter(project_id=project_id).values_list("text", "prefix_key", "suffix_key")
+        self.texts: Set[str] = set()
+        self.shortcuts: Set[Tuple[str, str]] = set()
+        for text, prefix_key, suffix_key in existing:
+            self.texts.add(text)
+            if suffix_key:
+                self.shortcuts.add((prefix_key, suffix_key))
+
+    def validate(self, row: Any) -> Tuple[str, Any]:
+        """Return the status of the row, and the errors or the validated data."""
+        if not isinstance(row, dict):
+            return INVALID, {"non_field_errors": ["The row must be an object."]}
+        # The serializer gets no request, so it doesn't query the shortcut keys per row.
+        serializer = self.serializer_class(data=camel_to_snake_dict(row), context={"project_id": self.project_id})
+        if not serializer.is_valid():
+            return INVALID, serializer.errors
+        data = serializer.validated_data
+        if data["text"] in self.texts:
+            return SKIPPED, None
+        shortcut = (data.get("prefix_key"), data.get("suffix_key"))
+        if shortcut[1] and shortcut in self.shortcuts:
+            return INVALID, {"non_field_errors": ["Duplicate shortcut key."]}
+        self.texts.add(data["text"])
+        if shortcut[1]:
+            self.shortcuts.add(shortcut)
+        return CREATED, data
+
+    def save(self, batch: List[Dict]):
+        labels = [self.model(project_id=self.project_id, **data) for data in batch]
+        self.model.objects.bulk_create(labels, ignore_conflicts=True)
+
+    def upload(self, file: IO) -> Dict[str, Any]:
+        """Upload the label types in the file.
+
+        Returns:
+            the number of created, skipped and invalid rows, and the status of each row.
+            If the file is malformed, the rows before the error are kept and `error` is set.
+        """
+        report: Dict[str, Any] = {CREATED: 0, SKIPPED: 0, INVALID: 0, "rows": [], "error": None}
+        batch: List[Dict] = []
+        try:
+            for index, row in enumerate(iter_json_array(file)):
+                status, detail = self.validate(row)
+                report[status] += 1
+                result = {"index": index, "status": status}
+                if status == INVALID:
+                    result["errors"] = detail
+                else:
+                    result["text"] = row.get("text")
+                if status == CREATED:
+                    batch.append(detail)
+                report["rows"].append(result)
+                if len(batch) >= self.batch_size:
+                    self.save(batch)
+                    batch = []
+        except ValueError as e:
+            report["error"] = str(e)
+        if batch:
+            self.save(batch)
+        return report
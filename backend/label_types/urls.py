@@ -4,28 +4,66 @@ from .views import (
     CategoryTypeDetail,
     CategoryTypeList,
     CategoryTypePopular,
+    CategoryTypeRecent,
+    CategoryTypeTree,
     CategoryTypeUploadAPI,
     RelationTypeDetail,
     RelationTypeList,
     RelationTypePopular,
+    RelationTypeRecent,
     RelationTypeUploadAPI,
     SpanTypeDetail,
     SpanTypeList,
     SpanTypePopular,
+    SpanTypeRecent,
+    SpanTypeTree,
     SpanTypeUploadAPI,
 )
 
 urlpatterns = [
     path(route="category-types", view=CategoryTypeList.as_view(), name="category_types"),
     path(route="category-types/popular", view=CategoryTypePopular.as_view(), name="category_types_popular"),
+    path(route="category-types/recent", view=CategoryTypeRecent.as_view(), name="category_types_recent"),
     path(route="category-types/<int:label_id>", view=CategoryTypeDetail.as_view(), name="category_type"),
+    path(
+        route="category-types/<int:label_id>/children",
+        view=CategoryTypeTree.as_view(relation="children"),
+        name="category_type_children",
+    ),
+    path(
+        route="category-types/<int:label_id>/subtree",
+        view=CategoryTypeTree.as_view(relation="subtree"),
+        name="category_type_subtree",
+    ),
+    path(
+        route="category-types/<int:label_id>/ancestors",
+        view=CategoryTypeTree.as_view(relation="ancestors"),
+        name="category_type_ancestors",
+    ),
     path(route="span-types", view=SpanTypeList.as_view(), name="span_types"),
     path(route="span-types/popular", view=SpanTypePopular.as_view(), name="span_types_popular"),
+    path(route="span-types/recent", view=SpanTypeRecent.as_view(), name="span_types_recent"),
     path(route="span-types/<int:label_id>", view=SpanTypeDetail.as_view(), name="span_type"),
+    path(
+        route="span-types/<int:label_id>/children",
+        view=SpanTypeTree.as_view(relation="children"),
+        name="span_type_children",
+    ),
+    path(
+        route="span-types/<int:label_id>/subtree",
+        view=SpanTypeTree.as_view(relation="subtree"),
+        name="span_type_subtree",
+    ),
+    path(
+        route="span-types/<int:label_id>/ancestors",
+        view=SpanTypeTree.as_view(relation="ancestors"),
+        name="span_type_ancestors",
+    ),
     path(route="category-type-upload", view=CategoryTypeUploadAPI.as_view(), name="category_type_upload"),
     path(route="span-type-upload", view=SpanTypeUploadAPI.as_view(), name="span_type_upload"),
     path(route="relation-type-upload", view=RelationTypeUploadAPI.as_view(), name="relation_type-upload"),
     path(route="relation-types", view=RelationTypeList.as_view(), name="relation_types_list"),
     path(route="relation-types/popular", view=RelationTypePopular.as_view(), name="relation_types_popular"),
+    path(route="relation-types/recent", view=RelationTypeRecent.as_view(), name="relation_types_recent"),
     path(route="relation-types/<int:label_id>", view=RelationTypeDetail.as_view(), name="relation_type_detail"),
 ]
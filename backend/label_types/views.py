@@ -1,41 +1,86 @@
+import hashlib
 import json
-import re
+import time
+import uuid
+from typing import Dict, List
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.db import IntegrityError, transaction
-from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
-from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from .celery_tasks import upload_label_types
 from .exceptions import LabelValidationError
-from .models import CategoryType, LabelType, RelationType, SpanType
+from .models import (
+    CategoryType,
+    CategoryTypeUsage,
+    HierarchicalLabelType,
+    LabelSetVersion,
+    LabelType,
+    LabelTypeUsage,
+    RelationType,
+    RelationTypeUsage,
+    SpanType,
+    SpanTypeUsage,
+)
+from .renderers import COMPACT_FORMATS, COMPACT_RENDERERS
+from .search import SearchResult, search_label_types
 from .serializers import (
     CategoryTypeSerializer,
     LabelSerializer,
     RelationTypeSerializer,
     SpanTypeSerializer,
 )
-from projects.models import Project
+from .upload import LabelTypeUploader, camel_to_snake_dict
+from projects.context import get_project_context
 from projects.permissions import (
     IsProjectAdmin,
     IsProjectMember,
     IsProjectStaffAndReadOnly,
 )
 
+LABEL_LIST_CACHE_TIMEOUT = 60 * 60
+# The views depending on the usage counts are refreshed at most once per this many seconds.
+LABEL_USAGE_INTERVAL = 60
+COMPACT_FIELDS = ["id", "text", "prefix_key", "suffix_key", "background_color", "text_color", "usage_count"]
+
+
+class ConditionalLabelMixin:
+    """Answer conditional GET requests from the label set version of the project.
+
+    The ETag is derived from the version, so a 304 is returned without touching the label tables.
+    The usage counts change with every annotation, so the views depending on them, e.g. ranking by usage,
+    are also versioned by the current window of `LABEL_USAGE_INTERVAL` seconds instead of by each change.
+    """
 
-def camel_to_snake(name):
-    name = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
-    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", name).lower()
+    depends_on_usage = False
 
+    def get_etag(self, request) -> str:
+        version = LabelSetVersion.objects.get_version(self.kwargs["project_id"])
+        parts = [type(self).__name__, str(version), request.get_full_path(), request.META.get("HTTP_ACCEPT", "")]
+        if self.depends_on_usage:
+            parts.append(str(int(time.time() // LABEL_USAGE_INTERVAL)))
+        return quote_etag(hashlib.md5("|".join(parts).encode()).hexdigest())
 
-def camel_to_snake_dict(d):
-    return {camel_to_snake(k): v for k, v in d.items()}
+    def get(self, request, *args, **kwargs):
+        self.etag = self.get_etag(request)
+        if self.etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": self.etag})
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = self.etag
+        return response
 
 
 class LabelPagination(LimitOffsetPagination):
@@ -43,17 +88,31 @@ class LabelPagination(LimitOffsetPagination):
     max_limit = 1000
 
 
-class LabelList(generics.ListCreateAPIView):
+def parse_limit(query_params, default: int = LabelPagination.default_limit) -> int:
+    """Return the `limit` query parameter of the unpaginated label lists, clamped to `LabelPagination.max_limit`."""
+    value = query_params.get("limit")
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ValidationError({"limit": "The limit must be a non-negative integer."})
+    return min(limit, LabelPagination.max_limit)
+
+
+class LabelList(ConditionalLabelMixin, generics.ListCreateAPIView):
     model = LabelType
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + COMPACT_RENDERERS
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     serializer_class = LabelSerializer
     pagination_class = LabelPagination
-    search_fields = ['text']
     ordering_fields = ['created_at', 'text', 'usage_count']
     ordering = ['-usage_count', 'text']
 
     def get_permissions(self):
-        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
         # Allow all project members to read labels (GET)
         if self.request.method in ["GET", "HEAD", "OPTIONS"]:
             self.permission_classes = [IsAuthenticated & IsProjectMember]
@@ -66,24 +125,82 @@ class LabelList(generics.ListCreateAPIView):
         return super().get_permissions()
 
     def get_queryset(self):
-        queryset = self.model.objects.filter(project=self.kwargs["project_id"])
-        
-        # Add usage count annotation based on label type
-        if self.model.__name__ == 'CategoryType':
-            queryset = queryset.annotate(usage_count=Count('category'))
-        elif self.model.__name__ == 'SpanType':
-            queryset = queryset.annotate(usage_count=Count('span'))
-        elif self.model.__name__ == 'RelationType':
-            queryset = queryset.annotate(usage_count=Count('relation'))
-        
-        return queryset
+        return self.model.objects.filter(project=self.kwargs["project_id"])
     
+    def filter_queryset(self, queryset):
+        # Ranked search replaces the ordering, so it runs after the other filters.
+        query = self.request.query_params.get(api_settings.SEARCH_PARAM, "")
+        queryset = super().filter_queryset(queryset)
+        queryset, scoped = self.filter_taxonomy(queryset)
+        if query.strip():
+            return search_label_types(queryset, self.kwargs["project_id"], query, scoped=scoped)
+        return queryset
+
+    def filter_taxonomy(self, queryset):
+        """Narrow the label types to the children (?parent=<id> or ?parent=root) or the subtree (?subtree=<id>).
+
+        Returns:
+            the queryset, and whether it was narrowed.
+        """
+        if not issubclass(self.model, HierarchicalLabelType):
+            return queryset, False
+        parent = self.request.query_params.get("parent")
+        subtree = self.request.query_params.get("subtree")
+        if parent == "root":
+            queryset = queryset.filter(parent__isnull=True)
+        elif parent:
+            queryset = queryset.filter(parent=get_label_type_or_404(self.model, self.kwargs["project_id"], parent))
+        if subtree:
+            root = get_label_type_or_404(self.model, self.kwargs["project_id"], subtree)
+            queryset = queryset.filter(path__startswith=root.descendant_path)
+        return queryset, bool(parent or subtree)
+
+    @property
+    def compact(self) -> bool:
+        return self.request.accepted_renderer.format in COMPACT_FORMATS
+
+    @property
+    def depends_on_usage(self) -> bool:
+        # The compact representation includes the usage counts, and the default ordering ranks by them.
+        if self.compact:
+            return True
+        ordering = filters.OrderingFilter().get_ordering(self.request, self.get_queryset(), self) or []
+        return any(field.lstrip("-") == "usage_count" for field in ordering)
+
     def list(self, request, *args, **kwargs):
         # Support disabling pagination with ?limit=none or ?no_page=true
-        if request.query_params.get('limit') == 'none' or request.query_params.get('no_page') == 'true':
+        no_page = request.query_params.get('limit') == 'none' or request.query_params.get('no_page') == 'true'
+        if no_page or self.compact:
             self.pagination_class = None
+            # The whole label set is shared by all annotators, so serialize it once per version.
+            cache_key = f"label_types:list:{self.etag}"
+            data = cache.get(cache_key)
+            if data is None:
+                if self.compact:
+                    data = self.list_columns(self.filter_queryset(self.get_queryset()))
+                else:
+                    data = super().list(request, *args, **kwargs).data
+                cache.set(cache_key, data, timeout=LABEL_LIST_CACHE_TIMEOUT)
+            return Response(data)
         return super().list(request, *args, **kwargs)
 
+    def list_columns(self, queryset) -> Dict[str, List]:
+        """Return the label types as parallel arrays, read with values_list instead of the serializer.
+
+        The compact representation is never paginated.
+        """
+        fields = COMPACT_FIELDS
+        if issubclass(self.model, HierarchicalLabelType):
+            fields = fields + ["parent"]
+        if isinstance(queryset, SearchResult):
+            rows = queryset.queryset.filter(pk__in=queryset.ids).values_list(*fields)
+            id_to_row = {row[0]: row for row in rows}
+            rows = [id_to_row[pk] for pk in queryset.ids if pk in id_to_row]
+        else:
+            rows = queryset.values_list(*fields)
+        columns = list(zip(*rows)) or [()] * len(fields)
+        return {field: list(column) for field, column in zip(fields, columns)}
+
     def perform_create(self, serializer):
         serializer.save(project_id=self.kwargs["project_id"])
 
@@ -93,36 +210,79 @@ class LabelList(generics.ListCreateAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def get_label_type_or_404(model, project_id, label_id):
+    try:
+        return get_object_or_404(model, project_id=project_id, pk=int(label_id))
+    except ValueError:
+        raise ParseError(f"Invalid label type id: {label_id}")
+
+
+class LabelTree(ConditionalLabelMixin, generics.ListAPIView):
+    """List the children, the descendants or the ancestors of a label type.
+
+    Children and descendants are paginated like the label type list, so a client can load a taxonomy by branch.
+    """
+
+    model = HierarchicalLabelType
+    serializer_class = LabelSerializer
+    pagination_class = LabelPagination
+    permission_classes = [IsAuthenticated & IsProjectMember]
+    relation = "children"
+
+    def get_queryset(self):
+        label_type = get_label_type_or_404(self.model, self.kwargs["project_id"], self.kwargs["label_id"])
+        if self.relation == "ancestors":
+            return label_type.get_ancestors()
+        if self.relation == "subtree":
+            return label_type.get_descendants().order_by("path", "text")
+        return label_type.children.order_by("text")
+
+    def list(self, request, *args, **kwargs):
+        if self.relation == "ancestors":
+            self.pagination_class = None
+        return super().list(request, *args, **kwargs)
+
+
 class CategoryTypeList(LabelList):
     model = CategoryType
     serializer_class = CategoryTypeSerializer
 
 
-class CategoryTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+class CategoryTypeDetail(ConditionalLabelMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = CategoryType.objects.all()
     serializer_class = CategoryTypeSerializer
     lookup_url_kwarg = "label_id"
     permission_classes = [IsAuthenticated & IsProjectMember]
 
 
+class CategoryTypeTree(LabelTree):
+    model = CategoryType
+    serializer_class = CategoryTypeSerializer
+
+
 class SpanTypeList(LabelList):
     model = SpanType
     serializer_class = SpanTypeSerializer
 
 
-class SpanTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+class SpanTypeDetail(ConditionalLabelMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = SpanType.objects.all()
     serializer_class = SpanTypeSerializer
     lookup_url_kwarg = "label_id"
     permission_classes = [IsAuthenticated & IsProjectMember]
 
 
+class SpanTypeTree(LabelTree):
+    model = SpanType
+    serializer_class = SpanTypeSerializer
+
+
 class RelationTypeList(LabelList):
     model = RelationType
     serializer_class = RelationTypeSerializer
 
 
-class RelationTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+class RelationTypeDetail(ConditionalLabelMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = RelationType.objects.all()
     serializer_class = RelationTypeSerializer
     lookup_url_kwarg = "label_id"
@@ -134,16 +294,35 @@ class LabelUploadAPI(APIView):
     permission_classes = [IsAuthenticated & IsProjectAdmin]
     serializer_class = LabelSerializer
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         if "file" not in request.data:
             raise ParseError("Empty content")
+        if request.query_params.get("mode") == "stream":
+            return self.stream(request.data["file"], kwargs["project_id"])
+        return self.load(request.data["file"], kwargs["project_id"])
+
+    def stream(self, file, project_id):
+        """Upload the file in batches, skipping duplicates, and report the status of each row.
+
+        Large files are uploaded by a Celery task, whose result is the report.
+        """
+        if file.size > settings.LABEL_UPLOAD_ASYNC_SIZE:
+            path = default_storage.save(f"label-uploads/{uuid.uuid4()}.json", file)
+            model_name = self.serializer_class.Meta.model._meta.model_name
+            task = upload_label_types.delay(project_id=project_id, model_name=model_name, path=path)
+            return Response({"task_id": task.task_id}, status=status.HTTP_202_ACCEPTED)
+        uploader = LabelTypeUploader(project_id, self.serializer_class, batch_size=settings.IMPORT_BATCH_SIZE)
+        report = uploader.upload(file)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def load(self, file, project_id):
         try:
-            labels = json.load(request.data["file"])
+            labels = json.load(file)
             labels = list(map(camel_to_snake_dict, labels))
-            serializer = self.serializer_class(data=labels, many=True)
+            serializer = self.serializer_class(data=labels, many=True, context={"project_id": project_id})
             serializer.is_valid(raise_exception=True)
-            serializer.save(project_id=kwargs["project_id"])
+            serializer.save(project_id=project_id)
             return Response(status=status.HTTP_201_CREATED)
         except json.decoder.JSONDecodeError:
             raise ParseError("The file format is invalid.")
@@ -167,19 +346,12 @@ class PopularLabelsMixin:
     """Mixin to get popular labels (most frequently used)"""
     
     def get_popular_queryset(self, queryset, limit=50):
-        # Add usage count annotation
-        if self.model.__name__ == 'CategoryType':
-            queryset = queryset.annotate(usage_count=Count('category'))
-        elif self.model.__name__ == 'SpanType':
-            queryset = queryset.annotate(usage_count=Count('span'))
-        elif self.model.__name__ == 'RelationType':
-            queryset = queryset.annotate(usage_count=Count('relation'))
-        
-        # Return most used labels
+        # Return most used labels. `usage_count` is maintained by the label managers.
         return queryset.filter(usage_count__gt=0).order_by('-usage_count', 'text')[:limit]
 
 
-class CategoryTypePopular(PopularLabelsMixin, generics.ListAPIView):
+class CategoryTypePopular(ConditionalLabelMixin, PopularLabelsMixin, generics.ListAPIView):
+    depends_on_usage = True
     model = CategoryType
     serializer_class = CategoryTypeSerializer
     permission_classes = [IsAuthenticated & IsProjectMember]
@@ -187,7 +359,7 @@ class CategoryTypePopular(PopularLabelsMixin, generics.ListAPIView):
     
     def get_queryset(self):
         queryset = self.model.objects.filter(project=self.kwargs["project_id"])
-        limit = int(self.request.query_params.get('limit', 50))
+        limit = parse_limit(self.request.query_params)
         popular = self.get_popular_queryset(queryset, limit)
         
         # If no popular labels (no usage yet), return first N labels instead
@@ -196,7 +368,8 @@ class CategoryTypePopular(PopularLabelsMixin, generics.ListAPIView):
         return popular
 
 
-class SpanTypePopular(PopularLabelsMixin, generics.ListAPIView):
+class SpanTypePopular(ConditionalLabelMixin, PopularLabelsMixin, generics.ListAPIView):
+    depends_on_usage = True
     model = SpanType
     serializer_class = SpanTypeSerializer
     permission_classes = [IsAuthenticated & IsProjectMember]
@@ -204,7 +377,7 @@ class SpanTypePopular(PopularLabelsMixin, generics.ListAPIView):
     
     def get_queryset(self):
         queryset = self.model.objects.filter(project=self.kwargs["project_id"])
-        limit = int(self.request.query_params.get('limit', 50))
+        limit = parse_limit(self.request.query_params)
         popular = self.get_popular_queryset(queryset, limit)
         
         # If no popular labels (no usage yet), return first N labels instead
@@ -213,7 +386,8 @@ class SpanTypePopular(PopularLabelsMixin, generics.ListAPIView):
         return popular
 
 
-class RelationTypePopular(PopularLabelsMixin, generics.ListAPIView):
+class RelationTypePopular(ConditionalLabelMixin, PopularLabelsMixin, generics.ListAPIView):
+    depends_on_usage = True
     model = RelationType
     serializer_class = RelationTypeSerializer
     permission_classes = [IsAuthenticated & IsProjectMember]
@@ -221,10 +395,42 @@ class RelationTypePopular(PopularLabelsMixin, generics.ListAPIView):
     
     def get_queryset(self):
         queryset = self.model.objects.filter(project=self.kwargs["project_id"])
-        limit = int(self.request.query_params.get('limit', 50))
+        limit = parse_limit(self.request.query_params)
         popular = self.get_popular_queryset(queryset, limit)
         
         # If no popular labels (no usage yet), return first N labels instead
         if not popular.exists():
             return queryset.order_by('created_at')[:limit]
         return popular
+
+
+class RecentLabelsMixin:
+    """Mixin to get the labels the user has used most, weighted by recency"""
+
+    usage_model = LabelTypeUsage
+    permission_classes = [IsAuthenticated & IsProjectMember]
+    pagination_class = None
+
+    def get_queryset(self):
+        limit = parse_limit(self.request.query_params)
+        usages = (
+            self.usage_model.objects.filter(project=self.kwargs["project_id"], user=self.request.user)
+            .select_related("label_type")
+            .order_by("-score")[:limit]
+        )
+        return [usage.label_type for usage in usages]
+
+
+class CategoryTypeRecent(RecentLabelsMixin, generics.ListAPIView):
+    usage_model = CategoryTypeUsage
+    serializer_class = CategoryTypeSerializer
+
+
+class SpanTypeRecent(RecentLabelsMixin, generics.ListAPIView):
+    usage_model = SpanTypeUsage
+    serializer_class = SpanTypeSerializer
+
+
+class RelationTypeRecent(RecentLabelsMixin, generics.ListAPIView):
+    usage_model = RelationTypeUsage
+    serializer_class = RelationTypeSerializer
@@ -1,8 +1,180 @@
-from django.db.models import Count, Manager
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Manager, Q, QuerySet
+from django.utils import timezone
 
-class LabelManager(Manager):
-    label_type_field = "label"
+
+def release_label_types(queryset: QuerySet):
+    """Decrement the usage of the label types of the labels that deleting the queryset cascades to.
+
+    Args:
+        queryset: queryset of the objects about to be deleted, e.g. examples or spans.
+    """
+    for relation in queryset.model._meta.related_objects:
+        manager = relation.related_model._default_manager
+        if not relation.one_to_many or not isinstance(manager, LabelManager):
+            continue
+        labels = manager.filter(**{f"{relation.field.name}__in": queryset.values("pk")})
+        # Every label of the queryset is visited here, so don't follow labels referencing labels.
+        labels.release_label_types(cascade=False)
+
+
+def create_label_tombstones(queryset: QuerySet):
+    """Record the labels that deleting the queryset cascades to as deleted, for the incremental exports.
+
+    Args:
+        queryset: queryset of the objects about to be deleted, e.g. examples.
+    """
+    for relation in queryset.model._meta.related_objects:
+        manager = relation.related_model._default_manager
+        if not relation.one_to_many or not isinstance(manager, LabelManager):
+            continue
+        labels = manager.filter(**{f"{relation.field.name}__in": queryset.values("pk")})
+        # Every label of the queryset is visited here, so don't follow labels referencing labels.
+        labels.create_tombstones(cascade=False)
+
+
+class LabelQuerySet(QuerySet):
+    def count_label_types(self) -> Dict[int, int]:
+        field = self.model._default_manager.label_type_field
+        if field is None:
+            return {}
+        items = self.order_by().values(field).annotate(count=Count("pk"))
+        return {item[field]: item["count"] for item in items}
+
+    def count_label_types_by_user(self) -> Dict[Tuple[int, int], int]:
+        field = self.model._default_manager.label_type_field
+        if field is None:
+            return {}
+        items = self.order_by().values(field, "user").annotate(count=Count("pk"))
+        return {(item[field], item["user"]): item["count"] for item in items}
+
+    def release_label_types(self, cascade: bool = True):
+        """Decrement the usage of the label types of the labels in this queryset.
+
+        Args:
+            cascade: whether to release the labels referencing these labels too, e.g. relations between spans.
+        """
+        manager = self.model._default_manager
+        if manager.label_type_field is not None:
+            counter = self.count_label_types_by_user()
+            usage: Counter = Counter()
+            for (label_type_id, _), count in counter.items():
+                usage[label_type_id] += count
+            manager.label_type_model.objects.add_usage({pk: -count for pk, count in usage.items()})
+            manager.add_label_counts({key: -count for key, count in counter.items()})
+        if not cascade:
+            return
+        for dependents in self.dependents():
+            dependents.release_label_types()
+
+    def dependents(self) -> Iterator["LabelQuerySet"]:
+        """The labels referencing the labels in this queryset, which are deleted with them."""
+        # Labels can be deleted through several paths, e.g. a relation through both of its spans.
+        for model in {relation.related_model for relation in self.model._meta.related_objects}:
+            dependent_manager = model._default_manager
+            if not isinstance(dependent_manager, LabelManager):
+                continue
+            query = Q()
+            for relation in self.model._meta.related_objects:
+                if relation.related_model is model and relation.one_to_many:
+                    query |= Q(**{f"{relation.field.name}__in": self.values("pk")})
+            yield dependent_manager.filter(query)
+
+    def create_tombstones(self, cascade: bool = True):
+        """Record the labels in this queryset as deleted, for the incremental exports to report them.
+
+        Args:
+            cascade: whether to record the labels referencing these labels too, e.g. relations between spans.
+        """
+        from .models import LabelTombstone
+
+        rows = self.order_by().values_list("pk", "uuid", "example_id", "example__project_id", "user_id")
+        tombstones = [
+            LabelTombstone(
+                project_id=project_id,
+                example_id=example_id,
+                label_type=self.model._meta.model_name,
+                label_id=pk,
+                label_uuid=label_uuid,
+                user_id=user_id,
+            )
+            for pk, label_uuid, example_id, project_id, user_id in rows
+        ]
+        LabelTombstone.objects.bulk_create(tombstones)
+        if not cascade:
+            return
+        for dependents in self.dependents():
+            dependents.create_tombstones()
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            self.release_label_types()
+            self.create_tombstones()
+            return super().delete()
+
+
+class LabelManager(Manager.from_queryset(LabelQuerySet)):  # type: ignore
+    label_type_field: Optional[str] = "label"
+    # The model counting the labels by label type and user for the metrics, if any.
+    label_count_model: Optional[str] = None
+
+    @property
+    def label_type_model(self):
+        return self.model._meta.get_field(self.label_type_field).related_model
+
+    def add_label_types(self, labels: Iterable):
+        """Increment the usage of the label types of the given labels, and their counts by user."""
+        if self.label_type_field is None:
+            return
+        attname = self.model._meta.get_field(self.label_type_field).attname
+        counter = Counter((getattr(label, attname), label.user_id) for label in labels)
+        usage: Counter = Counter()
+        for (label_type_id, _), count in counter.items():
+            usage[label_type_id] += count
+        self.label_type_model.objects.add_usage(usage)
+        self.add_label_counts(counter)
+
+    def add_throughput(self, labels: Iterable):
+        """Count the created labels in the throughput of their annotators."""
+        labels = list(labels)
+        if not labels:
+            return
+        Example = apps.get_model("examples", "Example")
+        example_ids = {label.example_id for label in labels}
+        projects = dict(Example.objects.filter(pk__in=example_ids).values_list("pk", "project_id"))
+        now = timezone.now()
+        counter = Counter((projects[label.example_id], label.user_id, label.created_at or now) for label in labels)
+        apps.get_model("metrics", "ThroughputBucket").objects.add("labels", counter)
+
+    def add_label_counts(self, counter: Dict[Tuple[int, int], int]):
+        """Add the deltas to the counts of the labels by label type and user id."""
+        if self.label_count_model is not None:
+            apps.get_model(self.label_count_model).objects.add(counter)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        labels = super().bulk_create(objs, *args, **kwargs)
+        if not kwargs.get("ignore_conflicts"):
+            # The skipped rows are unknown, so they are left to the rebuild of the throughput.
+            self.add_throughput(labels)
+        if self.label_type_field is None:
+            return labels
+        if kwargs.get("ignore_conflicts"):
+            # The skipped rows are unknown, so recount the touched label types.
+            attname = self.model._meta.get_field(self.label_type_field).attname
+            type_ids = {getattr(label, attname) for label in labels}
+            label_types = self.label_type_model.objects.filter(pk__in=type_ids)
+            label_types.rebuild_usage_count()
+            if self.label_count_model is not None:
+                apps.get_model(self.label_count_model).objects.rebuild(label_types)
+        else:
+            self.add_label_types(labels)
+        return labels
 
     def calc_label_distribution(self, examples, members, labels):
         """Calculate label distribution.
@@ -53,6 +225,8 @@ class LabelManager(Manager):
 
 
 class CategoryManager(LabelManager):
+    label_count_model = "metrics.CategoryTypeCount"
+
     def can_annotate(self, label, project) -> bool:
         is_exclusive = project.single_class_classification
         categories = self.get_labels(label, project)
@@ -63,6 +237,8 @@ class CategoryManager(LabelManager):
 
 
 class SpanManager(LabelManager):
+    label_count_model = "metrics.SpanTypeCount"
+
     def can_annotate(self, label, project) -> bool:
         overlapping = getattr(project, "allow_overlapping", False)
         spans = self.get_labels(label, project)
@@ -75,6 +251,8 @@ class SpanManager(LabelManager):
 
 
 class TextLabelManager(LabelManager):
+    label_type_field = None
+
     def can_annotate(self, label, project) -> bool:
         texts = self.get_labels(label, project)
         for text in texts:
@@ -85,6 +263,7 @@ class TextLabelManager(LabelManager):
 
 class RelationManager(LabelManager):
     label_type_field = "type"
+    label_count_model = "metrics.RelationTypeCount"
 
     def can_annotate(self, label, project) -> bool:
         return True
@@ -98,3 +277,14 @@ class BoundingBoxManager(LabelManager):
 class SegmentationManager(LabelManager):
     def can_annotate(self, label, project) -> bool:
         return True
+
+
+class LabelTombstoneManager(Manager):
+    def retention_start(self) -> datetime:
+        """The time from which the deleted labels are known. An incremental export since before it is incomplete."""
+        return timezone.now() - timedelta(days=settings.EXPORT_TOMBSTONE_RETENTION)
+
+    def prune(self) -> int:
+        """Delete the tombstones older than their retention, and return their number."""
+        count, _ = self.filter(deleted_at__lt=self.retention_start()).delete()
+        return count
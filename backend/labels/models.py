@@ -2,12 +2,15 @@ import uuid
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 
 from .managers import (
     BoundingBoxManager,
     CategoryManager,
     LabelManager,
+    LabelTombstoneManager,
     RelationManager,
     SegmentationManager,
     SpanManager,
@@ -15,6 +18,7 @@ from .managers import (
 )
 from examples.models import Example
 from label_types.models import CategoryType, RelationType, SpanType
+from projects.models import Project
 
 
 class Label(models.Model):
@@ -25,7 +29,33 @@ class Label(models.Model):
     manual = models.BooleanField(default=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        manager = type(self)._default_manager
+        field = manager.label_type_field
+        adding = self._state.adding
+        attname = None if field is None else self._meta.get_field(field).attname
+        previous_type_id = None
+        if attname is not None and not adding:
+            previous_type_id = manager.filter(pk=self.pk).values_list(attname, flat=True).first()
+        with transaction.atomic(using=using):
+            super().save(force_insert, force_update, using, update_fields)
+            if adding:
+                manager.add_throughput([self])
+            if attname is None:
+                return
+            current_type_id = getattr(self, attname)
+            if previous_type_id != current_type_id:
+                manager.label_type_model.objects.add_usage({previous_type_id: -1, current_type_id: 1})
+                manager.add_label_counts({(previous_type_id, self.user_id): -1, (current_type_id, self.user_id): 1})
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            queryset = type(self)._default_manager.filter(pk=self.pk)
+            queryset.release_label_types()
+            queryset.create_tombstones()
+            return super().delete(using, keep_parents)
 
     class Meta:
         abstract = True
@@ -153,3 +183,38 @@ class Segmentation(Label):
     points = models.JSONField(default=list)
     label = models.ForeignKey(to=CategoryType, on_delete=models.CASCADE)
     example = models.ForeignKey(to=Example, on_delete=models.CASCADE, related_name="segmentations")
+
+
+class LabelTombstone(models.Model):
+    """A deleted label, kept for the incremental exports to tell which labels disappeared since the last export.
+
+    The example is referenced by its id only, so that the tombstone outlives it.
+    The tombstones are kept for `EXPORT_TOMBSTONE_RETENTION` days, so an older export can't be continued.
+    The labels deleted with their user, e.g. from the admin site, aren't recorded: export the whole dataset then.
+    Their usage is released by `release_deleted_user_labels` though.
+    """
+
+    objects = LabelTombstoneManager()
+
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="label_tombstones")
+    example_id = models.IntegerField()
+    label_type = models.CharField(max_length=30)
+    label_id = models.IntegerField()
+    label_uuid = models.UUIDField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+@receiver(pre_delete, sender=User)
+def release_deleted_user_labels(sender, instance, using, **kwargs):
+    """Decrement the usage of the label types of the labels deleted along with the user."""
+    # A receiver, as the collector deletes the labels of the user without `LabelQuerySet.delete`.
+    for relation in sender._meta.related_objects:
+        manager = relation.related_model._default_manager
+        if not relation.one_to_many or not isinstance(manager, LabelManager):
+            continue
+        labels = manager.db_manager(using).filter(**{relation.field.name: instance})
+        labels.release_label_types(cascade=False)
+        # The labels of the other users referencing these labels, e.g. relations between their spans, go with them.
+        for dependents in labels.dependents():
+            dependents.exclude(**{relation.field.name: instance}).release_label_types(cascade=False)
@@ -1,7 +1,12 @@
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.utils import timezone
 from model_mommy import mommy
 
+from label_types.models import SpanType
+from labels.models import LabelTombstone, Span
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -30,3 +35,49 @@ class TestRelationLabeling(TestCase):
         to_id = mommy.make("Span", example=self.example, start_offset=1, end_offset=2)
         with self.assertRaises(ValidationError):
             mommy.make("Relation", from_id=from_id, to_id=to_id)
+
+
+class TestLabelTombstone(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        cls.example = mommy.make("Example", project=cls.project.item)
+
+    def test_records_deleted_labels_and_their_relations(self):
+        from_id = mommy.make("Span", example=self.example, start_offset=0, end_offset=1)
+        to_id = mommy.make("Span", example=self.example, start_offset=1, end_offset=2)
+        relation = mommy.make("Relation", example=self.example, from_id=from_id, to_id=to_id)
+        Span.objects.filter(pk=from_id.pk).delete()
+        tombstones = LabelTombstone.objects.values_list("label_type", "label_uuid", "example_id", "project_id")
+        self.assertCountEqual(
+            tombstones,
+            [
+                ("span", from_id.uuid, self.example.id, self.project.item.id),
+                ("relation", relation.uuid, self.example.id, self.project.item.id),
+            ],
+        )
+
+    def test_records_deleted_label_instance(self):
+        span = mommy.make("Span", example=self.example, start_offset=0, end_offset=1, user=self.project.admin)
+        span_id = span.id
+        span.delete()
+        tombstone = LabelTombstone.objects.get()
+        self.assertEqual(tombstone.label_id, span_id)
+        self.assertEqual(tombstone.user, self.project.admin)
+
+    def test_records_labels_of_deleted_label_types(self):
+        span_type = mommy.make("SpanType", project=self.project.item)
+        from_id = mommy.make("Span", example=self.example, start_offset=0, end_offset=1, label=span_type)
+        to_id = mommy.make("Span", example=self.example, start_offset=1, end_offset=2)
+        relation = mommy.make("Relation", example=self.example, from_id=from_id, to_id=to_id)
+        SpanType.objects.filter(pk=span_type.pk).delete()
+        tombstones = LabelTombstone.objects.values_list("label_type", "label_uuid")
+        self.assertCountEqual(tombstones, [("span", from_id.uuid), ("relation", relation.uuid)])
+
+    def test_prune_tombstones_past_retention(self):
+        span = mommy.make("Span", example=self.example, start_offset=0, end_offset=1)
+        span.delete()
+        LabelTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=365))
+        with self.settings(EXPORT_TOMBSTONE_RETENTION=30):
+            self.assertEqual(LabelTombstone.objects.prune(), 1)
+        self.assertFalse(LabelTombstone.objects.exists())
@@ -7,6 +7,7 @@ from rest_framework.reverse import reverse
 from .utils import make_annotation
 from api.tests.utils import CRUDMixin
 from examples.tests.utils import make_doc
+from label_types.models import SpanTypeUsage
 from label_types.tests.utils import make_label
 from labels.models import BoundingBox, Category, Segmentation, Span, TextLabel
 from projects.models import ProjectType
@@ -181,6 +182,11 @@ class TestSpanCreation(TestDataLabeling, CRUDMixin):
         label = make_label(self.project.item)
         return {"label": label.id, "start_offset": 0, "end_offset": 1}
 
+    def test_records_usage_of_label_type(self):
+        self.assert_create(self.project.admin, status.HTTP_201_CREATED)
+        usage = SpanTypeUsage.objects.get(label_type=self.data["label"])
+        self.assertEqual(usage.user, self.project.admin)
+
 
 class TestRelationCreation(TestDataLabeling, CRUDMixin):
     task = ProjectType.SEQUENCE_LABELING
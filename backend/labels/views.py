@@ -2,7 +2,6 @@ from functools import partial
 from typing import Type
 
 from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -25,7 +24,7 @@ from labels.models import (
     Span,
     TextLabel,
 )
-from projects.models import Project
+from projects.context import get_project_context
 from projects.permissions import IsProjectMember
 
 
@@ -37,7 +36,7 @@ class BaseListAPI(generics.ListCreateAPIView):
 
     @property
     def project(self):
-        return get_object_or_404(Project, pk=self.kwargs["project_id"])
+        return get_project_context(self.request, self.kwargs["project_id"]).project
 
     def get_queryset(self):
         queryset = self.label_class.objects.filter(example=self.kwargs["example_id"])
@@ -54,7 +53,10 @@ class BaseListAPI(generics.ListCreateAPIView):
         return response
 
     def perform_create(self, serializer):
-        serializer.save(example_id=self.kwargs["example_id"], user=self.request.user)
+        label = serializer.save(example_id=self.kwargs["example_id"], user=self.request.user)
+        label_type_field = self.label_class.objects.label_type_field
+        if label_type_field is not None:
+            getattr(label, label_type_field).record_usage(self.request.user)
 
     def delete(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -68,7 +70,7 @@ class BaseDetailAPI(generics.RetrieveUpdateDestroyAPIView):
 
     @property
     def project(self):
-        return get_object_or_404(Project, pk=self.kwargs["project_id"])
+        return get_project_context(self.request, self.kwargs["project_id"]).project
 
     def get_permissions(self):
         if self.project.collaborative_annotation:
@@ -0,0 +1,396 @@
+import abc
+import hashlib
+from itertools import combinations
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db.models import Count, Max
+
+from examples.models import Example, ExampleState
+from label_types.models import CategoryType
+from labels.models import Category, Span, TextLabel
+from projects.models import Project
+
+
+def annotation_version(project: Project) -> str:
+    """A digest of the labels and confirmations of the project, which changes whenever any of them does.
+
+    A changed label moves the last update of its table, and a deleted one the number of rows.
+    The project itself is included for its settings, e.g. whether its classification is single-label.
+    """
+    querysets = [
+        (Category.objects.filter(example__project=project), "updated_at"),
+        (Span.objects.filter(example__project=project), "updated_at"),
+        (TextLabel.objects.filter(example__project=project), "updated_at"),
+        (ExampleState.objects.filter(example__project=project), "confirmed_at"),
+    ]
+    state = [project.updated_at.isoformat()]
+    for queryset, field in querysets:
+        aggregate = queryset.order_by().aggregate(count=Count("pk"), last=Max(field))
+        state.append(f"{aggregate['count']}:{aggregate['last']}")
+    return hashlib.sha256("|".join(state).encode("utf-8")).hexdigest()
+
+
+def example_ranges(project_id: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """The first and last ids of consecutive chunks of the examples of the project."""
+    last = 0
+    while True:
+        examples = Example.objects.filter(project_id=project_id, pk__gt=last).order_by("pk")
+        ids = list(examples.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last = ids[-1]
+
+
+def cohen_kappa(confusion: np.ndarray) -> Optional[float]:
+    """The Cohen's kappa of a confusion matrix, or None if it's undefined, i.e. the chance agreement is perfect."""
+    total = confusion.sum()
+    if total == 0:
+        return None
+    observed = np.trace(confusion) / total
+    expected = (confusion.sum(axis=0) * confusion.sum(axis=1)).sum() / total**2
+    if expected == 1:
+        return None
+    return float((observed - expected) / (1 - expected))
+
+
+def f1(hits_a: int, count_a: int, hits_b: int, count_b: int) -> Optional[float]:
+    """The F1 score of b against a, from the number of labels of each found in the other."""
+    if count_a + count_b == 0:
+        return None
+    if hits_a == 0 or hits_b == 0:
+        return 0.0
+    precision = hits_b / count_b
+    recall = hits_a / count_a
+    return 2 * precision * recall / (precision + recall)
+
+
+def count_matches(a: np.ndarray, b: np.ndarray) -> int:
+    """The number of rows of a which are in b, both without duplicate rows."""
+    if len(a) == 0 or len(b) == 0:
+        return 0
+    _, counts = np.unique(np.concatenate([a, b]), axis=0, return_counts=True)
+    return int((counts == 2).sum())
+
+
+def find_overlaps(query: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Whether each interval of the query overlaps an interval of the reference in the same group.
+
+    Both are arrays of rows of group, start and end. The reference is sorted by group and start,
+    so that the intervals starting before the end of a query interval are found by a binary search,
+    and the furthest end of those, kept as a running maximum, tells if any of them reaches into it.
+    The groups are kept apart by offsetting the positions of each group past the ends of the previous ones.
+    """
+    if len(query) == 0 or len(reference) == 0:
+        return np.zeros(len(query), dtype=bool)
+    scale = int(max(query[:, 2].max(), reference[:, 2].max())) + 1
+    reference = reference[np.lexsort((reference[:, 1], reference[:, 0]))]
+    offsets = reference[:, 0] * scale
+    starts = offsets + reference[:, 1]
+    reach = np.maximum.accumulate(offsets + reference[:, 2])
+    before = np.searchsorted(starts, query[:, 0] * scale + query[:, 2], side="left") - 1
+    found = reach[np.maximum(before, 0)] > query[:, 0] * scale + query[:, 1]
+    return (before >= 0) & found
+
+
+class Ratings:
+    """The labels of a chunk of examples, and which annotators rated each of the examples.
+
+    An annotator rated an example if they labeled or confirmed it, so that confirming an example
+    without labeling it counts as rating it as having none.
+
+    Args:
+        labels: rows of example id, user id and the values of a label.
+        states: rows of example id and the id of the user who confirmed it.
+    """
+
+    def __init__(self, labels: np.ndarray, states: np.ndarray):
+        pairs = np.concatenate([labels[:, :2], states])
+        self.examples, examples = np.unique(pairs[:, 0], return_inverse=True)
+        self.users, users = np.unique(pairs[:, 1], return_inverse=True)
+        self.rated = np.zeros((len(self.examples), len(self.users)), dtype=bool)
+        self.rated[examples, users] = True
+        self.label_examples = examples[: len(labels)]
+        self.label_users = users[: len(labels)]
+        self.values = labels[:, 2:]
+        order = np.argsort(self.label_users, kind="stable")
+        bounds = np.searchsorted(self.label_users[order], np.arange(len(self.users) + 1))
+        self.labels_by_user = [order[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def pairs(self) -> Iterator[Tuple[Tuple[int, int], int, int, np.ndarray]]:
+        """The pairs of annotators who rated an example in common, with their user ids and the common examples."""
+        for i, j in combinations(range(len(self.users)), 2):
+            common = self.rated[:, i] & self.rated[:, j]
+            if common.any():
+                yield (int(self.users[i]), int(self.users[j])), i, j, common
+
+    def labels_of(self, user: int, examples: np.ndarray) -> np.ndarray:
+        """The rows of example index and values of the labels of the user on the examples."""
+        rows = self.labels_by_user[user]
+        rows = rows[examples[self.label_examples[rows]]]
+        return np.column_stack([self.label_examples[rows], self.values[rows]])
+
+
+class Agreement(abc.ABC):
+    """The agreement between the annotators of a project, accumulated chunk by chunk of its examples.
+
+    The labels of each chunk are read with `values_list` into arrays, and only the sums the agreement is made of,
+    e.g. the confusion matrices of each pair of annotators, are kept between chunks.
+    """
+
+    label_model: Any = None
+
+    def __init__(self, project: Project):
+        self.project = project
+
+    def exists(self) -> bool:
+        return self.label_model.objects.filter(example__project=self.project).exists()
+
+    def add_chunk(self, first: int, last: int, states: np.ndarray):
+        labels = self.read_labels(
+            self.label_model.objects.filter(
+                example__project=self.project, example__gte=first, example__lte=last
+            ).order_by()
+        )
+        if len(labels) or len(states):
+            self.add(Ratings(labels, states))
+
+    @abc.abstractmethod
+    def read_labels(self, labels) -> np.ndarray:
+        """The rows of example id, user id and values of the labels, as integers."""
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    @abc.abstractmethod
+    def add(self, ratings: Ratings):
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    @abc.abstractmethod
+    def users(self) -> List[int]:
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    @abc.abstractmethod
+    def result(self, usernames: Dict[int, str]) -> Dict[str, Any]:
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+
+class CategoryAgreement(Agreement):
+    """The Cohen's kappa of each pair of annotators, and the Fleiss' kappa of all of them, on the categories.
+
+    In a single-label project, each example is an item rated with one of the label types, or none.
+    Otherwise, each pair of an example and a label type is an item rated as having the label or not.
+    The Fleiss' kappa allows a different number of annotators for each item.
+    """
+
+    label_model = Category
+
+    def __init__(self, project: Project):
+        super().__init__(project)
+        self.label_types = np.array(
+            CategoryType.objects.filter(project=project).order_by("pk").values_list("pk", flat=True), dtype=np.int64
+        )
+        self.single_label = project.single_class_classification
+        self.size = len(self.label_types) + 1 if self.single_label else 2
+        self.confusions: Dict[Tuple[int, int], np.ndarray] = {}
+        self.items = 0
+        self.agreement = 0.0
+        self.totals = np.zeros(self.size, dtype=np.int64)
+
+    def read_labels(self, labels) -> np.ndarray:
+        rows = np.array(list(labels.values_list("example", "user", "label")), dtype=np.int64).reshape(-1, 3)
+        rows = rows[np.isin(rows[:, 2], self.label_types)]
+        rows[:, 2] = np.searchsorted(self.label_types, rows[:, 2])
+        return rows
+
+    def rate(self, ratings: Ratings) -> np.ndarray:
+        """The matrix of the rating of each item by each annotator, -1 if they didn't rate it."""
+        label_types = ratings.values[:, 0]
+        if self.single_label:
+            none = len(self.label_types)
+            rates = np.where(ratings.rated, none, -1)
+            rates[ratings.label_examples, ratings.label_users] = label_types
+            return rates
+        count = len(self.label_types)
+        rates = np.where(np.repeat(ratings.rated, count, axis=0), 0, -1)
+        rates[ratings.label_examples * count + label_types, ratings.label_users] = 1
+        return rates
+
+    def add(self, ratings: Ratings):
+        rates = self.rate(ratings)
+        size = self.size
+        for pair, i, j, _ in ratings.pairs():
+            a, b = rates[:, i], rates[:, j]
+            common = (a >= 0) & (b >= 0)
+            if not common.any():
+                continue
+            confusion = np.bincount(a[common] * size + b[common], minlength=size * size).reshape(size, size)
+            if pair in self.confusions:
+                self.confusions[pair] += confusion
+            else:
+                self.confusions[pair] = confusion
+        items, _ = np.nonzero(rates >= 0)
+        counts = np.bincount(items * size + rates[rates >= 0], minlength=len(rates) * size).reshape(-1, size)
+        raters = counts.sum(axis=1)
+        counts, raters = counts[raters >= 2], raters[raters >= 2]
+        self.items += len(counts)
+        self.agreement += float((((counts**2).sum(axis=1) - raters) / (raters * (raters - 1))).sum())
+        self.totals += counts.sum(axis=0)
+
+    def fleiss_kappa(self) -> Optional[float]:
+        if self.items == 0:
+            return None
+        observed = self.agreement / self.items
+        expected = float(((self.totals / self.totals.sum()) ** 2).sum())
+        if expected == 1:
+            return None
+        return (observed - expected) / (1 - expected)
+
+    def users(self) -> List[int]:
+        return sorted({user for pair in self.confusions for user in pair})
+
+    def result(self, usernames: Dict[int, str]) -> Dict[str, Any]:
+        pairwise = []
+        for (a, b), confusion in sorted(self.confusions.items()):
+            total = int(confusion.sum())
+            pairwise.append(
+                {
+                    "users": [usernames.get(a), usernames.get(b)],
+                    "items": total,
+                    "observed": float(np.trace(confusion) / total),
+                    "kappa": cohen_kappa(confusion),
+                }
+            )
+        kappas = [pair["kappa"] for pair in pairwise if pair["kappa"] is not None]
+        return {
+            "mode": "single" if self.single_label else "multi",
+            "items": self.items,
+            "fleiss_kappa": self.fleiss_kappa(),
+            "mean_kappa": float(np.mean(kappas)) if kappas else None,
+            "pairwise": pairwise,
+        }
+
+
+class MatchAgreement(Agreement):
+    """The F1 score of each pair of annotators on the labels of the examples both rated, one against the other.
+
+    `matchers` names the ways labels are matched, each counting the labels of one annotator found in the other's.
+    The scores of all pairs are pooled from their counts, so that the pairs who rated more examples weigh more.
+    """
+
+    matchers: List[str] = []
+
+    def __init__(self, project: Project):
+        super().__init__(project)
+        # The counts of each pair: the labels of a and b, and then the labels of a and b matched, for each matcher.
+        self.counts: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @abc.abstractmethod
+    def match(self, matcher: str, a: np.ndarray, b: np.ndarray) -> Tuple[int, int]:
+        """The number of labels of a found in b, and of b found in a. The labels have no duplicates."""
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    def add(self, ratings: Ratings):
+        for pair, i, j, common in ratings.pairs():
+            a = np.unique(ratings.labels_of(i, common), axis=0)
+            b = np.unique(ratings.labels_of(j, common), axis=0)
+            counts = [len(a), len(b)]
+            for matcher in self.matchers:
+                counts.extend(self.match(matcher, a, b))
+            if pair in self.counts:
+                self.counts[pair] += counts
+            else:
+                self.counts[pair] = np.array(counts, dtype=np.int64)
+
+    def scores(self, counts: np.ndarray) -> Dict[str, Any]:
+        count_a, count_b = counts[:2]
+        scores = {}
+        for k, matcher in enumerate(self.matchers):
+            hits_a, hits_b = counts[2 + 2 * k : 4 + 2 * k]
+            scores[f"{matcher}_f1"] = f1(int(hits_a), int(count_a), int(hits_b), int(count_b))
+        return scores
+
+    def users(self) -> List[int]:
+        return sorted({user for pair in self.counts for user in pair})
+
+    def result(self, usernames: Dict[int, str]) -> Dict[str, Any]:
+        pairwise = [
+            {
+                "users": [usernames.get(a), usernames.get(b)],
+                "labels": [int(counts[0]), int(counts[1])],
+                **self.scores(counts),
+            }
+            for (a, b), counts in sorted(self.counts.items())
+        ]
+        pooled = sum(self.counts.values(), np.zeros(2 + 2 * len(self.matchers), dtype=np.int64))
+        return {**self.scores(pooled), "pairwise": pairwise}
+
+
+class SpanAgreement(MatchAgreement):
+    """The agreement on the spans: exactly the same span, or an overlapping span of the same label type."""
+
+    label_model = Span
+    matchers = ["exact", "overlap"]
+
+    def read_labels(self, labels) -> np.ndarray:
+        rows = labels.values_list("example", "user", "label", "start_offset", "end_offset")
+        return np.array(list(rows), dtype=np.int64).reshape(-1, 5)
+
+    def match(self, matcher: str, a: np.ndarray, b: np.ndarray) -> Tuple[int, int]:
+        if matcher == "exact":
+            matches = count_matches(a, b)
+            return matches, matches
+        # The spans are grouped by their example and label type, to only overlap the spans of the same group.
+        _, groups = np.unique(np.concatenate([a[:, :2], b[:, :2]]), axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+        a = np.column_stack([groups[: len(a)], a[:, 2:]])
+        b = np.column_stack([groups[len(a) :], b[:, 2:]])
+        return int(find_overlaps(a, b).sum()), int(find_overlaps(b, a).sum())
+
+
+class TextAgreement(MatchAgreement):
+    """The agreement on the text labels, which match if they are the same text."""
+
+    label_model = TextLabel
+    matchers = ["exact"]
+
+    def read_labels(self, labels) -> np.ndarray:
+        rows = list(labels.values_list("example", "user", "text"))
+        if not rows:
+            return np.zeros((0, 3), dtype=np.int64)
+        examples, users, texts = zip(*rows)
+        # The texts are only compared on the same example, so their ids are only unique within the chunk.
+        _, text_ids = np.unique(np.array(texts, dtype=object), return_inverse=True)
+        return np.column_stack([examples, users, text_ids.reshape(-1)]).astype(np.int64)
+
+    def match(self, matcher: str, a: np.ndarray, b: np.ndarray) -> Tuple[int, int]:
+        matches = count_matches(a, b)
+        return matches, matches
+
+
+def measure_agreement(project: Project, chunk_size: int = 1000) -> Dict[str, Any]:
+    """The agreement between the annotators of the project on each kind of label it has.
+
+    Examples:
+        >>> measure_agreement(project)
+        {'category': {'mode': 'single', 'items': 10, 'fleiss_kappa': 0.8, 'mean_kappa': 0.8, 'pairwise': [...]}}
+    """
+    agreements = {
+        name: agreement
+        for name, agreement in [
+            ("category", CategoryAgreement(project)),
+            ("span", SpanAgreement(project)),
+            ("text", TextAgreement(project)),
+        ]
+        if agreement.exists()
+    }
+    if agreements:
+        states = ExampleState.objects.filter(example__project=project, confirmed_by__isnull=False).order_by()
+        for first, last in example_ranges(project.id, chunk_size):
+            rows = states.filter(example__gte=first, example__lte=last).values_list("example", "confirmed_by")
+            confirmations = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+            for agreement in agreements.values():
+                agreement.add_chunk(first, last, confirmations)
+    users = {user for agreement in agreements.values() for user in agreement.users()}
+    usernames = dict(User.objects.filter(pk__in=users).values_list("pk", "username"))
+    return {name: agreement.result(usernames) for name, agreement in agreements.items()}
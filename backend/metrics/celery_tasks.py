@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from celery import shared_task
+from django.utils import timezone
+
+from .agreement import annotation_version, measure_agreement
+from .models import (
+    AgreementReport,
+    CategoryTypeCount,
+    ProjectProgress,
+    RelationTypeCount,
+    SpanTypeCount,
+    ThroughputBucket,
+)
+from label_types.models import CategoryType, RelationType, SpanType
+from projects.models import Project
+
+
+def rebuild_project_metrics(project_id: int, since: Optional[datetime] = None):
+    ProjectProgress.objects.rebuild(project_id)
+    ThroughputBucket.objects.rebuild(project_id, since=since)
+    for count_model, label_type_model in [
+        (CategoryTypeCount, CategoryType),
+        (SpanTypeCount, SpanType),
+        (RelationTypeCount, RelationType),
+    ]:
+        count_model.objects.rebuild(label_type_model.objects.filter(project_id=project_id))
+
+
+@shared_task
+def rebuild_metrics(project_id: Optional[int] = None, full: bool = False):
+    """Rebuild the metrics of the project, or of every project, from their examples and labels.
+
+    The metrics are kept up to date on each write, so this only repairs them, e.g. after raw SQL.
+    The throughput is only recounted from yesterday, unless `full`, e.g. to fill it at first.
+    """
+    since = None if full else timezone.now() - timedelta(days=1)
+    projects = Project.objects.all() if project_id is None else Project.objects.filter(pk=project_id)
+    for pk in projects.values_list("pk", flat=True).iterator():
+        rebuild_project_metrics(pk, since=since)
+
+
+@shared_task
+def downsample_throughput():
+    """Remove the buckets of the throughput past their retention, which the coarser buckets cover."""
+    ThroughputBucket.objects.downsample()
+
+
+@shared_task
+def compute_agreement(project_id: int):
+    """Compute the agreement between the annotators of the project, and store it for the version of its labels.
+
+    The version is read first, so that the labels changed while computing make the report outdated.
+    """
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        return
+    version = annotation_version(project)
+    AgreementReport.objects.store(project_id, version, measure_agreement(project))
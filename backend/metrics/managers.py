@@ -0,0 +1,262 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Any, Dict, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Manager, Q, QuerySet
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from labels.managers import LabelManager
+
+
+class LabelTypeCountManager(Manager):
+    def add(self, counter: Dict[Tuple[int, int], int]):
+        """Add the given deltas to the counts.
+
+        Args:
+            counter: mapping from a pair of label type id and user id to the delta of its count.
+        """
+        counter = {key: delta for key, delta in counter.items() if key[0] is not None and delta}
+        if not counter:
+            return
+        keys_by_delta = defaultdict(list)
+        for key, delta in counter.items():
+            keys_by_delta[delta].append(key)
+        with transaction.atomic(using=self.db):
+            rows = [self.model(label_type_id=label_type_id, user_id=user_id) for label_type_id, user_id in counter]
+            self.bulk_create(rows, ignore_conflicts=True)
+            for delta, keys in keys_by_delta.items():
+                query = Q()
+                for label_type_id, user_id in keys:
+                    query |= Q(label_type_id=label_type_id, user_id=user_id)
+                self.filter(query).update(count=F("count") + delta)
+
+    def rebuild(self, label_types: QuerySet):
+        """Recalculate the counts of the label types from their labels, e.g. to repair them."""
+        label_model = apps.get_model(self.model.label_model)
+        field = label_model._default_manager.label_type_field
+        items = (
+            label_model._base_manager.filter(**{f"{field}__in": label_types.values("pk")})
+            .order_by()
+            .values(field, "user")
+            .annotate(count=Count("pk"))
+        )
+        rows = [self.model(label_type_id=item[field], user_id=item["user"], count=item["count"]) for item in items]
+        with transaction.atomic(using=self.db):
+            self.filter(label_type__in=label_types.values("pk")).delete()
+            self.bulk_create(rows)
+
+    def distribution(self, project_id: int, members) -> Dict[str, Dict[str, int]]:
+        """The number of labels of each label type by the username of the members, without the unused label types.
+
+        Examples:
+            >>> self.distribution(project_id, members)
+            {'admin': {'positive': 10, 'negative': 5}}
+        """
+        distribution: Dict[str, Dict[str, int]] = {member.username: {} for member in members}
+        counts = self.filter(label_type__project_id=project_id, count__gt=0)
+        for username, text, count in counts.values_list("user__username", "label_type__text", "count"):
+            distribution.setdefault(username, {})[text] = count
+        return distribution
+
+
+class ProjectProgressManager(Manager):
+    """The progress of the projects.
+
+    The progress of a project is built from its examples when it's first read, and then kept up to date
+    by the writes of the examples and their states. A bulk change whose rows are unknown, e.g. an import
+    ignoring conflicts, invalidates it instead, so that it's built again at the next read.
+    """
+
+    def rebuild(self, project_id: int):
+        Example = apps.get_model("examples", "Example")
+        ExampleState = apps.get_model("examples", "ExampleState")
+        MemberProgress = apps.get_model("metrics", "MemberProgress")
+        states = ExampleState.objects.filter(example__project_id=project_id).order_by()
+        with transaction.atomic(using=self.db):
+            progress, _ = self.update_or_create(
+                project_id=project_id,
+                defaults={
+                    "total": Example.objects.filter(project_id=project_id).count(),
+                    "done": states.values("example").distinct().count(),
+                },
+            )
+            MemberProgress.objects.filter(project_id=project_id).delete()
+            items = states.values("confirmed_by").annotate(count=Count("pk"))
+            MemberProgress.objects.bulk_create(
+                [
+                    MemberProgress(project_id=project_id, user_id=item["confirmed_by"], done=item["count"])
+                    for item in items
+                ]
+            )
+        return progress
+
+    def get_or_rebuild(self, project_id: int):
+        progress = self.filter(project_id=project_id).first()
+        if progress is None:
+            progress = self.rebuild(project_id)
+        return progress
+
+    def invalidate(self, project_id: int):
+        MemberProgress = apps.get_model("metrics", "MemberProgress")
+        with transaction.atomic(using=self.db):
+            self.filter(project_id=project_id).delete()
+            MemberProgress.objects.filter(project_id=project_id).delete()
+
+    def add_examples(self, project_id: int, count: int):
+        self.filter(project_id=project_id).update(total=F("total") + count)
+
+    def add_confirmations(self, project_id: int, counter: Dict[int, int], done: int):
+        """Add the confirmations of the users to the progress, if it's built.
+
+        Args:
+            counter: mapping from user id to the delta of the number of examples the user confirmed.
+            done: the delta of the number of examples confirmed by anyone.
+        """
+        MemberProgress = apps.get_model("metrics", "MemberProgress")
+        with transaction.atomic(using=self.db):
+            if not self.filter(project_id=project_id).update(done=F("done") + done):
+                return
+            rows = [MemberProgress(project_id=project_id, user_id=user_id) for user_id in counter]
+            MemberProgress.objects.bulk_create(rows, ignore_conflicts=True)
+            for user_id, delta in counter.items():
+                MemberProgress.objects.filter(project_id=project_id, user_id=user_id).update(done=F("done") + delta)
+
+
+class AgreementReportManager(Manager):
+    """The agreement reports of the projects, each computed by a task for a version of the labels of its project."""
+
+    def request(self, project_id: int, version: str, timeout: int = 60 * 60) -> bool:
+        """Mark the version as being computed, and return whether it wasn't already, to start a single task for it.
+
+        A request older than `timeout` seconds is made again, as its task may have been lost, e.g. with its worker.
+        """
+        now = timezone.now()
+        self.bulk_create([self.model(project_id=project_id)], ignore_conflicts=True)
+        requests = self.filter(project_id=project_id).filter(
+            ~Q(requested_version=version)
+            | Q(requested_at__isnull=True)
+            | Q(requested_at__lt=now - timedelta(seconds=timeout))
+        )
+        return requests.update(requested_version=version, requested_at=now) > 0
+
+    def store(self, project_id: int, version: str, result: Dict[str, Any]):
+        self.update_or_create(
+            project_id=project_id, defaults={"version": version, "result": result, "computed_at": timezone.now()}
+        )
+
+
+def bucket_start(at: datetime, resolution: str) -> datetime:
+    """The start of the bucket of the resolution, e.g. "hour", the time falls in. The buckets are in UTC."""
+    at = at.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+    if resolution in ("hour", "day"):
+        at = at.replace(minute=0)
+    if resolution == "day":
+        at = at.replace(hour=0)
+    return at
+
+
+class ThroughputBucketManager(Manager):
+    """The throughput of the annotators, as the number of labels created and examples confirmed in time buckets.
+
+    Every write is added to its bucket of each resolution at once, so that a coarser bucket is the rollup of
+    the finer ones. The fine buckets are then removed once older than their retention,
+    `METRICS_THROUGHPUT_RETENTION`, which leaves the coarse ones to cover the past.
+    """
+
+    resolutions = ["minute", "hour", "day"]
+
+    def add(self, field: str, counter: Dict[Tuple[int, int, datetime], int]):
+        """Add the writes to the buckets.
+
+        Args:
+            field: the count the writes are added to, "labels" or "confirmations".
+            counter: mapping from a project id, a user id and the time of the writes to their number.
+        """
+        buckets: Counter = Counter()
+        for (project_id, user_id, at), count in counter.items():
+            for resolution in self.resolutions:
+                buckets[project_id, user_id, resolution, bucket_start(at, resolution)] += count
+        buckets = Counter({key: count for key, count in buckets.items() if count})
+        if not buckets:
+            return
+        keys_by_count = defaultdict(list)
+        for key, count in buckets.items():
+            keys_by_count[count].append(key)
+        with transaction.atomic(using=self.db):
+            rows = [
+                self.model(project_id=project_id, user_id=user_id, resolution=resolution, start=start)
+                for project_id, user_id, resolution, start in buckets
+            ]
+            self.bulk_create(rows, ignore_conflicts=True)
+            for count, keys in keys_by_count.items():
+                query = Q()
+                for project_id, user_id, resolution, start in keys:
+                    query |= Q(project_id=project_id, user_id=user_id, resolution=resolution, start=start)
+                self.filter(query).update(**{field: F(field) + count})
+
+    def sources(self):
+        """The models the buckets are counted from, with their count, their time and their user fields."""
+        sources = []
+        for model in apps.get_app_config("labels").get_models():
+            if isinstance(model._default_manager, LabelManager):
+                sources.append((model, "labels", "created_at", "user"))
+        sources.append((apps.get_model("examples", "ExampleState"), "confirmations", "confirmed_at", "confirmed_by"))
+        return sources
+
+    def rebuild(self, project_id: int, since: Optional[datetime] = None):
+        """Recount the buckets of the project from its labels and confirmations, e.g. to fill them at first.
+
+        Only the buckets from the day of `since` are recounted, and the buckets past their retention aren't made.
+        The labels deleted since they were counted aren't counted again.
+        """
+        now = timezone.now()
+        if since is not None:
+            since = bucket_start(since, "day")
+        retention = getattr(settings, "METRICS_THROUGHPUT_RETENTION", {})
+        buckets: Dict[Tuple[int, str, datetime], Dict[str, int]] = defaultdict(
+            lambda: {"labels": 0, "confirmations": 0}
+        )
+        for resolution in self.resolutions:
+            start = since
+            if resolution in retention:
+                cutoff = bucket_start(now - timedelta(seconds=retention[resolution]), resolution)
+                start = cutoff if start is None else max(start, cutoff)
+            for model, field, time_field, user_field in self.sources():
+                queryset = model._base_manager.filter(example__project_id=project_id)
+                if start is not None:
+                    queryset = queryset.filter(**{f"{time_field}__gte": start})
+                items = (
+                    queryset.order_by()
+                    .annotate(start=Trunc(time_field, resolution, tzinfo=dt_timezone.utc))
+                    .values("start", user_field)
+                    .annotate(count=Count("pk"))
+                )
+                for item in items:
+                    buckets[item[user_field], resolution, item["start"]][field] += item["count"]
+        rows = [
+            self.model(project_id=project_id, user_id=user_id, resolution=resolution, start=start, **counts)
+            for (user_id, resolution, start), counts in buckets.items()
+        ]
+        with transaction.atomic(using=self.db):
+            existing = self.filter(project_id=project_id)
+            if since is not None:
+                existing = existing.filter(start__gte=since)
+            existing.delete()
+            self.bulk_create(rows)
+
+    def downsample(self, now: Optional[datetime] = None) -> int:
+        """Remove the buckets older than the retention of their resolution, and return their number."""
+        now = now or timezone.now()
+        retention = getattr(settings, "METRICS_THROUGHPUT_RETENTION", {})
+        query = Q()
+        for resolution, seconds in retention.items():
+            query |= Q(resolution=resolution, start__lt=bucket_start(now - timedelta(seconds=seconds), resolution))
+        if not query:
+            return 0
+        deleted, _ = self.filter(query).delete()
+        return deleted
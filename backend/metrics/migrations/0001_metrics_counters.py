@@ -0,0 +1,145 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+COUNTED_LABELS = [
+    ("CategoryTypeCount", "Category", "label"),
+    ("SpanTypeCount", "Span", "label"),
+    ("RelationTypeCount", "Relation", "type"),
+]
+
+
+def count_labels(apps, schema_editor):
+    for count_name, label_name, field in COUNTED_LABELS:
+        count_model = apps.get_model("metrics", count_name)
+        label_model = apps.get_model("labels", label_name)
+        items = label_model.objects.order_by().values(field, "user").annotate(count=Count("pk"))
+        rows = (count_model(label_type_id=item[field], user_id=item["user"], count=item["count"]) for item in items)
+        count_model.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("label_types", "0012_taxonomy"),
+        ("labels", "0017_label_updated_at_tombstone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectProgress",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("total", models.IntegerField(default=0)),
+                ("done", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SpanTypeCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "label_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="counts", to="label_types.spantype"
+                    ),
+                ),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RelationTypeCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "label_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counts",
+                        to="label_types.relationtype",
+                    ),
+                ),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="MemberProgress",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("done", models.IntegerField(default=0)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="member_progress",
+                        to="projects.project",
+                    ),
+                ),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CategoryTypeCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "label_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counts",
+                        to="label_types.categorytype",
+                    ),
+                ),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="spantypecount",
+            constraint=models.UniqueConstraint(fields=("label_type", "user"), name="metrics_spantypecount_is_unique"),
+        ),
+        migrations.AddConstraint(
+            model_name="relationtypecount",
+            constraint=models.UniqueConstraint(
+                fields=("label_type", "user"), name="metrics_relationtypecount_is_unique"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="memberprogress",
+            constraint=models.UniqueConstraint(fields=("project", "user"), name="member_progress_is_unique"),
+        ),
+        migrations.AddConstraint(
+            model_name="categorytypecount",
+            constraint=models.UniqueConstraint(
+                fields=("label_type", "user"), name="metrics_categorytypecount_is_unique"
+            ),
+        ),
+        migrations.RunPython(count_labels, reverse_code=migrations.RunPython.noop),
+    ]
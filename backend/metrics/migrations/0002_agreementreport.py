@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+        ("metrics", "0001_metrics_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgreementReport",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("version", models.CharField(blank=True, max_length=64)),
+                ("result", models.JSONField(default=dict)),
+                ("computed_at", models.DateTimeField(null=True)),
+                ("requested_version", models.CharField(blank=True, max_length=64)),
+                ("requested_at", models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
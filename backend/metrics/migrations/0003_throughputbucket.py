@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("metrics", "0002_agreementreport"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThroughputBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "resolution",
+                    models.CharField(choices=[("minute", "Minute"), ("hour", "Hour"), ("day", "Day")], max_length=6),
+                ),
+                ("start", models.DateTimeField()),
+                ("labels", models.IntegerField(default=0)),
+                ("confirmations", models.IntegerField(default=0)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="throughput", to="projects.project"
+                    ),
+                ),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["project", "resolution", "start"], name="throughput_bucket_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="throughputbucket",
+            constraint=models.UniqueConstraint(
+                fields=("project", "user", "resolution", "start"), name="throughput_bucket_is_unique"
+            ),
+        ),
+    ]
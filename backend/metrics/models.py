@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from .managers import (
+    AgreementReportManager,
+    LabelTypeCountManager,
+    ProjectProgressManager,
+    ThroughputBucketManager,
+)
+from label_types.models import CategoryType, RelationType, SpanType
+from projects.models import Project
+
+
+class ProjectProgress(models.Model):
+    """The number of examples of a project, and of the examples confirmed by anyone."""
+
+    objects = ProjectProgressManager()
+
+    project = models.OneToOneField(to=Project, on_delete=models.CASCADE, primary_key=True)
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class MemberProgress(models.Model):
+    """The number of examples of a project a user confirmed, built along with `ProjectProgress`."""
+
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="member_progress")
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    done = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["project", "user"], name="member_progress_is_unique")]
+
+
+class LabelTypeCount(models.Model):
+    """The number of labels of a label type made by a user, kept up to date by the label managers.
+
+    `label_model` is the label model counted, as the label types of categories are shared with bounding boxes.
+    """
+
+    label_model = ""
+
+    objects = LabelTypeCountManager()
+
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        constraints = [models.UniqueConstraint(fields=["label_type", "user"], name="%(app_label)s_%(class)s_is_unique")]
+
+
+class CategoryTypeCount(LabelTypeCount):
+    label_model = "labels.Category"
+    label_type = models.ForeignKey(to=CategoryType, on_delete=models.CASCADE, related_name="counts")
+
+
+class SpanTypeCount(LabelTypeCount):
+    label_model = "labels.Span"
+    label_type = models.ForeignKey(to=SpanType, on_delete=models.CASCADE, related_name="counts")
+
+
+class RelationTypeCount(LabelTypeCount):
+    label_model = "labels.Relation"
+    label_type = models.ForeignKey(to=RelationType, on_delete=models.CASCADE, related_name="counts")
+
+
+class AgreementReport(models.Model):
+    """The inter-annotator agreement of a project, computed for the `version` of its labels.
+
+    `requested_version` is the version a task was last started for, so that the task isn't started again
+    for each read until it's done.
+    """
+
+    objects = AgreementReportManager()
+
+    project = models.OneToOneField(to=Project, on_delete=models.CASCADE, primary_key=True)
+    version = models.CharField(max_length=64, blank=True)
+    result = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(null=True)
+    requested_version = models.CharField(max_length=64, blank=True)
+    requested_at = models.DateTimeField(null=True)
+
+
+class ThroughputBucket(models.Model):
+    """The number of labels a user created and examples they confirmed in a project during a time bucket."""
+
+    class Resolution(models.TextChoices):
+        MINUTE = "minute"
+        HOUR = "hour"
+        DAY = "day"
+
+    objects = ThroughputBucketManager()
+
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="throughput")
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    resolution = models.CharField(max_length=6, choices=Resolution.choices)
+    start = models.DateTimeField()
+    labels = models.IntegerField(default=0)
+    confirmations = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "user", "resolution", "start"], name="throughput_bucket_is_unique"
+            )
+        ]
+        indexes = [models.Index(fields=["project", "resolution", "start"], name="throughput_bucket_idx")]
@@ -1,12 +1,31 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from api.tests.utils import CRUDMixin
-from examples.tests.utils import make_doc
+from examples.models import Example, ExampleState
+from examples.tests.utils import make_doc, make_example_state
 from label_types.tests.utils import make_label
+from labels.models import Category
+from metrics.agreement import find_overlaps, measure_agreement
+from metrics.celery_tasks import compute_agreement, rebuild_metrics
+from metrics.managers import bucket_start
+from metrics.models import (
+    CategoryTypeCount,
+    MemberProgress,
+    ProjectProgress,
+    ThroughputBucket,
+)
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
+from users.tests.utils import make_user
 
 
 class TestMemberProgress(CRUDMixin):
@@ -78,3 +97,310 @@ class TestCategoryDistribution(CRUDMixin):
         expected = {member.username: {self.label.text: 0} for member in self.project.members}
         expected[self.project.admin.username][self.label.text] = 1
         self.assertEqual(response.data, expected)
+
+
+class TestLabelTypeCount(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.label = make_label(self.project.item, text="label")
+        self.other_label = make_label(self.project.item, text="other")
+
+    def distribution(self):
+        return CategoryTypeCount.objects.distribution(self.project.item.id, [])
+
+    def test_count_created_labels(self):
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        mommy.make("Category", example=self.example, label=self.other_label, user=self.project.annotator)
+        expected = {self.project.admin.username: {"label": 1}, self.project.annotator.username: {"other": 1}}
+        self.assertEqual(self.distribution(), expected)
+
+    def test_count_bulk_created_labels(self):
+        categories = [
+            Category(example=self.example, label=self.label, user=user)
+            for user in [self.project.admin, self.project.annotator]
+        ]
+        Category.objects.bulk_create(categories)
+        expected = {self.project.admin.username: {"label": 1}, self.project.annotator.username: {"label": 1}}
+        self.assertEqual(self.distribution(), expected)
+
+    def test_move_count_to_new_label_type(self):
+        category = mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        category.label = self.other_label
+        category.save()
+        self.assertEqual(self.distribution(), {self.project.admin.username: {"other": 1}})
+
+    def test_uncount_deleted_labels(self):
+        category = mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        mommy.make("Category", example=self.example, label=self.other_label, user=self.project.admin)
+        category.delete()
+        Category.objects.filter(label=self.other_label).delete()
+        self.assertEqual(self.distribution(), {})
+
+    def test_rebuild(self):
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        CategoryTypeCount.objects.update(count=10)
+        rebuild_metrics(self.project.item.id)
+        self.assertEqual(self.distribution(), {self.project.admin.username: {"label": 1}})
+
+
+class TestProjectProgress(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.examples = [make_doc(self.project.item) for _ in range(3)]
+        self.progress = ProjectProgress.objects.get_or_rebuild(self.project.item.id)
+
+    def assert_progress(self, total, done, members):
+        progress = ProjectProgress.objects.get_or_rebuild(self.project.item.id)
+        self.assertEqual((progress.total, progress.done), (total, done))
+        items = MemberProgress.objects.filter(project=self.project.item, done__gt=0).values_list("user", "done")
+        self.assertEqual(dict(items), {user.id: count for user, count in members.items()})
+
+    def test_count_created_examples(self):
+        make_doc(self.project.item)
+        Example.objects.bulk_create([Example(project=self.project.item, text="example")])
+        self.assert_progress(5, 0, {})
+
+    def test_count_confirmations(self):
+        make_example_state(self.examples[0], self.project.admin)
+        make_example_state(self.examples[0], self.project.annotator)
+        make_example_state(self.examples[1], self.project.admin)
+        self.assert_progress(3, 2, {self.project.admin: 2, self.project.annotator: 1})
+
+    def test_uncount_deleted_confirmations(self):
+        state = make_example_state(self.examples[0], self.project.admin)
+        make_example_state(self.examples[0], self.project.annotator)
+        make_example_state(self.examples[1], self.project.admin)
+        state.delete()
+        self.assert_progress(3, 2, {self.project.admin: 1, self.project.annotator: 1})
+        ExampleState.objects.filter(example=self.examples[0]).delete()
+        self.assert_progress(3, 1, {self.project.admin: 1})
+
+    def test_uncount_removed_examples(self):
+        make_example_state(self.examples[0], self.project.admin)
+        make_example_state(self.examples[0], self.project.annotator)
+        make_example_state(self.examples[1], self.project.admin)
+        queryset = Example.objects.filter(pk__in=[self.examples[0].pk, self.examples[2].pk])
+        Example.objects.remove_progress(queryset)
+        queryset.delete()
+        self.assertTrue(ProjectProgress.objects.filter(project=self.project.item).exists())
+        self.assert_progress(1, 1, {self.project.admin: 1})
+
+    def test_read_progress_without_counting_examples(self):
+        make_example_state(self.examples[0], self.project.admin)
+        url = reverse(viewname="progress", args=[self.project.item.id])
+        self.client.force_login(self.project.admin)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.data, {"total": 3, "remaining": 2, "complete": 1})
+        tables = [Example._meta.db_table, ExampleState._meta.db_table]
+        self.assertFalse([query for query in context.captured_queries if any(t in query["sql"] for t in tables)])
+
+    def test_rebuild_after_invalidation(self):
+        make_example_state(self.examples[0], self.project.admin)
+        Example.objects.filter(pk=self.examples[0].pk).delete()
+        ProjectProgress.objects.invalidate(self.project.item.id)
+        self.assertFalse(ProjectProgress.objects.filter(project=self.project.item).exists())
+        self.assert_progress(2, 0, {})
+
+
+class TestCategoryAgreement(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION, single_class_classification=True)
+        self.examples = [make_doc(self.project.item) for _ in range(4)]
+        self.x = make_label(self.project.item, text="x")
+        self.y = make_label(self.project.item, text="y")
+
+    def label(self, user, labels):
+        for example, label in zip(self.examples, labels):
+            mommy.make("Category", example=example, label=label, user=user)
+
+    def test_single_label_kappa(self):
+        self.label(self.project.admin, [self.x, self.x, self.y, self.y])
+        self.label(self.project.annotator, [self.x, self.y, self.y, self.y])
+        agreement = measure_agreement(self.project.item)["category"]
+        self.assertEqual(agreement["items"], 4)
+        self.assertAlmostEqual(agreement["fleiss_kappa"], 7 / 15)
+        [pair] = agreement["pairwise"]
+        self.assertEqual(pair["users"], [self.project.admin.username, self.project.annotator.username])
+        self.assertEqual(pair["observed"], 0.75)
+        self.assertAlmostEqual(pair["kappa"], 0.5)
+
+    def test_multi_label_kappa(self):
+        self.project.item.single_class_classification = False
+        self.project.item.save()
+        self.label(self.project.admin, [self.x, self.y])
+        self.label(self.project.annotator, [self.x, self.y])
+        mommy.make("Category", example=self.examples[0], label=self.y, user=self.project.annotator)
+        [pair] = measure_agreement(self.project.item)["category"]["pairwise"]
+        self.assertEqual(pair["items"], 4)
+        self.assertAlmostEqual(pair["kappa"], 0.5)
+
+    def test_confirmation_without_label_is_rated_as_none(self):
+        self.label(self.project.admin, [self.x])
+        make_example_state(self.examples[0], self.project.annotator)
+        [pair] = measure_agreement(self.project.item)["category"]["pairwise"]
+        self.assertEqual((pair["items"], pair["observed"]), (1, 0.0))
+
+    def test_same_agreement_in_chunks(self):
+        self.label(self.project.admin, [self.x, self.x, self.y, self.y])
+        self.label(self.project.annotator, [self.x, self.y, self.y, self.y])
+        self.label(self.project.approver, [self.y, self.y, self.x])
+        self.assertEqual(measure_agreement(self.project.item, chunk_size=1), measure_agreement(self.project.item))
+
+
+class TestSpanAgreement(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        self.examples = [make_doc(self.project.item) for _ in range(3)]
+        self.label = make_label(self.project.item, text="L")
+        self.other_label = make_label(self.project.item, text="M")
+
+    def make_span(self, example, user, label, start, end):
+        mommy.make("Span", example=example, user=user, label=label, start_offset=start, end_offset=end)
+
+    def test_exact_and_overlap_f1(self):
+        admin, annotator = self.project.admin, self.project.annotator
+        self.make_span(self.examples[0], admin, self.label, 0, 5)
+        self.make_span(self.examples[0], admin, self.label, 10, 15)
+        self.make_span(self.examples[0], annotator, self.label, 0, 5)
+        self.make_span(self.examples[0], annotator, self.label, 12, 20)
+        self.make_span(self.examples[0], annotator, self.other_label, 30, 35)
+        # The annotator confirmed the second example without spans, and didn't rate the third one.
+        self.make_span(self.examples[1], admin, self.label, 0, 3)
+        make_example_state(self.examples[1], annotator)
+        self.make_span(self.examples[2], admin, self.label, 0, 3)
+        agreement = measure_agreement(self.project.item)["span"]
+        self.assertAlmostEqual(agreement["exact_f1"], 1 / 3)
+        self.assertAlmostEqual(agreement["overlap_f1"], 2 / 3)
+        self.assertEqual(agreement["pairwise"][0]["labels"], [3, 3])
+
+    def test_find_overlaps(self):
+        query = np.array([[0, 0, 5], [0, 5, 8], [1, 0, 5], [1, 20, 30]])
+        reference = np.array([[1, 4, 6], [0, 2, 3], [1, 10, 40]])
+        self.assertEqual(find_overlaps(query, reference).tolist(), [True, False, True, True])
+
+
+class TestTextAgreement(TestCase):
+    def test_exact_f1(self):
+        project = prepare_project(ProjectType.SEQ2SEQ)
+        example = make_doc(project.item)
+        for user, text in [(project.admin, "hi"), (project.admin, "yo"), (project.annotator, "hi")]:
+            mommy.make("TextLabel", example=example, user=user, text=text)
+        agreement = measure_agreement(project.item)["text"]
+        self.assertAlmostEqual(agreement["exact_f1"], 2 / 3)
+
+
+class TestAgreementAPI(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.label = make_label(self.project.item)
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        self.url = reverse(viewname="agreement", args=[self.project.item.id])
+
+    @patch("metrics.views.compute_agreement.delay")
+    def test_compute_once_per_version(self, delay):
+        self.assert_fetch(self.project.admin, status.HTTP_202_ACCEPTED)
+        self.assert_fetch(self.project.admin, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once_with(project_id=self.project.item.id)
+        compute_agreement(self.project.item.id)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "ready")
+        self.assertIn("category", response.data)
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.annotator)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "stale")
+        self.assertIn("category", response.data)
+        self.assertEqual(delay.call_count, 2)
+
+    def test_denies_non_member(self):
+        self.assert_fetch(make_user(), status.HTTP_403_FORBIDDEN)
+
+
+class TestThroughput(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.label = make_label(self.project.item)
+
+    def counts(self, resolution):
+        buckets = ThroughputBucket.objects.filter(project=self.project.item, resolution=resolution)
+        return sorted(buckets.values_list("user__username", "labels", "confirmations"))
+
+    def test_count_labels_and_confirmations(self):
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        Category.objects.bulk_create([Category(example=self.example, label=self.label, user=self.project.annotator)])
+        mommy.make("TextLabel", example=self.example, user=self.project.admin)
+        make_example_state(self.example, self.project.admin)
+        for resolution in ["minute", "hour", "day"]:
+            self.assertEqual(self.counts(resolution), [("admin", 2, 1), ("annotator", 1, 0)])
+
+    def test_add_updates_buckets_by_count(self):
+        at = datetime(2024, 5, 6, 7, 8, tzinfo=timezone.utc)
+        project_id = self.project.item.id
+        counter = {
+            (project_id, self.project.admin.id, at): 1,
+            (project_id, self.project.annotator.id, at): 1,
+            (project_id, self.project.approver.id, at + timedelta(days=1)): 2,
+        }
+        with CaptureQueriesContext(connection) as context:
+            ThroughputBucket.objects.add("labels", counter)
+        updates = [query for query in context.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.counts("day"), [("admin", 1, 0), ("annotator", 1, 0), ("approver", 2, 0)])
+
+    def test_bucket_start(self):
+        at = datetime(2024, 5, 6, 7, 8, 9, 10, tzinfo=timezone.utc)
+        self.assertEqual(bucket_start(at, "minute"), datetime(2024, 5, 6, 7, 8, tzinfo=timezone.utc))
+        self.assertEqual(bucket_start(at, "hour"), datetime(2024, 5, 6, 7, tzinfo=timezone.utc))
+        self.assertEqual(bucket_start(at, "day"), datetime(2024, 5, 6, tzinfo=timezone.utc))
+
+    def test_downsample_old_fine_buckets(self):
+        old = bucket_start(datetime.now(timezone.utc) - timedelta(days=365), "day")
+        for resolution in ["minute", "hour", "day"]:
+            mommy.make(
+                "ThroughputBucket",
+                project=self.project.item,
+                user=self.project.admin,
+                resolution=resolution,
+                start=old,
+                labels=1,
+            )
+        ThroughputBucket.objects.downsample()
+        self.assertEqual(list(ThroughputBucket.objects.values_list("resolution", flat=True)), ["day"])
+
+    def test_rebuild(self):
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.admin)
+        make_example_state(self.example, self.project.annotator)
+        ThroughputBucket.objects.all().delete()
+        rebuild_metrics(self.project.item.id, full=True)
+        for resolution in ["minute", "hour", "day"]:
+            self.assertEqual(self.counts(resolution), [("admin", 1, 0), ("annotator", 0, 1)])
+
+
+class TestThroughputAPI(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        example = make_doc(self.project.item)
+        mommy.make("Category", example=example, label=make_label(self.project.item), user=self.project.annotator)
+        self.url = reverse(viewname="throughput", args=[self.project.item.id])
+
+    def test_fetch_series(self):
+        self.url += "?resolution=minute"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        [series] = response.data["series"]
+        self.assertEqual(series["user"], self.project.annotator.username)
+        self.assertEqual([(item["labels"], item["confirmations"]) for item in series["buckets"]], [(1, 0)])
+
+    def test_fetch_nothing_before_period(self):
+        self.url += "?resolution=day&until=2000-01-01T00:00:00Z"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["series"], [])
+
+    def test_reject_unknown_resolution(self):
+        self.url += "?resolution=week"
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_denies_non_member(self):
+        self.assert_fetch(make_user(), status.HTTP_403_FORBIDDEN)
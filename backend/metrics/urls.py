@@ -1,11 +1,13 @@
 from django.urls import path
 
 from .views import (
+    AgreementAPI,
     CategoryTypeDistribution,
     MemberProgressAPI,
     ProgressAPI,
     RelationTypeDistribution,
     SpanTypeDistribution,
+    ThroughputAPI,
 )
 
 urlpatterns = [
@@ -14,4 +16,6 @@ urlpatterns = [
     path(route="category-distribution", view=CategoryTypeDistribution.as_view(), name="category_distribution"),
     path(route="relation-distribution", view=RelationTypeDistribution.as_view(), name="relation_distribution"),
     path(route="span-distribution", view=SpanTypeDistribution.as_view(), name="span_distribution"),
+    path(route="agreement", view=AgreementAPI.as_view(), name="agreement"),
+    path(route="throughput", view=ThroughputAPI.as_view(), name="throughput"),
 ]
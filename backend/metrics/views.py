@@ -1,15 +1,29 @@
 import abc
+from datetime import timedelta
 
-from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from examples.models import Example, ExampleState
-from label_types.models import CategoryType, LabelType, RelationType, SpanType
-from labels.models import Category, Label, Relation, Span
-from projects.models import Member, Project
+from .agreement import annotation_version
+from .celery_tasks import compute_agreement
+from .managers import bucket_start
+from .models import (
+    AgreementReport,
+    CategoryTypeCount,
+    LabelTypeCount,
+    MemberProgress,
+    ProjectProgress,
+    RelationTypeCount,
+    SpanTypeCount,
+    ThroughputBucket,
+)
+from projects.context import get_project_context
+from projects.models import Member
 from projects.permissions import IsProjectAdmin, IsProjectStaffAndReadOnly
 
 
@@ -17,13 +31,14 @@ class ProgressAPI(APIView):
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
 
     def get(self, request, *args, **kwargs):
-        examples = Example.objects.filter(project=self.kwargs["project_id"]).values("id")
-        total = examples.count()
-        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
+        progress = ProjectProgress.objects.get_or_rebuild(project.id)
+        total = progress.total
         if project.collaborative_annotation:
-            complete = ExampleState.objects.count_done(examples)
+            complete = progress.done
         else:
-            complete = ExampleState.objects.count_done(examples, user=self.request.user)
+            member = MemberProgress.objects.filter(project=project, user=self.request.user).first()
+            complete = 0 if member is None else member.done
         data = {"total": total, "remaining": total - complete, "complete": complete}
         return Response(data=data, status=status.HTTP_200_OK)
 
@@ -32,35 +47,117 @@ class MemberProgressAPI(APIView):
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
 
     def get(self, request, *args, **kwargs):
-        examples = Example.objects.filter(project=self.kwargs["project_id"]).values("id")
-        members = Member.objects.filter(project=self.kwargs["project_id"])
-        data = ExampleState.objects.measure_member_progress(examples, members)
+        progress = ProjectProgress.objects.get_or_rebuild(self.kwargs["project_id"])
+        done = (
+            MemberProgress.objects.filter(project_id=self.kwargs["project_id"], done__gt=0)
+            .order_by("user_id")
+            .values_list("user__username", "done")
+        )
+        data = {"total": progress.total, "progress": [{"user": username, "done": count} for username, count in done]}
+        members_with_progress = {item["user"] for item in data["progress"]}
+        for member in Member.objects.filter(project=self.kwargs["project_id"]).select_related("user"):
+            if member.username not in members_with_progress:
+                data["progress"].append({"user": member.username, "done": 0})
         return Response(data=data, status=status.HTTP_200_OK)
 
 
 class LabelDistribution(abc.ABC, APIView):
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
-    model = Label
-    label_type = LabelType
+    model = LabelTypeCount
 
     def get(self, request, *args, **kwargs):
-        labels = self.label_type.objects.filter(project=self.kwargs["project_id"])
-        examples = Example.objects.filter(project=self.kwargs["project_id"]).values("id")
-        members = Member.objects.filter(project=self.kwargs["project_id"])
-        data = self.model.objects.calc_label_distribution(examples, members, labels)
+        members = Member.objects.filter(project=self.kwargs["project_id"]).select_related("user")
+        data = self.model.objects.distribution(self.kwargs["project_id"], members)
         return Response(data=data, status=status.HTTP_200_OK)
 
 
 class CategoryTypeDistribution(LabelDistribution):
-    model = Category
-    label_type = CategoryType
+    model = CategoryTypeCount
 
 
 class SpanTypeDistribution(LabelDistribution):
-    model = Span
-    label_type = SpanType
+    model = SpanTypeCount
 
 
 class RelationTypeDistribution(LabelDistribution):
-    model = Relation
-    label_type = RelationType
+    model = RelationTypeCount
+
+
+class AgreementAPI(APIView):
+    """The agreement between the annotators of the project, as the Cohen's and Fleiss' kappa on the categories,
+    and the F1 score of each pair of annotators on the spans and the text labels.
+
+    The agreement is computed by a task, and stored for the version of the labels it was computed from.
+    While the labels changed since, the task is started, and the last report is returned as stale,
+    or the response is pending if there is none yet.
+    """
+
+    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
+
+    def get(self, request, *args, **kwargs):
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
+        version = annotation_version(project)
+        report = AgreementReport.objects.filter(project=project).first()
+        if report is not None and report.version == version:
+            data = {"status": "ready", "computed_at": report.computed_at, **report.result}
+            return Response(data=data, status=status.HTTP_200_OK)
+        if AgreementReport.objects.request(project.id, version):
+            compute_agreement.delay(project_id=project.id)
+        if report is not None and report.computed_at is not None:
+            data = {"status": "stale", "computed_at": report.computed_at, **report.result}
+            return Response(data=data, status=status.HTTP_200_OK)
+        return Response(data={"status": "pending"}, status=status.HTTP_202_ACCEPTED)
+
+
+def parse_timestamp(query_params, name: str):
+    value = query_params.get(name)
+    if value is None:
+        return None
+    try:
+        timestamp = parse_datetime(value)
+    except (TypeError, ValueError):
+        timestamp = None
+    if timestamp is None:
+        raise ValidationError({name: "The timestamp must be in the ISO 8601 format."})
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+class ThroughputAPI(APIView):
+    """The number of labels created and examples confirmed by each user of the project in time buckets.
+
+    The query parameters are the `resolution` of the buckets, "minute", "hour" or "day",
+    and the period, from `since` to `until` in the ISO 8601 format, by default the last one of `periods`.
+    Only the buckets with writes are returned.
+    """
+
+    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
+    periods = {"minute": timedelta(hours=1), "hour": timedelta(days=7), "day": timedelta(days=90)}
+
+    def get(self, request, *args, **kwargs):
+        resolution = request.query_params.get("resolution", ThroughputBucket.Resolution.HOUR)
+        if resolution not in ThroughputBucket.Resolution.values:
+            raise ValidationError({"resolution": f"The resolution must be one of {', '.join(self.periods)}."})
+        until = parse_timestamp(request.query_params, "until") or timezone.now()
+        since = parse_timestamp(request.query_params, "since") or until - self.periods[resolution]
+        buckets = (
+            ThroughputBucket.objects.filter(
+                project_id=self.kwargs["project_id"],
+                resolution=resolution,
+                start__gte=bucket_start(since, resolution),
+                start__lte=until,
+            )
+            .order_by("user__username", "start")
+            .values_list("user__username", "start", "labels", "confirmations")
+        )
+        series: dict = {}
+        for username, start, labels, confirmations in buckets:
+            series.setdefault(username, []).append({"start": start, "labels": labels, "confirmations": confirmations})
+        data = {
+            "resolution": resolution,
+            "since": since,
+            "until": until,
+            "series": [{"user": username, "buckets": items} for username, items in series.items()],
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
@@ -0,0 +1,68 @@
+from functools import cached_property
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+
+from .models import Member, Project, role_cache_key
+
+# The cached role of a user who isn't a member, as None is a cache miss.
+NO_ROLE = ""
+
+
+class ProjectContext:
+    """The project of a request and the role of the user of the request in it, each loaded at most once.
+
+    The role is also cached for `PROJECT_ROLE_CACHE_TTL` seconds, if set, to be shared by the next requests.
+    It's removed from the cache when the membership changes, or the project or the user is deleted.
+    """
+
+    def __init__(self, project_id, user):
+        self.project_id = project_id
+        self.user = user
+
+    @cached_property
+    def project(self) -> Project:
+        """The project, as an instance of its subclass, e.g. `SequenceLabelingProject`. Raise 404 if not found."""
+        return get_object_or_404(Project, pk=self.project_id)
+
+    @cached_property
+    def role_name(self) -> Optional[str]:
+        """The name of the role of the user in the project, or None if they aren't a member."""
+        if not self.user.is_authenticated:
+            return None
+        ttl = getattr(settings, "PROJECT_ROLE_CACHE_TTL", 0)
+        key = role_cache_key(self.project_id, self.user.pk)
+        if ttl:
+            role_name = cache.get(key)
+            if role_name is not None:
+                return role_name or None
+        members = Member.objects.filter(project=self.project_id, user=self.user)
+        role_name = members.values_list("role__name", flat=True).first()
+        if ttl:
+            cache.set(key, role_name or NO_ROLE, ttl)
+        return role_name
+
+    def has_role(self, role_name: str) -> bool:
+        return self.role_name == role_name
+
+    @property
+    def is_admin(self) -> bool:
+        return self.has_role(settings.ROLE_PROJECT_ADMIN)
+
+
+def get_project_context(request, project_id) -> ProjectContext:
+    """The context of the project for the request, made once for each project of the request.
+
+    It's kept on the underlying Django request, so that it's shared by the permissions, the view and the serializers,
+    whichever of the request or its wrapper by the framework they are given.
+    """
+    http_request = getattr(request, "_request", request)
+    contexts = getattr(http_request, "project_contexts", None)
+    if contexts is None:
+        contexts = http_request.project_contexts = {}
+    key = str(project_id)
+    if key not in contexts:
+        contexts[key] = ProjectContext(project_id, request.user)
+    return contexts[key]
@@ -1,12 +1,16 @@
 import abc
 import uuid
+from functools import partial
 from typing import Any, Dict, Optional
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Manager
+from django.db import models, transaction
+from django.db.models import Manager, QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from polymorphic.models import PolymorphicModel
 
 from roles.models import Role
@@ -96,9 +100,14 @@ class Project(PolymorphicModel):
         bulk_clone(self.examples.all(), field_initializers={"uuid": uuid.uuid4})
 
         # clone label types
-        bulk_clone(self.categorytype_set.all())
-        bulk_clone(self.spantype_set.all())
-        bulk_clone(self.relationtype_set.all())
+        # labels are not cloned, so the label types are unused
+        # the parents point to the source project, so the taxonomy is copied after cloning
+        taxonomy_initializers = {"usage_count": 0, "parent": None, "path": ""}
+        bulk_clone(self.categorytype_set.all(), field_initializers=taxonomy_initializers)
+        bulk_clone(self.spantype_set.all(), field_initializers=taxonomy_initializers)
+        bulk_clone(self.relationtype_set.all(), field_initializers={"usage_count": 0})
+        self.categorytype_set.model.objects.copy_taxonomy(self.pk, project.pk)
+        self.spantype_set.model.objects.copy_taxonomy(self.pk, project.pk)
 
         return project
 
@@ -172,7 +181,33 @@ class Tag(models.Model):
         return self.text
 
 
-class MemberManager(Manager):
+def role_cache_key(project_id, user_id) -> str:
+    """The key of the cached role of the user in the project, see `projects.context.ProjectContext`."""
+    return f"project-role:{project_id}:{user_id}"
+
+
+def forget_cached_roles(keys, using=None):
+    """Remove the cached roles once the transaction commits, so that no request caches the old role meanwhile."""
+    if keys:
+        transaction.on_commit(partial(cache.delete_many, list(keys)), using=using)
+
+
+class MemberQuerySet(QuerySet):
+    def forget_roles(self):
+        """Remove the roles of the members of this queryset from the cache, e.g. as they are changed."""
+        rows = self.order_by().values_list("project_id", "user_id")
+        forget_cached_roles([role_cache_key(project_id, user_id) for project_id, user_id in rows], using=self.db)
+
+    def update(self, **kwargs):
+        # A bulk update skips `Member.save`, so the roles are forgotten here, under the keys before and after it.
+        pks = list(self.values_list("pk", flat=True))
+        self.forget_roles()
+        count = super().update(**kwargs)
+        self.model.objects.using(self.db).filter(pk__in=pks).forget_roles()
+        return count
+
+
+class MemberManager(Manager.from_queryset(MemberQuerySet)):  # type: ignore
     def can_update(self, project: int, member_id: int, new_role: str) -> bool:
         """The project needs at least 1 admin.
 
@@ -210,6 +245,10 @@ class Member(models.Model):
             message = "This user is already assigned to a role in this project."
             raise ValidationError(message)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        forget_cached_roles([role_cache_key(self.project_id, self.user_id)], using=self._state.db)
+
     def is_admin(self):
         return self.role.name == settings.ROLE_PROJECT_ADMIN
 
@@ -219,3 +258,9 @@ class Member(models.Model):
 
     class Meta:
         unique_together = ("user", "project")
+
+
+@receiver(post_delete, sender=Member)
+def forget_deleted_member_role(sender, instance, using, **kwargs):
+    # A receiver rather than `Member.delete`, as the members are also deleted along with their project or user.
+    forget_cached_roles([role_cache_key(instance.project_id, instance.user_id)], using=using)
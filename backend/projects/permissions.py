@@ -1,7 +1,7 @@
 from django.conf import settings
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
-from .models import Member
+from .context import get_project_context
 
 
 class RolePermission(BasePermission):
@@ -24,7 +24,8 @@ class RolePermission(BasePermission):
         if not project_id and request.method in SAFE_METHODS:
             return True
 
-        return Member.objects.has_role(project_id, request.user, self.role_name)
+        # The role is loaded once for the request, whichever permission of an OR-chain asks first.
+        return get_project_context(request, project_id).has_role(self.role_name)
 
 
 class IsProjectAdmin(RolePermission):
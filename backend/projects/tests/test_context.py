@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+
+from examples.tests.utils import make_doc
+from projects.context import get_project_context
+from projects.models import (
+    Member,
+    Project,
+    ProjectType,
+    TextClassificationProject,
+    role_cache_key,
+)
+from projects.tests.utils import prepare_project
+from roles.models import Role
+from users.tests.utils import make_user
+
+
+class TestProjectContext(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.request = RequestFactory().get("/")
+        self.request.user = self.project.annotator
+        cache.clear()
+
+    def context(self):
+        return get_project_context(self.request, self.project.item.id)
+
+    def test_load_once_per_request(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(self.context().has_role(settings.ROLE_ANNOTATOR))
+            self.assertFalse(self.context().has_role(settings.ROLE_PROJECT_ADMIN))
+        self.assertIsInstance(self.context().project, TextClassificationProject)
+        with self.assertNumQueries(0):
+            self.context().project
+
+    def test_non_member_has_no_role(self):
+        self.request.user = make_user()
+        self.assertIsNone(self.context().role_name)
+
+    @override_settings(PROJECT_ROLE_CACHE_TTL=60)
+    def test_share_role_across_requests(self):
+        self.assertEqual(self.context().role_name, settings.ROLE_ANNOTATOR)
+        self.request = RequestFactory().get("/")
+        self.request.user = self.project.annotator
+        with self.assertNumQueries(0):
+            self.assertEqual(self.context().role_name, settings.ROLE_ANNOTATOR)
+
+    def cached_role(self, user=None):
+        user = user or self.project.annotator
+        return cache.get(role_cache_key(self.project.item.id, user.id))
+
+    @override_settings(PROJECT_ROLE_CACHE_TTL=60)
+    def test_forget_cached_role_on_membership_changes(self):
+        self.context().role_name
+        member = Member.objects.get(project=self.project.item, user=self.project.annotator)
+        member.role = Role.objects.get(name=settings.ROLE_PROJECT_ADMIN)
+        with self.captureOnCommitCallbacks(execute=True):
+            member.save()
+        request = RequestFactory().get("/")
+        request.user = self.project.annotator
+        self.assertEqual(get_project_context(request, self.project.item.id).role_name, settings.ROLE_PROJECT_ADMIN)
+        with self.captureOnCommitCallbacks(execute=True):
+            Member.objects.filter(project=self.project.item).delete()
+        request = RequestFactory().get("/")
+        request.user = self.project.annotator
+        self.assertIsNone(get_project_context(request, self.project.item.id).role_name)
+
+    @override_settings(PROJECT_ROLE_CACHE_TTL=60)
+    def test_forget_cached_roles_on_bulk_update(self):
+        self.context().role_name
+        admin = Role.objects.get(name=settings.ROLE_PROJECT_ADMIN)
+        with self.captureOnCommitCallbacks(execute=True):
+            Member.objects.filter(project=self.project.item, user=self.project.annotator).update(role=admin)
+        self.assertIsNone(self.cached_role())
+
+    @override_settings(PROJECT_ROLE_CACHE_TTL=60)
+    def test_keep_cached_role_until_commit(self):
+        self.context().role_name
+        member = Member.objects.get(project=self.project.item, user=self.project.annotator)
+        with self.captureOnCommitCallbacks() as callbacks:
+            member.delete()
+        self.assertEqual(self.cached_role(), settings.ROLE_ANNOTATOR)
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(self.cached_role())
+
+    @override_settings(PROJECT_ROLE_CACHE_TTL=60)
+    def test_forget_cached_role_on_project_delete(self):
+        self.context().role_name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.item.delete()
+        self.assertIsNone(self.cached_role())
+
+    @override_settings(PROJECT_ROLE_CACHE_TTL=60)
+    def test_forget_cached_role_on_user_delete(self):
+        self.context().role_name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.annotator.delete()
+        self.assertIsNone(self.cached_role())
+
+
+class TestRolePermission(TestCase):
+    def test_resolve_membership_once_per_request(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        example = make_doc(project.item)
+        url = reverse(viewname="category_list", args=[project.item.id, example.id])
+        # The admin is the last role of the chain of `IsProjectMember` to be checked.
+        self.client.force_login(project.admin)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        tables = [Member._meta.db_table, Project._meta.db_table]
+        for table in tables:
+            queries = [query for query in context.captured_queries if f'FROM "{table}"' in query["sql"]]
+            self.assertLessEqual(len(queries), 1, table)
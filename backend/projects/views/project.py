@@ -1,11 +1,11 @@
 from django.conf import settings
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status, views
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from projects.context import get_project_context
 from projects.models import Project
 from projects.permissions import IsProjectAdmin, IsProjectStaffAndReadOnly
 from projects.serializers import ProjectPolymorphicSerializer
@@ -55,13 +55,18 @@ class ProjectDetail(generics.RetrieveUpdateDestroyAPIView):
     lookup_url_kwarg = "project_id"
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
 
+    def get_object(self):
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
+        self.check_object_permissions(self.request, project)
+        return project
+
 
 class CloneProject(views.APIView):
     permission_classes = [IsAuthenticated & IsProjectAdmin]
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        project = get_project_context(self.request, self.kwargs["project_id"]).project
         cloned_project = project.clone()
         serializer = ProjectPolymorphicSerializer(cloned_project)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
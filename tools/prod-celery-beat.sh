@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+
+set -o errexit
+set -o nounset
+
+cd /backend
+
+(
+  echo "Waiting for database"
+  python manage.py wait_for_db
+
+  echo "Starting celery beat"
+  "celery" --app=config beat --loglevel=info
+)
@@ -48,6 +48,10 @@ echo "Starting celery"
 celery --app=config worker --loglevel=INFO --concurrency="${CELERY_WORKERS:-1}" &
 celery_pid="$!"
 
+echo "Starting celery beat"
+celery --app=config beat --loglevel=INFO &
+beat_pid="$!"
+
 echo "Starting flower"
 if [[ -n "${FLOWER_BASIC_AUTH:-}" ]]; then
   celery --app=config flower --basic_auth="${FLOWER_BASIC_AUTH}" &
@@ -60,6 +64,9 @@ while :; do
   elif [[ ! -e "/proc/${gunicorn_pid}" ]]; then
     echo "gunicorn crashed" >&2
     exit 2
+  elif [[ ! -e "/proc/${beat_pid}" ]]; then
+    echo "celery beat crashed" >&2
+    exit 3
   else
     sleep 10
   fi